@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+合成数据生成脚本
+Synthetic data generation script
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.synthetic_data import main as synthetic_main
+
+
+if __name__ == "__main__":
+    synthetic_main()
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+回测结果查询脚本
+Query the backtest results store
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.results_store import main as results_main
+
+
+if __name__ == "__main__":
+    results_main()
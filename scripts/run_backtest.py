@@ -2,8 +2,15 @@
 """
 统一的回测运行脚本
 Unified backtest runner script
+
+回测模块（连同 Nautilus、pandas、numpy）在参数解析之后才按回测类型导入，
+--help 和参数错误立即返回；--profile-startup 输出启动阶段的导入耗时分解。
 """
 
+import time
+
+_START = time.perf_counter()
+
 import sys
 import argparse
 from pathlib import Path
@@ -11,34 +18,116 @@ from pathlib import Path
 # 添加项目根目录到Python路径
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.backtest.backtest_with_real_data import run_backtest_with_real_data
-from src.backtest.simple_grid_backtest import run_simple_grid_backtest
+from src.backtest.instruments import INSTRUMENT_FACTORIES
+
+
+def _load_runner(args):
+    """按回测类型导入对应的回测模块，返回运行函数"""
+    if args.type == "simple":
+        from src.backtest.simple_grid_backtest import run_simple_grid_backtest
+        print("运行简单回测...")
+        return run_simple_grid_backtest
+    elif args.type == "multi":
+        from src.backtest.multi_instrument_backtest import (
+            run_multi_instrument_backtest,
+            parse_pairs,
+            DEFAULT_PAIRS,
+        )
+        pairs = parse_pairs(args.pair) if args.pair else DEFAULT_PAIRS
+        print(f"运行多品种组合回测: {', '.join(symbol for symbol, _ in pairs)}")
+        return lambda: run_multi_instrument_backtest(pairs)
+    elif args.type == "bar":
+        from src.backtest.bar_backtest import run_bar_backtest, DEFAULT_OHLC_FILE
+        data_file = args.data or DEFAULT_OHLC_FILE
+        print(f"使用K线数据运行回测: {data_file}")
+        return lambda: run_bar_backtest(data_file, args.strategy)
+    elif args.type == "checkpoint":
+        from src.backtest.checkpoint_backtest import run_checkpointed_backtest, DEFAULT_RUN_DIR
+        data_file = args.data or "nautilus_data/historical/BTCUSDT_quotes.csv"
+        print(f"运行可续跑回测: {data_file}")
+        return lambda: run_checkpointed_backtest(
+            data_file, run_dir=args.run_dir or DEFAULT_RUN_DIR, resume=args.resume
+        )
+    else:
+        from src.backtest.backtest_with_real_data import run_backtest_with_real_data
+        data_file = args.data or "nautilus_data/historical/BTCUSDT_quotes.csv"
+        print(f"使用真实数据运行回测: {data_file}")
+        return lambda: run_backtest_with_real_data(data_file, args.start, args.end, args.instrument)
 
 
 def main():
     parser = argparse.ArgumentParser(description="运行策略回测")
     parser.add_argument(
         "--type",
-        choices=["simple", "real"],
+        choices=["simple", "real", "multi", "bar", "checkpoint"],
         default="simple",
-        help="回测类型: simple(简单测试) 或 real(真实数据)"
+        help="回测类型: simple(简单测试)、real(真实数据)、multi(多品种组合)、bar(OHLC K线) 或 checkpoint(可续跑)"
     )
     parser.add_argument(
         "--data",
         type=str,
-        help="历史数据文件路径（仅用于real类型）"
+        help="历史数据文件路径（用于real、bar和checkpoint类型）"
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=["grid", "simple"],
+        default="grid",
+        help="K线回测使用的策略（仅用于bar类型）"
+    )
+    parser.add_argument(
+        "--pair",
+        action="append",
+        help="品种与数据文件，如 EURUSD=nautilus_data/EURUSD_quotes.parquet（仅用于multi类型，可重复）"
+    )
+    parser.add_argument(
+        "--run-dir",
+        type=str,
+        default=None,
+        help="检查点目录（仅用于checkpoint类型，默认 data/results/checkpoints/grid_btcusdt）"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="从最后一个检查点继续（仅用于checkpoint类型）"
+    )
+    parser.add_argument(
+        "--start",
+        type=str,
+        help="回测开始时间，如 2024-01-01T00:00（仅用于real类型，只读取窗口内的数据）"
+    )
+    parser.add_argument(
+        "--end",
+        type=str,
+        help="回测结束时间（仅用于real类型）"
+    )
+    parser.add_argument(
+        "--instrument",
+        type=str.upper,
+        default=None,
+        choices=list(INSTRUMENT_FACTORIES),
+        help="交易品种代码，需与数据文件一致（仅用于real类型，默认从数据文件名推断）"
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="输出启动阶段（参数解析和模块导入）的耗时分解"
     )
     
     args = parser.parse_args()
     
-    if args.type == "simple":
-        print("运行简单回测...")
-        run_simple_grid_backtest()
+    if args.profile_startup:
+        from src.monitoring.profiling import ImportProfiler
+        
+        parsed = time.perf_counter()
+        with ImportProfiler() as profiler:
+            runner = _load_runner(args)
+        print(f"参数解析: {(parsed - _START) * 1000:.1f} ms")
+        profiler.print_summary()
     else:
-        data_file = args.data or "nautilus_data/historical/BTCUSDT_quotes.csv"
-        print(f"使用真实数据运行回测: {data_file}")
-        run_backtest_with_real_data(data_file)
+        runner = _load_runner(args)
+    
+    runner()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
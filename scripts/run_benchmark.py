@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+性能基准测试脚本
+Benchmark runner script
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.backtest.benchmark import main as benchmark_main
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark_main())
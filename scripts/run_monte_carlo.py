@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+蒙特卡洛稳健性测试脚本
+Monte Carlo robustness test runner
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.backtest.monte_carlo import main as monte_carlo_main
+
+
+if __name__ == "__main__":
+    monte_carlo_main()
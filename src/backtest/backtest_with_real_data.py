@@ -16,26 +16,43 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from nautilus_trader.backtest.engine import BacktestEngine, BacktestEngineConfig
 from nautilus_trader.config import LoggingConfig
-from nautilus_trader.model.currencies import USDT
 from nautilus_trader.model.enums import AccountType, OmsType
 from nautilus_trader.model.identifiers import Venue
 from nautilus_trader.model.objects import Money
-from nautilus_trader.test_kit.stubs.data import TestInstrumentProvider
 from nautilus_trader.model.data import QuoteTick
-from nautilus_trader.model.objects import Price, Quantity
 
+from src.backtest.instruments import INSTRUMENT_FACTORIES, get_test_instrument, symbol_from_filename
+from src.data.bar_pyramid import load_pyramid
+from src.data.quote_store import read_quotes
+from src.data.results_store import ResultsStore, fills_from_report
+from src.utils.fixed_point import from_units, to_units, units_to_raw
 from src.strategies.simple_grid import SimpleGridStrategy, SimpleGridStrategyConfig
 
 
-def load_historical_quotes(file_path):
-    """加载历史报价数据"""
+def load_historical_quotes(file_path, start=None, end=None, symbol=None):
+    """
+    加载历史报价数据
+
+    指定 start/end 时只读取该时间窗口的数据（过滤条件下推到存储层），
+    指定 symbol 时按文件中的 symbol 列过滤品种；文件没有 symbol 列时
+    （如单品种CSV），文件名中的品种代码必须与 symbol 一致。
+    """
     print(f"加载数据: {file_path}")
     
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"数据文件不存在: {file_path}")
     
-    # 读取CSV文件
-    df = pd.read_csv(file_path, index_col='timestamp', parse_dates=True)
+    # 读取CSV或Parquet文件
+    df = read_quotes(file_path, start=start, end=end, symbol=symbol)
+    if df.empty:
+        raise ValueError(f"时间窗口内没有数据: {start or '开始'} 到 {end or '结束'}")
+    
+    if symbol and "symbol" not in df.columns:
+        file_symbol = symbol_from_filename(file_path)
+        if file_symbol is None:
+            print(f"警告: 数据文件没有 symbol 列，无法确认数据属于 {symbol.upper()}")
+        elif file_symbol != symbol.upper():
+            raise ValueError(f"数据文件 {file_path} 是 {file_symbol} 的数据，与交易品种 {symbol.upper()} 不一致")
     
     print(f"加载了 {len(df)} 条数据")
     print(f"时间范围: {df.index[0]} 到 {df.index[-1]}")
@@ -45,36 +62,57 @@ def load_historical_quotes(file_path):
 
 
 def create_quote_ticks(df, instrument):
-    """将DataFrame转换为QuoteTick对象"""
-    ticks = []
-    
-    for timestamp, row in df.iterrows():
-        tick = QuoteTick(
-            instrument_id=instrument.id,
-            bid_price=Price.from_str(f"{row['bid_price']:.2f}"),
-            ask_price=Price.from_str(f"{row['ask_price']:.2f}"),
-            bid_size=Quantity.from_str(f"{row['bid_size']:.6f}"),
-            ask_size=Quantity.from_str(f"{row['ask_size']:.6f}"),
-            ts_event=timestamp.value,
-            ts_init=timestamp.value,
+    """
+    将DataFrame转换为QuoteTick对象
+
+    整列价格和数量一次性换算为品种精度下的定点整数，再由 raw 值直接构造，
+    不再逐行格式化字符串和解析。
+    """
+    price_precision = instrument.price_precision
+    size_precision = instrument.size_precision
+    
+    bid_prices = units_to_raw(to_units(df['bid_price'].to_numpy(), price_precision), price_precision)
+    ask_prices = units_to_raw(to_units(df['ask_price'].to_numpy(), price_precision), price_precision)
+    bid_sizes = units_to_raw(to_units(df['bid_size'].to_numpy(), size_precision), size_precision)
+    ask_sizes = units_to_raw(to_units(df['ask_size'].to_numpy(), size_precision), size_precision)
+    timestamps = df.index.as_unit("ns").asi8.tolist()
+    
+    instrument_id = instrument.id
+    from_raw = QuoteTick.from_raw
+    return [
+        from_raw(
+            instrument_id, bid, ask, price_precision, price_precision,
+            bid_size, ask_size, size_precision, size_precision, ts, ts,
         )
-        ticks.append(tick)
-    
-    return ticks
+        for bid, ask, bid_size, ask_size, ts in zip(bid_prices, ask_prices, bid_sizes, ask_sizes, timestamps)
+    ]
 
 
-def analyze_price_range(df):
-    """分析价格范围，为网格策略提供参考"""
-    mid_prices = (df['bid_price'] + df['ask_price']) / 2
-    
-    stats = {
-        'mean': mid_prices.mean(),
-        'std': mid_prices.std(),
-        'min': mid_prices.min(),
-        'max': mid_prices.max(),
-        'range': mid_prices.max() - mid_prices.min(),
-        'volatility': mid_prices.std() / mid_prices.mean() * 100
-    }
+def analyze_price_range(df, price_precision=8, pyramid=None):
+    """
+    分析价格范围，为网格策略提供参考
+
+    中间价以定点整数计算（买卖价之和，精确），最高/最低价不受浮点舍入影响。
+    传入 pyramid（BarPyramid）时按 df 的时间范围从预先计算的K线金字塔取统计，不再遍历报价。
+    """
+    if pyramid is not None:
+        stats = pyramid.stats(df.index[0], df.index[-1])
+    else:
+        # 买卖价之和（中间价的2倍）是精确的整数
+        mid_units = (
+            to_units(df['bid_price'].to_numpy(), price_precision)
+            + to_units(df['ask_price'].to_numpy(), price_precision)
+        )
+        mid_prices = from_units(mid_units, price_precision) / 2
+
+        stats = {
+            'mean': mid_prices.mean(),
+            'std': mid_prices.std(ddof=1),
+            'min': mid_prices.min(),
+            'max': mid_prices.max(),
+            'range': from_units(mid_units.max() - mid_units.min(), price_precision) / 2,
+            'volatility': mid_prices.std(ddof=1) / mid_prices.mean() * 100
+        }
     
     print("\n价格分析:")
     print(f"平均价格: ${stats['mean']:.2f}")
@@ -93,13 +131,35 @@ def analyze_price_range(df):
     return stats, suggested_lower, suggested_upper
 
 
-def run_backtest_with_real_data(data_file="nautilus_data/historical/BTCUSDT_quotes.csv"):
-    """使用真实数据运行回测"""
+def run_backtest_with_real_data(
+    data_file="nautilus_data/historical/BTCUSDT_quotes.csv",
+    start=None,
+    end=None,
+    instrument_symbol=None,
+    save_results=False,
+):
+    """
+    使用真实数据运行回测
+
+    参数:
+    - start / end: 回测时间窗口，只加载和转换窗口内的数据；
+      未指定时间窗口时最多使用前10000条数据
+    - instrument_symbol: 交易品种代码，未指定时从数据文件名推断（无法推断时为BTCUSDT）
+    - save_results: 把配置、汇总指标和逐笔成交写入结果存储（data/results）
+
+    返回汇总指标 dict
+    """
     print("=== 使用真实历史数据回测 ===\n")
     
+    if instrument_symbol is None:
+        instrument_symbol = symbol_from_filename(data_file) or "BTCUSDT"
+    
     # 1. 加载历史数据
     try:
-        df = load_historical_quotes(data_file)
+        df = load_historical_quotes(data_file, start=start, end=end, symbol=instrument_symbol)
+    except ValueError as e:
+        print(f"\n错误: {e}")
+        return
     except FileNotFoundError:
         print("\n错误: 未找到历史数据文件!")
         print("请先运行以下命令下载数据:")
@@ -108,8 +168,10 @@ def run_backtest_with_real_data(data_file="nautilus_data/historical/BTCUSDT_quot
         print("  python download_historical_data.py")
         return
     
-    # 2. 分析价格范围
-    stats, suggested_lower, suggested_upper = analyze_price_range(df)
+    # 2. 分析价格范围（数据文件有K线金字塔缓存时从缓存取统计，否则统计已加载的报价）
+    instrument = get_test_instrument(instrument_symbol)
+    pyramid = load_pyramid(data_file, instrument_symbol, instrument.price_precision)
+    stats, suggested_lower, suggested_upper = analyze_price_range(df, instrument.price_precision, pyramid)
     
     # 3. 创建回测引擎
     config = BacktestEngineConfig(
@@ -117,30 +179,30 @@ def run_backtest_with_real_data(data_file="nautilus_data/historical/BTCUSDT_quot
     )
     engine = BacktestEngine(config=config)
     
-    # 4. 创建交易工具
-    instrument = TestInstrumentProvider.btcusdt_binance()
+    # 4. 交易工具
     venue = instrument.id.venue
+    currency = instrument.quote_currency
     
     # 5. 添加交易场所
     engine.add_venue(
         venue=venue,
         oms_type=OmsType.NETTING,
         account_type=AccountType.MARGIN,
-        base_currency=USDT,
-        starting_balances=[Money(10_000, USDT)],  # 1万USDT初始资金
+        base_currency=currency,
+        starting_balances=[Money(10_000, currency)],  # 1万报价货币初始资金
     )
     
     # 6. 添加交易工具
     engine.add_instrument(instrument)
     
     # 7. 转换数据为QuoteTick
+    # 未指定时间窗口时限制数据量以加快回测速度（可以调整）
+    if start is None and end is None:
+        df = df.iloc[:10000]  # 最多使用10000个数据点
+    
     print("\n转换数据格式...")
     ticks = create_quote_ticks(df, instrument)
     
-    # 限制数据量以加快回测速度（可以调整）
-    max_ticks = min(len(ticks), 10000)  # 最多使用10000个数据点
-    ticks = ticks[:max_ticks]
-    
     engine.add_data(ticks)
     print(f"使用 {len(ticks)} 个数据点进行回测")
     
@@ -155,7 +217,7 @@ def run_backtest_with_real_data(data_file="nautilus_data/historical/BTCUSDT_quot
     )
     
     print(f"\n网格策略配置:")
-    print(f"投资金额: {strategy_config.total_amount} USDT")
+    print(f"投资金额: {strategy_config.total_amount} {currency}")
     print(f"网格数量: {strategy_config.grid_levels}")
     print(f"价格范围: ${strategy_config.lower_price:.2f} - ${strategy_config.upper_price:.2f}")
     
@@ -164,7 +226,7 @@ def run_backtest_with_real_data(data_file="nautilus_data/historical/BTCUSDT_quot
     
     # 9. 运行回测
     start_time = df.index[0]
-    end_time = df.index[min(len(df)-1, max_ticks-1)]
+    end_time = df.index[-1]
     
     print(f"\n运行回测: {start_time} 到 {end_time}")
     engine.run(start=start_time, end=end_time)
@@ -175,11 +237,11 @@ def run_backtest_with_real_data(data_file="nautilus_data/historical/BTCUSDT_quot
     # 账户信息
     account = engine.portfolio.account(venue)
     starting_balance = 10_000
-    ending_balance = float(account.balance_total(USDT).as_decimal())
+    ending_balance = float(account.balance_total(currency).as_decimal())
     
-    print(f"初始资金: {starting_balance:,.2f} USDT")
-    print(f"最终资金: {ending_balance:,.2f} USDT")
-    print(f"总收益: {ending_balance - starting_balance:,.2f} USDT")
+    print(f"初始资金: {starting_balance:,.2f} {currency}")
+    print(f"最终资金: {ending_balance:,.2f} {currency}")
+    print(f"总收益: {ending_balance - starting_balance:,.2f} {currency}")
     print(f"收益率: {((ending_balance / starting_balance) - 1) * 100:.2f}%")
     
     # 交易统计
@@ -216,9 +278,32 @@ def run_backtest_with_real_data(data_file="nautilus_data/historical/BTCUSDT_quot
         hourly_return = ((ending_balance / starting_balance) ** (1 / duration) - 1) * 100
         print(f"小时收益率: {hourly_return:.4f}%")
     
+    metrics = {
+        "pnl": ending_balance - starting_balance,
+        "return": ending_balance / starting_balance - 1,
+        "orders": len(orders),
+        "fills": len(filled_orders),
+        "positions": len(positions),
+        "duration_hours": duration,
+    }
+    if save_results:
+        run_id = ResultsStore().append_run(
+            "backtest",
+            strategy_config.dict(),
+            metrics,
+            strategy=type(strategy).__name__,
+            instrument=str(instrument.id),
+            data_file=data_file,
+            start=start,
+            end=end,
+            fills=fills_from_report(engine.trader.generate_fills_report()),
+        )
+        print(f"结果已保存: {run_id}")
+    
     # 清理
     engine.dispose()
     print("\n✅ 回测完成!")
+    return metrics
 
 
 def main():
@@ -232,11 +317,21 @@ def main():
         default="nautilus_data/historical/BTCUSDT_quotes.csv",
         help="历史数据文件路径"
     )
+    parser.add_argument("--start", type=str, help="回测开始时间，如 2024-01-01T00:00")
+    parser.add_argument("--end", type=str, help="回测结束时间")
+    parser.add_argument(
+        "--instrument",
+        type=str.upper,
+        default=None,
+        choices=list(INSTRUMENT_FACTORIES),
+        help="交易品种代码（需与数据文件一致，默认从数据文件名推断）",
+    )
+    parser.add_argument("--save-results", action="store_true", help="把结果写入结果存储（data/results）")
     
     args = parser.parse_args()
     
     # 运行回测
-    run_backtest_with_real_data(args.data)
+    run_backtest_with_real_data(args.data, args.start, args.end, args.instrument, save_results=args.save_results)
 
 
 if __name__ == "__main__":
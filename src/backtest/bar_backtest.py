@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+基于K线的回测
+Bar-driven backtest directly on OHLC data
+
+用 BarDataWrangler 批量把OHLC数据转换为 Nautilus Bar，
+交易场所开启K线撮合（bar_execution），限价单按K线最高/最低价成交。
+数据量约为逐笔报价的1/10，适合长周期筛选。
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from nautilus_trader.backtest.engine import BacktestEngine, BacktestEngineConfig
+from nautilus_trader.config import LoggingConfig
+from nautilus_trader.model.currencies import USDT
+from nautilus_trader.model.data import BarType
+from nautilus_trader.model.enums import AccountType, OmsType
+from nautilus_trader.model.objects import Money
+from nautilus_trader.persistence.wranglers import BarDataWrangler
+from nautilus_trader.test_kit.stubs.data import TestInstrumentProvider
+
+from src.backtest.backtest_with_real_data import analyze_price_range
+from src.strategies.grid import GridStrategy, GridStrategyConfig
+from src.strategies.simple_grid import SimpleGridStrategy, SimpleGridStrategyConfig
+
+
+DEFAULT_OHLC_FILE = "nautilus_data/historical/BTCUSDT_ohlc.csv"
+
+
+def load_ohlc(file_path: str) -> pd.DataFrame:
+    """加载OHLC数据，并修正最高/最低价与开收盘价不一致的行"""
+    if file_path.endswith(".parquet"):
+        df = pd.read_parquet(file_path)
+        if "timestamp" in df.columns:
+            df = df.set_index("timestamp")
+    else:
+        df = pd.read_csv(file_path, index_col="timestamp", parse_dates=True)
+
+    prices = df[["open", "high", "low", "close"]]
+    high = prices.max(axis=1)
+    low = prices.min(axis=1)
+    fixed = int(((high != df["high"]) | (low != df["low"])).sum())
+    if fixed:
+        print(f"修正了 {fixed} 条最高/最低价异常的K线")
+    df["high"] = high
+    df["low"] = low
+
+    return df
+
+
+def infer_interval(df: pd.DataFrame) -> pd.Timedelta:
+    """由相邻时间戳间隔的中位数推断数据的K线周期"""
+    if len(df) < 2:
+        raise ValueError("K线数量不足，无法推断周期")
+    return pd.Timedelta(pd.Series(df.index).diff().median())
+
+
+def bar_spec_from_interval(interval: pd.Timedelta) -> str:
+    """K线周期 -> Nautilus K线规格，如 1小时 -> 1-HOUR"""
+    seconds = int(interval.total_seconds())
+    for unit, size in (("DAY", 86400), ("HOUR", 3600), ("MINUTE", 60), ("SECOND", 1)):
+        if seconds >= size and seconds % size == 0:
+            return f"{seconds // size}-{unit}"
+    raise ValueError(f"不支持的K线周期: {interval}")
+
+
+def resample_ohlc(df: pd.DataFrame, interval: pd.Timedelta) -> pd.DataFrame:
+    """
+    把OHLC数据聚合到更长的周期（开盘取首个、最高取最大、最低取最小、收盘取最后一个，成交量求和）
+
+    目标周期必须是数据周期的整数倍；没有数据的周期不生成K线。
+    """
+    source = infer_interval(df)
+    if interval == source:
+        return df
+    if interval < source or interval % source != pd.Timedelta(0):
+        raise ValueError(f"K线周期 {interval} 不是数据周期 {source} 的整数倍，无法聚合")
+
+    agg = {"open": "first", "high": "max", "low": "min", "close": "last"}
+    if "volume" in df.columns:
+        agg["volume"] = "sum"
+    resampled = df.resample(interval, label="left", closed="left").agg(agg)
+    return resampled.dropna(subset=["open"])
+
+
+def create_bars(df: pd.DataFrame, instrument, bar_spec: Optional[str] = None):
+    """
+    批量将OHLC DataFrame转换为Bar对象
+
+    bar_spec 未指定时按数据的时间间隔确定；指定了更长的周期时先聚合K线，
+    保证K线规格与数据内容一致。
+
+    数据源的时间戳是K线开盘时间，而 Nautilus 要求 ts_event 为收盘时间，
+    因此先把索引后移一个周期，避免回测中提前看到整根K线。
+    """
+    if bar_spec is None:
+        bar_spec = bar_spec_from_interval(infer_interval(df))
+    bar_type = BarType.from_str(f"{instrument.id}-{bar_spec}-LAST-EXTERNAL")
+    interval = pd.Timedelta(bar_type.spec.timedelta)
+
+    df = resample_ohlc(df, interval)
+    shifted = df.copy()
+    shifted.index = df.index + interval
+
+    wrangler = BarDataWrangler(bar_type=bar_type, instrument=instrument)
+    return bar_type, wrangler.process(shifted)
+
+
+def run_bar_backtest(
+    data_file: str = DEFAULT_OHLC_FILE,
+    strategy_type: str = "grid",
+    bar_spec: Optional[str] = None,
+    grid_levels: int = 10,
+    total_amount: float = 2000.0,
+):
+    """使用OHLC K线数据运行回测"""
+    print("=== K线回测 ===\n")
+
+    # 1. 加载数据
+    df = load_ohlc(data_file)
+    print(f"加载了 {len(df)} 根K线: {df.index[0]} 到 {df.index[-1]}")
+
+    # 2. 分析价格范围（以收盘价代替中间价）
+    stats, suggested_lower, suggested_upper = analyze_price_range(
+        pd.DataFrame({"bid_price": df["close"], "ask_price": df["close"]})
+    )
+
+    # 3. 创建回测引擎
+    engine = BacktestEngine(
+        config=BacktestEngineConfig(logging=LoggingConfig(log_level="WARNING")),
+    )
+
+    instrument = TestInstrumentProvider.btcusdt_binance()
+    venue = instrument.id.venue
+
+    engine.add_venue(
+        venue=venue,
+        oms_type=OmsType.NETTING,
+        account_type=AccountType.MARGIN,
+        base_currency=USDT,
+        starting_balances=[Money(10_000, USDT)],
+        bar_execution=True,  # 按K线的开高低收撮合
+    )
+    engine.add_instrument(instrument)
+
+    # 4. 批量转换K线
+    start = time.perf_counter()
+    try:
+        bar_type, bars = create_bars(df, instrument, bar_spec)
+    except ValueError as e:
+        print(f"\n错误: {e}")
+        engine.dispose()
+        return
+    print(f"\n转换 {len(bars)} 根 {bar_type.spec} K线用时 {time.perf_counter() - start:.3f} 秒")
+    engine.add_data(bars)
+
+    # 5. 创建策略（以K线为价格来源）
+    upper_price = float(min(suggested_upper, stats["mean"] + 500))
+    lower_price = float(max(suggested_lower, stats["mean"] - 500))
+
+    if strategy_type == "simple":
+        strategy = SimpleGridStrategy(
+            config=SimpleGridStrategyConfig(
+                instrument_id=str(instrument.id),
+                bar_type=str(bar_type),
+                total_amount=total_amount,
+                grid_levels=grid_levels,
+                upper_price=upper_price,
+                lower_price=lower_price,
+            )
+        )
+    else:
+        strategy = GridStrategy(
+            config=GridStrategyConfig(
+                instrument_id=str(instrument.id),
+                bar_type=str(bar_type),
+                total_amount=total_amount,
+                grid_levels=grid_levels,
+                upper_price=upper_price,
+                lower_price=lower_price,
+            )
+        )
+    engine.add_strategy(strategy=strategy)
+
+    print(f"\n策略: {type(strategy).__name__}, {grid_levels} 格, {lower_price:.2f} - {upper_price:.2f}")
+
+    # 6. 运行回测
+    start = time.perf_counter()
+    engine.run()
+    elapsed = time.perf_counter() - start
+
+    # 7. 分析结果
+    print("\n=== 回测结果 ===")
+    print(f"引擎耗时: {elapsed:.2f} 秒 ({len(bars) / elapsed:,.0f} bars/s)")
+
+    account = engine.portfolio.account(venue)
+    starting_balance = 10_000
+    ending_balance = float(account.balance_total(USDT).as_decimal())
+
+    print(f"初始资金: {starting_balance:,.2f} USDT")
+    print(f"最终资金: {ending_balance:,.2f} USDT")
+    print(f"总收益: {ending_balance - starting_balance:,.2f} USDT")
+    print(f"收益率: {((ending_balance / starting_balance) - 1) * 100:.2f}%")
+
+    orders = engine.cache.orders()
+    filled_orders = [o for o in orders if o.status.name == "FILLED"]
+    print(f"\n交易统计:")
+    print(f"总订单数: {len(orders)}")
+    print(f"成交订单数: {len(filled_orders)}")
+    print(f"总持仓数: {len(engine.cache.positions())}")
+
+    engine.dispose()
+    print("\n✅ 回测完成!")
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="使用OHLC K线数据进行回测")
+    parser.add_argument("--data", type=str, default=DEFAULT_OHLC_FILE, help="OHLC数据文件路径")
+    parser.add_argument("--strategy", choices=["grid", "simple"], default="grid", help="策略类型")
+    parser.add_argument("--bar-spec", type=str, help="K线规格，如 1-MINUTE、1-HOUR（默认按数据间隔确定，更长周期会聚合K线）")
+    parser.add_argument("--levels", type=int, default=10, help="网格数量")
+
+    args = parser.parse_args()
+
+    run_bar_backtest(args.data, args.strategy, args.bar_spec, args.levels)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+回测性能基准测试
+Backtest throughput benchmarks
+
+覆盖的热点路径:
+1. create_quote_ticks 数据转换速度
+2. create_quote_data_from_ohlc 报价合成速度
+3. GridStrategy.on_quote_tick / on_order_filled 单事件耗时
+4. 端到端回测吞吐量 (ticks/s)
+
+每项指标重复多次测量，记录中位数和运行间波动（变异系数），
+结果保存为JSON基线，对比模式下指标退化超过阈值时返回非零退出码。
+"""
+
+import sys
+import json
+import time
+import platform
+import statistics
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from nautilus_trader.backtest.engine import BacktestEngine, BacktestEngineConfig
+from nautilus_trader.config import LoggingConfig
+from nautilus_trader.model.currencies import USDT
+from nautilus_trader.model.enums import AccountType, OmsType
+from nautilus_trader.model.identifiers import ClientOrderId
+from nautilus_trader.model.objects import Money
+from nautilus_trader.test_kit.stubs.data import TestInstrumentProvider
+from nautilus_trader.test_kit.stubs.events import TestEventStubs
+
+from src.backtest.backtest_with_real_data import create_quote_ticks
+from src.data.download_multi_source_data import create_quote_data_from_ohlc
+from src.strategies.grid import GridStrategy, GridStrategyConfig
+
+
+DEFAULT_QUOTES_FILE = "nautilus_data/historical/BTCUSDT_quotes.csv"
+DEFAULT_OHLC_FILE = "nautilus_data/historical/BTCUSDT_ohlc.csv"
+DEFAULT_BASELINE_FILE = "data/results/benchmark_baseline.json"
+
+# 默认退化阈值（中位数吞吐量下降超过15%视为退化）
+DEFAULT_THRESHOLD = 0.15
+
+# 按运行间噪声放宽后的容忍度上限（噪声再大也不能掩盖超过30%的退化）
+DEFAULT_MAX_TOLERANCE = 0.30
+
+# 单次测量的最短时长，过短的基准在一次测量内重复运行以降低计时噪声
+MIN_SAMPLE_SECONDS = 0.2
+
+
+def tile_frame(df: pd.DataFrame, times: int) -> pd.DataFrame:
+    """将数据重复拼接多次，时间戳顺延，用于放大基准测试的数据量"""
+    if times <= 1:
+        return df
+
+    step = df.index[1] - df.index[0] if len(df) > 1 else pd.Timedelta(minutes=1)
+    span = df.index[-1] - df.index[0] + step
+
+    frames = []
+    for i in range(times):
+        chunk = df.copy()
+        chunk.index = df.index + span * i
+        frames.append(chunk)
+
+    return pd.concat(frames)
+
+
+def measure(run_once: Callable[[], Tuple[int, float]], repeats: int = 5, warmup: int = 1) -> dict:
+    """
+    重复测量一个基准
+
+    参数:
+    - run_once: 执行一次测量，返回 (处理的事件数, 耗时秒数)，不含准备时间
+    - repeats: 正式测量次数
+    - warmup: 预热次数（不计入结果）
+    """
+    for _ in range(warmup):
+        run_once()
+
+    rates = []
+    count = 0
+    for _ in range(repeats):
+        count, elapsed = run_once()
+        rates.append(count / elapsed if elapsed > 0 else float("inf"))
+
+    median = statistics.median(rates)
+    stdev = statistics.stdev(rates) if len(rates) > 1 else 0.0
+
+    return {
+        "count": count,
+        "median": median,
+        "mean": statistics.fmean(rates),
+        "stdev": stdev,
+        "cv": stdev / median if median else 0.0,
+        "min": min(rates),
+        "max": max(rates),
+        "us_per_event": 1e6 / median if median else 0.0,
+        "samples": rates,
+    }
+
+
+def _create_engine(instrument) -> BacktestEngine:
+    """创建带单一交易场所的回测引擎"""
+    engine = BacktestEngine(
+        config=BacktestEngineConfig(logging=LoggingConfig(log_level="ERROR")),
+    )
+    engine.add_venue(
+        venue=instrument.id.venue,
+        oms_type=OmsType.NETTING,
+        account_type=AccountType.MARGIN,
+        base_currency=USDT,
+        starting_balances=[Money(10_000, USDT)],
+    )
+    engine.add_instrument(instrument)
+    return engine
+
+
+def _grid_config(instrument, quotes: pd.DataFrame, grid_levels: int) -> GridStrategyConfig:
+    """根据数据价格范围创建覆盖全部行情的网格配置"""
+    mid = (quotes["bid_price"] + quotes["ask_price"]) / 2
+    return GridStrategyConfig(
+        instrument_id=str(instrument.id),
+        total_amount=2000.0,
+        grid_levels=grid_levels,
+        upper_price=float(mid.max()),
+        lower_price=float(mid.min()),
+    )
+
+
+def _started_grid(instrument, quotes: pd.DataFrame, grid_levels: int):
+    """
+    启动一个已完成网格初始化的策略
+
+    以流式模式运行前几分钟数据，使初始化定时器触发后策略保持运行状态
+    """
+    engine = _create_engine(instrument)
+    warmup_ticks = create_quote_ticks(quotes.iloc[:10], instrument)
+    engine.add_data(warmup_ticks)
+
+    strategy = GridStrategy(config=_grid_config(instrument, quotes, grid_levels))
+    engine.add_strategy(strategy=strategy)
+    engine.run(streaming=True)
+
+    return engine, strategy
+
+
+def bench_create_quote_ticks(quotes: pd.DataFrame, instrument) -> Tuple[int, float]:
+    """DataFrame -> QuoteTick 转换速度"""
+    start = time.perf_counter()
+    ticks = create_quote_ticks(quotes, instrument)
+    elapsed = time.perf_counter() - start
+    return len(ticks), elapsed
+
+
+def bench_create_quote_data_from_ohlc(ohlc: pd.DataFrame) -> Tuple[int, float]:
+    """OHLC -> 报价数据合成速度（单次耗时很短，重复运行至少 MIN_SAMPLE_SECONDS）"""
+    rows = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < MIN_SAMPLE_SECONDS:
+        quote_df = create_quote_data_from_ohlc(ohlc)
+        rows += len(quote_df)
+        elapsed = time.perf_counter() - start
+    return rows, elapsed
+
+
+def bench_on_quote_tick(quotes: pd.DataFrame, instrument) -> Tuple[int, float]:
+    """GridStrategy.on_quote_tick 单事件耗时"""
+    engine, strategy = _started_grid(instrument, quotes, grid_levels=20)
+    ticks = create_quote_ticks(quotes, instrument)
+
+    handler = strategy.on_quote_tick
+    start = time.perf_counter()
+    for tick in ticks:
+        handler(tick)
+    elapsed = time.perf_counter() - start
+
+    engine.end()
+    engine.dispose()
+    return len(ticks), elapsed
+
+
+def bench_on_order_filled(quotes: pd.DataFrame, instrument) -> Tuple[int, float]:
+    """GridStrategy.on_order_filled 单事件耗时（含反向订单提交）"""
+    engine, strategy = _started_grid(instrument, quotes, grid_levels=200)
+
+    count = 0
+    elapsed = 0.0
+    while strategy.active_orders:
+        client_order_id = next(iter(strategy.active_orders))
+        order = engine.cache.order(ClientOrderId(client_order_id))
+        event = TestEventStubs.order_filled(order, instrument)
+
+        start = time.perf_counter()
+        strategy.on_order_filled(event)
+        elapsed += time.perf_counter() - start
+        count += 1
+
+        # 防御：处理函数未移除订单时避免死循环
+        strategy.active_orders.pop(client_order_id, None)
+
+    engine.end()
+    engine.dispose()
+    return count, elapsed
+
+
+def bench_end_to_end(quotes: pd.DataFrame, instrument) -> Tuple[int, float]:
+    """端到端回测吞吐量（网格策略，ticks/s）"""
+    engine = _create_engine(instrument)
+    ticks = create_quote_ticks(quotes, instrument)
+    engine.add_data(ticks)
+    engine.add_strategy(strategy=GridStrategy(config=_grid_config(instrument, quotes, 20)))
+
+    start = time.perf_counter()
+    engine.run()
+    elapsed = time.perf_counter() - start
+
+    engine.dispose()
+    return len(ticks), elapsed
+
+
+def run_benchmarks(
+    quotes_file: str = DEFAULT_QUOTES_FILE,
+    ohlc_file: str = DEFAULT_OHLC_FILE,
+    repeats: int = 5,
+    warmup: int = 1,
+    scale: int = 10,
+    only: Optional[List[str]] = None,
+) -> dict:
+    """
+    运行全部基准测试
+
+    参数:
+    - scale: 数据重复倍数（扩大样本以降低计时噪声）
+    - only: 只运行指定名称的基准
+    """
+    quotes = pd.read_csv(quotes_file, index_col="timestamp", parse_dates=True)
+    ohlc = pd.read_csv(ohlc_file, index_col="timestamp", parse_dates=True)
+    big_quotes = tile_frame(quotes, scale)
+    big_ohlc = tile_frame(ohlc, scale * 10)
+    instrument = TestInstrumentProvider.btcusdt_binance()
+
+    benchmarks: Dict[str, Tuple[str, Callable[[], Tuple[int, float]]]] = {
+        "create_quote_ticks": ("ticks/s", lambda: bench_create_quote_ticks(big_quotes, instrument)),
+        "create_quote_data_from_ohlc": ("rows/s", lambda: bench_create_quote_data_from_ohlc(big_ohlc)),
+        "grid_on_quote_tick": ("events/s", lambda: bench_on_quote_tick(big_quotes, instrument)),
+        "grid_on_order_filled": ("events/s", lambda: bench_on_order_filled(quotes, instrument)),
+        "backtest_end_to_end": ("ticks/s", lambda: bench_end_to_end(big_quotes, instrument)),
+    }
+
+    metrics = {}
+    for name, (unit, run_once) in benchmarks.items():
+        if only and name not in only:
+            continue
+        print(f"运行基准: {name} ...")
+        result = measure(run_once, repeats=repeats, warmup=warmup)
+        result["unit"] = unit
+        metrics[name] = result
+        print(
+            f"  {result['median']:,.0f} {unit} "
+            f"(±{result['cv'] * 100:.1f}%, {result['us_per_event']:.2f} us/事件)"
+        )
+
+    import nautilus_trader
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "nautilus_trader": nautilus_trader.__version__,
+            "repeats": repeats,
+            "scale": scale,
+        },
+        "metrics": metrics,
+    }
+
+
+def save_results(results: dict, path: str):
+    """保存基准结果为JSON"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"基准结果已保存到: {path}")
+
+
+def load_results(path: str) -> dict:
+    """加载JSON基准结果"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(
+    current: dict,
+    baseline: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    max_tolerance: float = DEFAULT_MAX_TOLERANCE,
+) -> List[str]:
+    """
+    对比当前结果与基线，返回退化的指标列表
+
+    所有指标都是吞吐量（越高越好）。容忍度取 threshold 与两次测量
+    变异系数之和的较大者，避免把运行间噪声误判为退化；
+    但不超过 max(max_tolerance, threshold)，噪声很大的测量不能掩盖明显的退化。
+    """
+    regressions = []
+
+    print(f"\n{'指标':<30}{'基线':>16}{'当前':>16}{'变化':>10}")
+    for name, base in baseline["metrics"].items():
+        cur = current["metrics"].get(name)
+        if cur is None:
+            continue
+
+        change = cur["median"] / base["median"] - 1 if base["median"] else 0.0
+        noise = base.get("cv", 0.0) + cur.get("cv", 0.0)
+        tolerance = min(max(threshold, noise), max(max_tolerance, threshold))
+        regressed = change < -tolerance
+
+        flag = "  ❌" if regressed else ""
+        print(f"{name:<30}{base['median']:>16,.0f}{cur['median']:>16,.0f}{change * 100:>9.1f}%{flag}")
+        if noise > tolerance:
+            print(f"  ⚠️  {name} 测量波动 {noise * 100:.0f}% 超过容忍度上限，建议增加 --repeats 或 --scale")
+
+        if regressed:
+            regressions.append(name)
+
+    return regressions
+
+
+def main() -> int:
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="运行回测性能基准测试")
+    parser.add_argument("--quotes", type=str, default=DEFAULT_QUOTES_FILE, help="报价数据文件")
+    parser.add_argument("--ohlc", type=str, default=DEFAULT_OHLC_FILE, help="OHLC数据文件")
+    parser.add_argument("--repeats", type=int, default=5, help="每项基准的重复次数")
+    parser.add_argument("--warmup", type=int, default=1, help="预热次数")
+    parser.add_argument("--scale", type=int, default=10, help="数据重复倍数")
+    parser.add_argument("--only", nargs="+", help="只运行指定的基准")
+    parser.add_argument("--save", type=str, nargs="?", const=DEFAULT_BASELINE_FILE, help="保存结果为基线")
+    parser.add_argument("--compare", type=str, nargs="?", const=DEFAULT_BASELINE_FILE, help="与基线对比")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="退化阈值（比例）")
+    parser.add_argument("--max-tolerance", type=float, default=DEFAULT_MAX_TOLERANCE, help="按噪声放宽后的容忍度上限")
+
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        quotes_file=args.quotes,
+        ohlc_file=args.ohlc,
+        repeats=args.repeats,
+        warmup=args.warmup,
+        scale=args.scale,
+        only=args.only,
+    )
+
+    if args.save:
+        save_results(results, args.save)
+
+    if args.compare:
+        regressions = compare_results(results, load_results(args.compare), args.threshold, args.max_tolerance)
+        if regressions:
+            print(f"\n❌ 性能退化: {', '.join(regressions)}")
+            return 1
+        print("\n✅ 未发现性能退化")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
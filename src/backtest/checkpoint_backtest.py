@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+可断点续跑的长时间回测
+Checkpointed, resumable long-running backtest
+
+数据按块流式送入引擎（BacktestEngine 的 streaming 模式），
+每处理若干块就写一次检查点：
+- 数据流位置（下一条要处理的行号与时间戳）
+- 策略状态（GridStrategy.on_save: 网格、挂单、净持仓、统计）
+- 账户状态（各币种余额）
+
+同时把每块的阶段性结果追加到 partial_results.jsonl，运行中即可查看。
+中断后使用 --resume 从最后一个检查点继续：以检查点余额作为初始资金，
+策略按保存的状态重建挂单，净持仓以市价重建（成交价与原持仓均价会有细微差异）。
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+from datetime import datetime
+from typing import Optional
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from nautilus_trader.backtest.engine import BacktestEngine, BacktestEngineConfig
+from nautilus_trader.config import LoggingConfig
+from nautilus_trader.model.currencies import USDT
+from nautilus_trader.model.enums import AccountType, OmsType
+from nautilus_trader.model.objects import Money
+from nautilus_trader.test_kit.stubs.data import TestInstrumentProvider
+
+from src.backtest.backtest_with_real_data import (
+    load_historical_quotes,
+    create_quote_ticks,
+    analyze_price_range,
+)
+from src.data.bar_pyramid import load_pyramid
+from src.strategies.grid import GridStrategy, GridStrategyConfig
+
+
+DEFAULT_RUN_DIR = "data/results/checkpoints/grid_btcusdt"
+CHECKPOINT_FILE = "checkpoint.json"
+PARTIAL_RESULTS_FILE = "partial_results.jsonl"
+
+STARTING_BALANCE = 10_000
+
+
+def save_checkpoint(run_dir: str, checkpoint: dict):
+    """原子写入检查点（先写临时文件再替换，避免中断时留下损坏的文件）"""
+    path = Path(run_dir) / CHECKPOINT_FILE
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(run_dir: str) -> Optional[dict]:
+    """加载检查点，不存在时返回None"""
+    path = Path(run_dir) / CHECKPOINT_FILE
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _append_partial_result(run_dir: str, result: dict):
+    """追加一条阶段性结果"""
+    with open(Path(run_dir) / PARTIAL_RESULTS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def _snapshot(engine: BacktestEngine, strategy: GridStrategy, venue, base: Optional[dict] = None) -> dict:
+    """
+    当前账户与策略的状态快照
+
+    续跑时引擎是新建的，订单数和成交数在检查点的累计值（base）上累加；
+    为恢复挂单而重新提交的订单不算新订单，恢复持仓的市价单不计入订单和成交。
+    """
+    account = engine.portfolio.account(venue)
+    orders = [
+        o for o in engine.cache.orders(instrument_id=strategy.instrument_id)
+        if o.client_order_id.value != strategy.position_restore_order_id
+    ]
+    new_orders = sum(1 for o in orders if o.client_order_id.value not in strategy.restored_order_ids)
+    filled = sum(1 for o in orders if o.status.name == "FILLED")
+    base = base or {}
+    return {
+        "balance": float(account.balance_total(USDT).as_decimal()),
+        "net_position": float(engine.portfolio.net_position(strategy.instrument_id)),
+        "unrealized_pnl": float(
+            (engine.portfolio.unrealized_pnl(strategy.instrument_id) or Money(0, USDT)).as_decimal()
+        ),
+        "orders": base.get("orders", 0) + new_orders,
+        "filled": base.get("filled", 0) + filled,
+        "grid_trades": strategy.total_trades,
+    }
+
+
+def run_checkpointed_backtest(
+    data_file: str = "nautilus_data/historical/BTCUSDT_quotes.csv",
+    run_dir: str = DEFAULT_RUN_DIR,
+    chunk_size: int = 5000,
+    checkpoint_every: int = 1,
+    resume: bool = False,
+    grid_levels: int = 10,
+    total_amount: float = 2000.0,
+):
+    """
+    运行可断点续跑的回测
+
+    参数:
+    - run_dir: 检查点与阶段性结果的目录
+    - chunk_size: 每块报价条数
+    - checkpoint_every: 每处理多少块写一次检查点
+    - resume: 是否从检查点继续
+    """
+    print("=== 可续跑回测 ===\n")
+    Path(run_dir).mkdir(parents=True, exist_ok=True)
+
+    checkpoint = load_checkpoint(run_dir) if resume else None
+    if resume and checkpoint is None:
+        print("未找到检查点，从头开始运行")
+    if checkpoint and checkpoint.get("completed"):
+        print(f"该回测已完成: {run_dir}")
+        return checkpoint
+    if checkpoint and checkpoint["data_file"] != data_file:
+        raise ValueError(f"检查点的数据文件不一致: {checkpoint['data_file']} != {data_file}")
+    if not resume:
+        # 全新运行时清空旧的阶段性结果
+        (Path(run_dir) / PARTIAL_RESULTS_FILE).unlink(missing_ok=True)
+
+    # 1. 加载数据
+    df = load_historical_quotes(data_file)
+    next_row = checkpoint["next_row"] if checkpoint else 0
+
+    # 2. 创建回测引擎（续跑时以检查点余额作为初始资金）
+    engine = BacktestEngine(
+        config=BacktestEngineConfig(logging=LoggingConfig(log_level="WARNING")),
+    )
+    instrument = TestInstrumentProvider.btcusdt_binance()
+    venue = instrument.id.venue
+
+    balance = checkpoint["account"]["balance"] if checkpoint else STARTING_BALANCE
+    engine.add_venue(
+        venue=venue,
+        oms_type=OmsType.NETTING,
+        account_type=AccountType.MARGIN,
+        base_currency=USDT,
+        starting_balances=[Money(balance, USDT)],
+    )
+    engine.add_instrument(instrument)
+
+    # 3. 创建策略（续跑时沿用检查点中的配置并加载状态）
+    if checkpoint:
+        strategy_config = GridStrategyConfig.parse(checkpoint["strategy_config"])
+    else:
+        pyramid = load_pyramid(data_file, price_precision=instrument.price_precision)  # 没有缓存时为 None
+        stats, suggested_lower, suggested_upper = analyze_price_range(df, instrument.price_precision, pyramid)
+        strategy_config = GridStrategyConfig(
+            instrument_id=str(instrument.id),
+            total_amount=total_amount,
+            grid_levels=grid_levels,
+            upper_price=float(min(suggested_upper, stats["mean"] + 500)),
+            lower_price=float(max(suggested_lower, stats["mean"] - 500)),
+        )
+
+    strategy = GridStrategy(config=strategy_config)
+    engine.add_strategy(strategy=strategy)
+
+    if checkpoint:
+        strategy.load({key: value.encode() for key, value in checkpoint["strategy_state"].items()})
+        print(f"从检查点继续: 第 {next_row} 行 ({checkpoint['last_timestamp']}), 余额 {balance:,.2f} USDT")
+
+    # 4. 分块流式回测（订单与成交数从检查点的累计值继续）
+    base = checkpoint["account"] if checkpoint else None
+    chunk_count = 0
+    start_time = time.perf_counter()
+
+    for start in range(next_row, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+
+        engine.clear_data()
+        engine.add_data(create_quote_ticks(chunk, instrument))
+        engine.run(streaming=True)
+
+        next_row = start + len(chunk)
+        chunk_count += 1
+
+        snapshot = _snapshot(engine, strategy, venue, base)
+        partial = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "rows": next_row,
+            "total_rows": len(df),
+            "last_timestamp": str(chunk.index[-1]),
+            **snapshot,
+        }
+        _append_partial_result(run_dir, partial)
+        print(
+            f"进度 {next_row}/{len(df)} ({next_row / len(df) * 100:.1f}%) "
+            f"余额 {snapshot['balance']:,.2f} 持仓 {snapshot['net_position']:.6f} "
+            f"未实现 {snapshot['unrealized_pnl']:+,.2f} 成交 {snapshot['filled']}"
+        )
+
+        if chunk_count % checkpoint_every == 0 or next_row >= len(df):
+            state = strategy.save()
+            save_checkpoint(run_dir, {
+                "data_file": data_file,
+                "next_row": next_row,
+                "last_timestamp": str(chunk.index[-1]),
+                "account": snapshot,
+                "strategy_config": strategy_config.json().decode(),
+                "strategy_state": {key: value.decode() for key, value in state.items()},
+                "completed": False,
+            })
+
+    elapsed = time.perf_counter() - start_time
+    engine.end()
+
+    # 5. 最终结果
+    final = _snapshot(engine, strategy, venue, base)
+    print("\n=== 回测结果 ===")
+    print(f"本次处理 {chunk_count} 块, 用时 {elapsed:.1f} 秒")
+    print(f"初始资金: {STARTING_BALANCE:,.2f} USDT")
+    print(f"最终资金: {final['balance']:,.2f} USDT")
+    print(f"总收益: {final['balance'] - STARTING_BALANCE:,.2f} USDT")
+    print(f"网格成交次数: {final['grid_trades']}")
+
+    checkpoint = load_checkpoint(run_dir) or {}
+    checkpoint.update({"completed": True, "final": final})
+    save_checkpoint(run_dir, checkpoint)
+
+    engine.dispose()
+    print("\n✅ 回测完成!")
+
+    return checkpoint
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="可断点续跑的长时间回测")
+    parser.add_argument(
+        "--data",
+        type=str,
+        default="nautilus_data/historical/BTCUSDT_quotes.csv",
+        help="历史数据文件路径",
+    )
+    parser.add_argument("--run-dir", type=str, default=DEFAULT_RUN_DIR, help="检查点目录")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="每块报价条数")
+    parser.add_argument("--checkpoint-every", type=int, default=1, help="每处理多少块写一次检查点")
+    parser.add_argument("--resume", action="store_true", help="从最后一个检查点继续")
+
+    args = parser.parse_args()
+
+    run_checkpointed_backtest(
+        data_file=args.data,
+        run_dir=args.run_dir,
+        chunk_size=args.chunk_size,
+        checkpoint_every=args.checkpoint_every,
+        resume=args.resume,
+    )
+
+
+if __name__ == "__main__":
+    main()
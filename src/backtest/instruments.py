@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+回测使用的交易工具
+Test instruments available to the backtests
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+if TYPE_CHECKING:
+    from nautilus_trader.model.instruments import CurrencyPair
+
+
+def _provider():
+    """按需导入 TestInstrumentProvider（命令行解析参数时不加载 Nautilus）"""
+    from nautilus_trader.test_kit.providers import TestInstrumentProvider
+    return TestInstrumentProvider
+
+
+# 支持的交易工具（品种代码 -> 测试工具构造函数）
+INSTRUMENT_FACTORIES = {
+    "BTCUSDT": lambda: _provider().btcusdt_binance(),
+    "ETHUSDT": lambda: _provider().ethusdt_binance(),
+    "ADAUSDT": lambda: _provider().adausdt_binance(),
+    "EURUSD": lambda: _provider().default_fx_ccy("EUR/USD"),
+    "AUDUSD": lambda: _provider().default_fx_ccy("AUD/USD"),
+}
+
+
+def get_test_instrument(symbol: str) -> "CurrencyPair":
+    """按品种代码创建测试交易工具"""
+    factory = INSTRUMENT_FACTORIES.get(symbol.upper())
+    if factory is None:
+        raise ValueError(f"不支持的品种: {symbol}，可选: {', '.join(INSTRUMENT_FACTORIES)}")
+    return factory()
+
+
+def symbol_from_filename(path: str) -> Optional[str]:
+    """从数据文件名推断品种代码（如 BTCUSDT_quotes.csv -> BTCUSDT），无法推断时返回None"""
+    name = re.sub(r"[^A-Z0-9]", "", Path(path).name.upper())
+    matches = [symbol for symbol in INSTRUMENT_FACTORIES if symbol in name]
+    return max(matches, key=len) if matches else None
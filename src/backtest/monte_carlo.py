@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+网格参数蒙特卡洛稳健性测试
+Parallel Monte Carlo robustness testing of grid configs
+
+从历史报价的对数收益重采样生成大量价格路径：
+- block: 分块自助法（保留短期自相关和波动聚集）
+- shuffle: 收益随机打乱（独立同分布假设）
+
+在进程池中用向量化网格模拟器逐条路径运行同一组网格参数，
+输出盈亏与回撤的分布及置信区间。
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.backtest.vectorized_grid import grid_levels, simulate_grid
+from src.data.results_store import ResultsStore
+
+
+METHODS = ("block", "shuffle")
+
+DEFAULT_DATA_FILE = "nautilus_data/historical/BTCUSDT_quotes.csv"
+
+# 权益曲线置信带的百分位
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def load_mid_prices(file_path: str) -> np.ndarray:
+    """加载报价文件并返回中间价序列"""
+    if file_path.endswith(".parquet"):
+        df = pd.read_parquet(file_path, columns=["bid_price", "ask_price"])
+    else:
+        df = pd.read_csv(file_path, usecols=["bid_price", "ask_price"])
+    return ((df["bid_price"] + df["ask_price"]) / 2).to_numpy()
+
+
+def resample_returns(
+    returns: np.ndarray,
+    rng: np.random.Generator,
+    method: str = "block",
+    block_size: int = 60,
+    length: Optional[int] = None,
+) -> np.ndarray:
+    """重采样对数收益序列"""
+    n = len(returns)
+    length = length or n
+
+    if method == "shuffle":
+        return returns[rng.integers(0, n, length)] if length != n else rng.permutation(returns)
+
+    # 移动分块自助法：随机选取起点，拼接固定长度的连续收益块
+    block_size = max(1, min(block_size, n))
+    n_blocks = -(-length // block_size)
+    starts = rng.integers(0, n - block_size + 1, n_blocks)
+    index = (starts[:, None] + np.arange(block_size)).ravel()[:length]
+    return returns[index]
+
+
+def _run_batch(
+    returns: np.ndarray,
+    start_price: float,
+    levels: np.ndarray,
+    total_amount: float,
+    fee_rate: float,
+    method: str,
+    block_size: int,
+    seeds: List[np.random.SeedSequence],
+    curve_points: int,
+) -> dict:
+    """在一个工作进程中模拟一批路径（每条路径使用自己的随机种子）"""
+    n_paths = len(seeds)
+    pnl = np.empty(n_paths)
+    drawdown = np.empty(n_paths)
+    trades = np.empty(n_paths, dtype=np.int64)
+    curves = np.empty((n_paths, curve_points))
+
+    for i, path_seed in enumerate(seeds):
+        rng = np.random.default_rng(path_seed)
+        path_returns = resample_returns(returns, rng, method, block_size)
+        prices = start_price * np.exp(np.concatenate(([0.0], np.cumsum(path_returns))))
+        result = simulate_grid(prices, levels, total_amount, fee_rate, curve_points)
+
+        pnl[i] = result["pnl"]
+        drawdown[i] = result["max_drawdown"]
+        trades[i] = result["trades"]
+        curves[i] = result["curve"]
+
+    return {"pnl": pnl, "max_drawdown": drawdown, "trades": trades, "curves": curves}
+
+
+def _distribution(values: np.ndarray) -> dict:
+    """分布统计（均值的95%置信区间采用正态近似）"""
+    mean = float(values.mean())
+    std = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+    half_width = 1.96 * std / np.sqrt(len(values))
+
+    stats = {
+        "mean": mean,
+        "std": std,
+        "mean_ci95": [mean - half_width, mean + half_width],
+    }
+    for q in BAND_PERCENTILES:
+        stats[f"p{q}"] = float(np.percentile(values, q))
+    return stats
+
+
+def run_monte_carlo(
+    data_file: str = DEFAULT_DATA_FILE,
+    n_paths: int = 2000,
+    method: str = "block",
+    block_size: int = 60,
+    grid_levels_count: int = 20,
+    spacing_type: str = "arithmetic",
+    lower_price: Optional[float] = None,
+    upper_price: Optional[float] = None,
+    price_range_ratio: float = 0.1,
+    total_amount: float = 10_000.0,
+    fee_rate: float = 0.001,
+    workers: Optional[int] = None,
+    seed: int = 42,
+    curve_points: int = 50,
+) -> dict:
+    """
+    运行蒙特卡洛稳健性测试
+
+    价格范围未指定时，与 GridStrategy 一样按起始价格 ± price_range_ratio/2 计算。
+    """
+    if method not in METHODS:
+        raise ValueError(f"未知的重采样方法: {method}，可选: {', '.join(METHODS)}")
+
+    print("=== 网格参数蒙特卡洛测试 ===\n")
+
+    mid = load_mid_prices(data_file)
+    returns = np.diff(np.log(mid))
+    start_price = float(mid[0])
+
+    if lower_price is None or upper_price is None:
+        price_range = start_price * price_range_ratio
+        lower_price = start_price - price_range / 2
+        upper_price = start_price + price_range / 2
+
+    levels = grid_levels(lower_price, upper_price, grid_levels_count, spacing_type)
+
+    print(f"数据: {data_file} ({len(mid)} 条报价)")
+    print(f"网格: {grid_levels_count} 格 {spacing_type}, {lower_price:.2f} - {upper_price:.2f}")
+    print(f"重采样: {method} (块大小 {block_size}), {n_paths} 条路径")
+
+    # 历史路径作为参照
+    historical = simulate_grid(mid, levels, total_amount, fee_rate)
+
+    # 每条路径派生独立的随机种子，再把路径平均分给各个工作进程；
+    # 第i条路径只由 (seed, i) 决定，结果与进程数和分批方式无关
+    workers = workers or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).spawn(n_paths)
+    batches = np.array_split(np.arange(n_paths), min(workers * 4, n_paths))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _run_batch, returns, start_price, levels, total_amount, fee_rate,
+                method, block_size, [seeds[i] for i in batch], curve_points,
+            )
+            for batch in batches
+        ]
+        parts = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+
+    pnl = np.concatenate([p["pnl"] for p in parts])
+    drawdown = np.concatenate([p["max_drawdown"] for p in parts])
+    trades = np.concatenate([p["trades"] for p in parts])
+    curves = np.vstack([p["curves"] for p in parts])
+
+    report = {
+        "config": {
+            "data_file": data_file,
+            "n_paths": n_paths,
+            "method": method,
+            "block_size": block_size,
+            "grid_levels": grid_levels_count,
+            "spacing_type": spacing_type,
+            "lower_price": lower_price,
+            "upper_price": upper_price,
+            "total_amount": total_amount,
+            "fee_rate": fee_rate,
+            "seed": seed,
+        },
+        "historical": historical,
+        "pnl": _distribution(pnl),
+        "max_drawdown": _distribution(drawdown),
+        "trades": _distribution(trades.astype(float)),
+        "loss_probability": float((pnl < 0).mean()),
+        "equity_bands": {
+            f"p{q}": np.percentile(curves, q, axis=0).tolist() for q in BAND_PERCENTILES
+        },
+        "elapsed": elapsed,
+    }
+
+    print(f"\n模拟完成: {n_paths} 条路径, 用时 {elapsed:.1f} 秒 ({n_paths / elapsed:,.0f} 条/秒, {workers} 进程)")
+    print_report(report)
+
+    return report
+
+
+def print_report(report: dict):
+    """打印分布摘要"""
+    historical = report["historical"]
+    pnl = report["pnl"]
+    drawdown = report["max_drawdown"]
+
+    print(f"\n历史路径: 盈亏 {historical['pnl']:+,.2f}, 最大回撤 {historical['max_drawdown'] * 100:.2f}%, 成交 {historical['trades']}")
+
+    print("\n盈亏分布 (USDT):")
+    print(f"  均值: {pnl['mean']:+,.2f} (95% CI {pnl['mean_ci95'][0]:+,.2f} ~ {pnl['mean_ci95'][1]:+,.2f})")
+    print("  " + "  ".join(f"P{q}: {pnl[f'p{q}']:+,.2f}" for q in BAND_PERCENTILES))
+    print(f"  亏损概率: {report['loss_probability'] * 100:.1f}%")
+
+    print("\n最大回撤分布:")
+    print(f"  均值: {drawdown['mean'] * 100:.2f}%")
+    print("  " + "  ".join(f"P{q}: {drawdown[f'p{q}'] * 100:.2f}%" for q in BAND_PERCENTILES))
+
+
+def store_report(report: dict, store: Optional[ResultsStore] = None) -> str:
+    """把报告的汇总指标写入结果存储，返回 run_id"""
+    config = report["config"]
+    metrics = {
+        "pnl": report["pnl"]["mean"],
+        "return": report["pnl"]["mean"] / config["total_amount"],
+        "max_drawdown": report["max_drawdown"]["mean"],
+        "trades": report["trades"]["mean"],
+        "elapsed_secs": report["elapsed"],
+        "loss_probability": report["loss_probability"],
+        "historical_pnl": report["historical"]["pnl"],
+        **{f"pnl_p{q}": report["pnl"][f"p{q}"] for q in BAND_PERCENTILES},
+        **{f"max_drawdown_p{q}": report["max_drawdown"][f"p{q}"] for q in BAND_PERCENTILES},
+    }
+    return (store or ResultsStore()).append_run(
+        "monte_carlo", config, metrics, strategy="vectorized_grid", data_file=config["data_file"]
+    )
+
+
+def save_report(report: dict, path: str):
+    """保存报告为JSON"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n报告已保存到: {path}")
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="网格参数蒙特卡洛稳健性测试")
+    parser.add_argument("--data", type=str, default=DEFAULT_DATA_FILE, help="历史报价文件")
+    parser.add_argument("--paths", type=int, default=2000, help="模拟路径数")
+    parser.add_argument("--method", choices=METHODS, default="block", help="重采样方法")
+    parser.add_argument("--block-size", type=int, default=60, help="分块自助法的块大小")
+    parser.add_argument("--levels", type=int, default=20, help="网格数量")
+    parser.add_argument("--spacing-type", choices=["arithmetic", "geometric"], default="arithmetic")
+    parser.add_argument("--lower", type=float, help="网格下限")
+    parser.add_argument("--upper", type=float, help="网格上限")
+    parser.add_argument("--range-ratio", type=float, default=0.1, help="自动计算价格范围的比例")
+    parser.add_argument("--amount", type=float, default=10_000.0, help="总投资额")
+    parser.add_argument("--fee", type=float, default=0.001, help="单边手续费率")
+    parser.add_argument("--workers", type=int, help="工作进程数（默认CPU核数）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--output", type=str, help="保存JSON报告的路径")
+    parser.add_argument("--save-results", action="store_true", help="把汇总指标写入结果存储（data/results）")
+
+    args = parser.parse_args(argv)
+
+    report = run_monte_carlo(
+        data_file=args.data,
+        n_paths=args.paths,
+        method=args.method,
+        block_size=args.block_size,
+        grid_levels_count=args.levels,
+        spacing_type=args.spacing_type,
+        lower_price=args.lower,
+        upper_price=args.upper,
+        price_range_ratio=args.range_ratio,
+        total_amount=args.amount,
+        fee_rate=args.fee,
+        workers=args.workers,
+        seed=args.seed,
+    )
+
+    if args.output:
+        save_report(report, args.output)
+    if args.save_results:
+        print(f"结果已保存: {store_report(report)}")
+
+
+if __name__ == "__main__":
+    main()
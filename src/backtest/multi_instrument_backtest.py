@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+多品种组合回测
+Multi-instrument backtest in a single engine run
+
+在同一个 BacktestEngine 中注册多个交易工具及其数据，
+每个品种运行一个网格策略实例，所有策略共用同一个交易账户，
+数据流按时间交错回放，可同时观察组合层面的表现和引擎吞吐量。
+
+数据文件可写为 synthetic，表示生成与其他品种时间范围对齐的合成报价
+（默认组合中的BTCUSDT即如此，因为仓库中的BTC数据与EURUSD数据没有时间重叠）。
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from nautilus_trader.backtest.engine import BacktestEngine, BacktestEngineConfig
+from nautilus_trader.config import LoggingConfig
+from nautilus_trader.model.enums import AccountType, OmsType
+from nautilus_trader.model.identifiers import Venue
+from nautilus_trader.model.instruments import CurrencyPair
+from nautilus_trader.model.objects import Money
+
+from src.backtest.backtest_with_real_data import (
+    load_historical_quotes,
+    create_quote_ticks,
+    analyze_price_range,
+)
+from src.backtest.instruments import get_test_instrument
+from src.data.results_store import ResultsStore
+from src.data.synthetic_data import generate_quotes
+from src.strategies.grid import GridStrategy, GridStrategyConfig
+
+
+# 数据文件写为 synthetic 时生成与其他品种时间对齐的合成报价
+SYNTHETIC = "synthetic"
+
+DEFAULT_PAIRS = [
+    ("BTCUSDT", SYNTHETIC),
+    ("EURUSD", "nautilus_data/EURUSD_quotes.parquet"),
+]
+
+# 合成报价的初始价格与年化波动率
+SYNTHETIC_PARAMS = {
+    "BTCUSDT": (42000.0, 0.6),
+    "ETHUSDT": (2300.0, 0.7),
+    "ADAUSDT": (0.6, 0.8),
+    "EURUSD": (1.09, 0.08),
+    "AUDUSD": (0.67, 0.1),
+}
+
+
+def create_instrument(symbol: str, venue: Venue) -> CurrencyPair:
+    """创建交易工具，并统一挂到同一个交易场所下（共用账户）"""
+    values = CurrencyPair.to_dict(get_test_instrument(symbol))
+    values["id"] = f"{values['raw_symbol']}.{venue}"
+    return CurrencyPair.from_dict(values)
+
+
+def synthetic_quotes(symbol: str, instrument: CurrencyPair, reference: List[pd.DataFrame], seed: int = 42) -> pd.DataFrame:
+    """生成覆盖参考数据时间范围、间隔与参考数据相同的合成报价"""
+    if reference:
+        start = min(df.index[0] for df in reference)
+        end = max(df.index[-1] for df in reference)
+        interval = min(pd.Series(df.index).diff().median() for df in reference if len(df) > 1)
+    else:
+        start, end, interval = pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-07"), pd.Timedelta(minutes=1)
+
+    start_price, annual_vol = SYNTHETIC_PARAMS.get(symbol, (100.0, 0.5))
+    n_quotes = int((end - start) / interval) + 1
+    return generate_quotes(
+        n_quotes,
+        start_price=start_price,
+        start=str(start),
+        interval_ms=int(interval.total_seconds() * 1000),
+        annual_vol=annual_vol,
+        price_precision=instrument.price_precision,
+        size_precision=instrument.size_precision,
+        seed=seed,
+    )
+
+
+def check_overlap(frames: Dict[str, pd.DataFrame]) -> bool:
+    """检查各品种数据的时间范围是否重叠，不重叠时打印警告"""
+    latest_start = max(df.index[0] for df in frames.values())
+    earliest_end = min(df.index[-1] for df in frames.values())
+    if latest_start <= earliest_end:
+        print(f"共同时间范围: {latest_start} 到 {earliest_end}")
+        return True
+
+    print("⚠️  警告: 各品种数据的时间范围没有重叠，数据将依次回放而不是交错:")
+    for symbol, df in frames.items():
+        print(f"  {symbol}: {df.index[0]} 到 {df.index[-1]}")
+    print(f"  可将数据文件写为 {SYNTHETIC} 生成时间对齐的合成数据")
+    return False
+
+
+def parse_pairs(specs: List[str]) -> List[Tuple[str, str]]:
+    """解析 SYMBOL=数据文件 形式的参数"""
+    pairs = []
+    for spec in specs:
+        if "=" not in spec:
+            raise ValueError(f"品种参数格式错误: {spec}（应为 SYMBOL=path）")
+        symbol, path = spec.split("=", 1)
+        pairs.append((symbol.strip().upper(), path.strip()))
+    return pairs
+
+
+def run_multi_instrument_backtest(
+    pairs: List[Tuple[str, str]] = DEFAULT_PAIRS,
+    venue_name: str = "SIM",
+    starting_balance: float = 100_000,
+    amount_per_instrument: float = 20_000.0,
+    grid_levels: int = 10,
+    max_ticks: int = 0,
+    save_results: bool = False,
+) -> Dict[str, dict]:
+    """
+    运行多品种组合回测
+
+    参数:
+    - pairs: (品种代码, 数据文件) 列表，数据文件为 synthetic 时生成对齐的合成报价
+    - venue_name: 共用交易场所名称
+    - starting_balance: 每种报价货币的初始资金
+    - amount_per_instrument: 每个网格实例的投资金额（报价货币）
+    - max_ticks: 每个品种最多使用的数据条数（0表示全部）
+    - save_results: 每个品种的配置和统计作为一条结果写入结果存储（data/results）
+    """
+    print("=== 多品种组合回测 ===\n")
+
+    venue = Venue(venue_name)
+    engine = BacktestEngine(
+        config=BacktestEngineConfig(logging=LoggingConfig(log_level="WARNING")),
+    )
+
+    # 1. 加载数据并创建交易工具（先加载文件数据，合成数据按其时间范围对齐）
+    frames: Dict[str, pd.DataFrame] = {}
+    for symbol, data_file in pairs:
+        if data_file != SYNTHETIC:
+            df = load_historical_quotes(data_file)
+            frames[symbol] = df.iloc[:max_ticks] if max_ticks else df
+
+    instruments = []
+    reference = list(frames.values())
+    for i, (symbol, data_file) in enumerate(pairs):
+        instrument = create_instrument(symbol, venue)
+        if data_file == SYNTHETIC:
+            frames[symbol] = synthetic_quotes(symbol, instrument, reference, seed=42 + i)
+            print(f"生成 {symbol} 合成报价: {len(frames[symbol])} 条")
+        instruments.append((instrument, frames[symbol]))
+
+    check_overlap(frames)
+
+    # 2. 添加共用交易场所（多币种保证金账户，每种报价货币一份初始资金）
+    quote_currencies = {inst.quote_currency.code: inst.quote_currency for inst, _ in instruments}
+    engine.add_venue(
+        venue=venue,
+        oms_type=OmsType.NETTING,
+        account_type=AccountType.MARGIN,
+        base_currency=None,
+        starting_balances=[Money(starting_balance, ccy) for ccy in quote_currencies.values()],
+    )
+
+    # 3. 注册工具、数据和每个品种的网格策略
+    total_ticks = 0
+    strategies = []
+    for i, (instrument, df) in enumerate(instruments):
+        engine.add_instrument(instrument)
+
+        ticks = create_quote_ticks(df, instrument)
+        engine.add_data(ticks)
+        total_ticks += len(ticks)
+
+        _, suggested_lower, suggested_upper = analyze_price_range(df, instrument.price_precision)
+        strategy_config = GridStrategyConfig(
+            instrument_id=str(instrument.id),
+            order_id_tag=f"{i + 1:03d}",
+            total_amount=amount_per_instrument,
+            grid_levels=grid_levels,
+            upper_price=float(suggested_upper),
+            lower_price=float(suggested_lower),
+        )
+        strategy = GridStrategy(config=strategy_config)
+        engine.add_strategy(strategy=strategy)
+        strategies.append(strategy)
+
+        print(f"{instrument.id}: {len(ticks)} 条报价, 网格 {suggested_lower:.5g} - {suggested_upper:.5g}")
+
+    # 4. 运行回测（所有数据流按时间交错回放）
+    print(f"\n运行回测: {len(instruments)} 个品种, 共 {total_ticks} 条报价")
+    start = time.perf_counter()
+    engine.run()
+    elapsed = time.perf_counter() - start
+
+    # 5. 分析结果
+    print("\n=== 回测结果 ===")
+    print(f"引擎耗时: {elapsed:.2f} 秒 ({total_ticks / elapsed:,.0f} ticks/s)")
+
+    account = engine.portfolio.account(venue)
+    print("\n账户余额:")
+    for code, ccy in quote_currencies.items():
+        ending_balance = float(account.balance_total(ccy).as_decimal())
+        print(f"  {code}: {starting_balance:,.2f} -> {ending_balance:,.2f} ({ending_balance - starting_balance:+,.2f})")
+
+    results = {}
+    runs = []
+    print("\n各品种统计:")
+    for strategy, (_, data_file) in zip(strategies, pairs):
+        instrument_id = strategy.instrument_id
+        orders = engine.cache.orders(instrument_id=instrument_id)
+        filled = [o for o in orders if o.status.name == "FILLED"]
+        positions = engine.cache.positions(instrument_id=instrument_id)
+        realized = sum(float(p.realized_pnl.as_decimal()) for p in positions if p.realized_pnl is not None)
+
+        results[str(instrument_id)] = {
+            "orders": len(orders),
+            "filled": len(filled),
+            "grid_trades": strategy.total_trades,
+            "realized_pnl": realized,
+        }
+        print(
+            f"  {instrument_id}: 订单 {len(orders)}, 成交 {len(filled)}, "
+            f"已实现盈亏 {realized:+,.4f} {strategy.instrument.quote_currency}"
+        )
+        runs.append({
+            "config": strategy.config.dict(),
+            "metrics": {
+                "pnl": realized,
+                "orders": len(orders),
+                "fills": len(filled),
+                "trades": strategy.total_trades,
+                "elapsed_secs": elapsed,
+            },
+            "strategy": type(strategy).__name__,
+            "instrument": str(instrument_id),
+            "data_file": None if data_file == SYNTHETIC else data_file,
+        })
+
+    if save_results:
+        run_ids = ResultsStore().append("multi_instrument", runs)
+        print(f"\n结果已保存: {', '.join(run_ids)}")
+
+    engine.dispose()
+    print("\n✅ 回测完成!")
+
+    return results
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="多品种组合回测")
+    parser.add_argument(
+        "--pair",
+        action="append",
+        help="品种与数据文件，如 BTCUSDT=nautilus_data/historical/BTCUSDT_quotes.csv（可重复，文件写为 synthetic 时生成对齐的合成数据）",
+    )
+    parser.add_argument("--levels", type=int, default=10, help="每个品种的网格数量")
+    parser.add_argument("--amount", type=float, default=20_000.0, help="每个品种的投资金额")
+    parser.add_argument("--max-ticks", type=int, default=0, help="每个品种最多使用的数据条数")
+    parser.add_argument("--save-results", action="store_true", help="把各品种结果写入结果存储（data/results）")
+
+    args = parser.parse_args()
+
+    pairs = parse_pairs(args.pair) if args.pair else DEFAULT_PAIRS
+    run_multi_instrument_backtest(
+        pairs,
+        amount_per_instrument=args.amount,
+        grid_levels=args.levels,
+        max_ticks=args.max_ticks,
+        save_results=args.save_results,
+    )
+
+
+if __name__ == "__main__":
+    main()
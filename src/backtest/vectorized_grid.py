@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+向量化网格模拟器
+Vectorized grid simulator
+
+不经过 Nautilus 引擎，直接在中间价序列上模拟网格交易，
+用于参数扫描和蒙特卡洛等需要成千上万次回测的场景。
+
+模型（现货网格）:
+- 相邻两个网格价格构成一个格子 (L[i], L[i+1])
+- 格子空仓时在 L[i] 挂买单，持仓时在 L[i+1] 挂卖单
+- 启动时当前价格上方的格子按当前价格买入底仓（对应上方的卖单）
+- 限价单按挂单价成交，双边收取手续费
+
+只在价格穿越网格时才有状态变化，因此按“穿越事件”处理，
+每个事件内对受影响的格子做切片运算；权益曲线则对全部报价向量化计算。
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from src.strategies.grid_geometry import bounded_ladder, make_ladder
+
+
+def grid_levels(
+    lower_price: float,
+    upper_price: float,
+    levels: int,
+    spacing_type: str = "arithmetic",
+    tick_size: Optional[float] = None,
+    price_precision: Optional[int] = None,
+    min_ratio: float = 0.0,
+) -> np.ndarray:
+    """
+    计算网格价格（与 GridStrategy._calculate_grid_prices 未设置 grid_spacing 时一致）
+
+    指定 tick_size / price_precision 时价位对齐到最小价格单位并去重，
+    min_ratio 为相邻价位的最小间距比例（见 grid_geometry.min_spacing_ratio）。
+    """
+    prices = bounded_ladder(lower_price, upper_price, levels, spacing_type)
+    if tick_size is None and min_ratio <= 0.0:
+        return prices
+    return make_ladder(
+        prices,
+        tick_size=tick_size,
+        price_precision=price_precision,
+        lower_price=lower_price,
+        upper_price=upper_price,
+        min_ratio=min_ratio,
+    ).prices
+
+
+def simulate_grid(
+    prices: np.ndarray,
+    levels: np.ndarray,
+    total_amount: float,
+    fee_rate: float = 0.001,
+    curve_points: int = 0,
+) -> dict:
+    """
+    在一条价格路径上模拟网格
+
+    参数:
+    - prices: 中间价序列
+    - levels: 升序网格价格
+    - total_amount: 总投资额，平均分配到每个格子
+    - fee_rate: 单边手续费率
+    - curve_points: 返回的权益曲线采样点数（0表示不返回）
+
+    返回 dict: pnl, return, max_drawdown, trades, round_trips, curve
+    """
+    prices = np.asarray(prices, dtype=float)
+    levels = np.asarray(levels, dtype=float)
+    n_cells = len(levels) - 1
+
+    buy_px = levels[:-1]
+    sell_px = levels[1:]
+    qty = (total_amount / n_cells) / buy_px
+
+    # 初始底仓：当前价格上方的格子
+    p0 = prices[0]
+    holding = buy_px > p0
+    cash = -float((qty[holding] * p0).sum()) * (1 + fee_rate)
+    inventory = float(qty[holding].sum())
+
+    # 价格所在区间（小于等于价格的网格数量），区间变化即发生穿越
+    buckets = np.searchsorted(levels, prices, side="right")
+    changes = np.flatnonzero(np.diff(buckets)) + 1
+
+    seg_cash = np.empty(len(changes) + 1)
+    seg_inventory = np.empty(len(changes) + 1)
+    seg_cash[0] = cash
+    seg_inventory[0] = inventory
+
+    trades = 0
+    round_trips = 0
+    prev = buckets[0]
+
+    for k, t in enumerate(changes, 1):
+        bucket = buckets[t]
+
+        if bucket < prev:
+            # 价格下穿网格 j (bucket <= j < prev)：空仓格子 j 在 L[j] 买入
+            cells = slice(bucket, min(prev, n_cells))
+            fill = ~holding[cells]
+            if fill.any():
+                q = qty[cells][fill]
+                cash -= float((q * buy_px[cells][fill]).sum()) * (1 + fee_rate)
+                inventory += float(q.sum())
+                holding[cells] |= fill
+                trades += int(fill.sum())
+        else:
+            # 价格上穿网格 j (prev <= j < bucket)：持仓格子 j-1 在 L[j] 卖出
+            cells = slice(max(prev - 1, 0), bucket - 1)
+            fill = holding[cells].copy()
+            if fill.any():
+                q = qty[cells][fill]
+                cash += float((q * sell_px[cells][fill]).sum()) * (1 - fee_rate)
+                inventory -= float(q.sum())
+                holding[cells] &= ~fill
+                count = int(fill.sum())
+                trades += count
+                round_trips += count
+
+        seg_cash[k] = cash
+        seg_inventory[k] = inventory
+        prev = bucket
+
+    # 逐笔权益曲线：每段内持仓不变，权益随价格线性变化
+    segment = np.zeros(len(prices), dtype=np.int64)
+    segment[changes] = 1
+    np.cumsum(segment, out=segment)
+    equity = total_amount + seg_cash[segment] + seg_inventory[segment] * prices
+
+    peak = np.maximum.accumulate(equity)
+    max_drawdown = float(np.max((peak - equity) / peak))
+
+    pnl = float(equity[-1] - total_amount)
+    result = {
+        "pnl": pnl,
+        "return": pnl / total_amount,
+        "max_drawdown": max_drawdown,
+        "trades": trades,
+        "round_trips": round_trips,
+    }
+
+    if curve_points:
+        idx = np.linspace(0, len(equity) - 1, curve_points).astype(np.int64)
+        result["curve"] = equity[idx]
+
+    return result
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+多分辨率K线金字塔
+Precomputed multi-resolution bar pyramid with O(1) range statistics
+
+报价数据导入时一次性把中间价聚合为 1s/1m/5m/1h/1d 五层K线（只保存有数据的K线），之后:
+- 任意时间窗口的均值、标准差: 1s 层的前缀和（次数、和、平方和），二分定位后 O(1) 相减
+- 任意时间窗口的最高、最低价: 窗口两端用细层补齐到粗层边界（每层最多几十根K线），
+  中间整段落在 1d 层，用稀疏表（sparse table）O(1) 查询
+- bars(): 直接取某一层的OHLC，代替临时 resample
+
+时间窗口按 1s K线对齐（包含与窗口有重叠的整秒K线）。
+和、平方和按相对全部中间价均值的偏移累加，避免大价格平方和相减时的精度损失；
+窗口标准差的相对误差约为 机器精度 x 全量偏移平方和 / 窗口偏移平方和，短窗口在长历史上会放大。
+金字塔缓存在 data/cache（与CSV稀疏索引相同的失效规则），只在导入时（quote_store 转换）
+或使用 --rebuild 时构建；回测只加载已有的缓存，没有缓存时直接统计已加载的报价。
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# 添加项目路径
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.data import quote_store
+from src.utils.fixed_point import from_units, snap, to_units
+
+
+# 各层的K线周期（纳秒），从细到粗，每一层的周期都是上一层的整数倍
+RESOLUTIONS = {
+    "1s": 1_000_000_000,
+    "1m": 60_000_000_000,
+    "5m": 300_000_000_000,
+    "1h": 3_600_000_000_000,
+    "1d": 86_400_000_000_000,
+}
+
+# 每根K线保存的字段（sum/sumsq 为中间价相对 offset（全部中间价的均值）的偏移之和、平方和）
+BAR_FIELDS = ("ts", "open", "high", "low", "close", "count", "sum", "sumsq")
+
+_BASE = "1s"
+_TOP = "1d"
+
+
+class SparseTable:
+    """静态数组的区间最值（O(n log n) 预处理，O(1) 查询）"""
+
+    def __init__(self, values: np.ndarray, op):
+        self.op = op
+        self.table = [np.asarray(values)]
+        width = 1
+        while 2 * width <= len(values):
+            previous = self.table[-1]
+            self.table.append(op(previous[:-width], previous[width:]))
+            width *= 2
+
+    def query(self, i: int, j: int) -> float:
+        """[i, j) 区间的最值（要求 i < j）"""
+        k = (j - i).bit_length() - 1
+        row = self.table[k]
+        return self.op(row[i], row[j - (1 << k)])
+
+
+def _aggregate(bucket: np.ndarray, bars: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """把按时间排序的K线（或报价）按 bucket 合并为更粗的K线"""
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)] - 1
+    return {
+        "ts": bucket[starts],
+        "open": bars["open"][starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": bars["close"][ends],
+        "count": np.add.reduceat(bars["count"], starts),
+        "sum": np.add.reduceat(bars["sum"], starts),
+        "sumsq": np.add.reduceat(bars["sumsq"], starts),
+    }
+
+
+def _to_ns(value) -> int:
+    """时间（字符串、Timestamp、纳秒整数）-> 无时区UTC纳秒"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.value
+
+
+class BarPyramid:
+    """
+    多分辨率K线金字塔
+
+    levels: 各层K线字段数组（见 BAR_FIELDS），offset: 中间价偏移基准，
+    price_precision: 计算中间价时买卖价的定点精度。
+    """
+
+    def __init__(self, levels: Dict[str, Dict[str, np.ndarray]], offset: float, price_precision: int):
+        self.levels = levels
+        self.offset = offset
+        self.price_precision = price_precision
+
+        base = levels[_BASE]
+        self._prefix = {
+            field: np.concatenate(([0], np.cumsum(base[field])))
+            for field in ("count", "sum", "sumsq")
+        }
+        top = levels[_TOP]
+        self._top_high = SparseTable(top["high"], np.maximum)
+        self._top_low = SparseTable(top["low"], np.minimum)
+
+    @classmethod
+    def from_mid(cls, timestamps, mid_prices, price_precision: int = 8) -> "BarPyramid":
+        """由中间价序列（纳秒时间戳）构建"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        mid = np.asarray(mid_prices, dtype=np.float64)
+        if len(mid) == 0:
+            raise ValueError("没有数据，无法构建K线金字塔")
+        if np.any(np.diff(timestamps) < 0):
+            order = np.argsort(timestamps, kind="stable")
+            timestamps, mid = timestamps[order], mid[order]
+
+        offset = float(mid.mean())
+        deviation = mid - offset
+        bars = {
+            "open": mid,
+            "high": mid,
+            "low": mid,
+            "close": mid,
+            "count": np.ones(len(mid), dtype=np.int64),
+            "sum": deviation,
+            "sumsq": deviation * deviation,
+        }
+        levels = {}
+        for name, resolution in RESOLUTIONS.items():
+            bucket = timestamps - timestamps % resolution
+            bars = _aggregate(bucket, bars)
+            levels[name] = bars
+            timestamps = bars["ts"]
+        return cls(levels, offset, price_precision)
+
+    @classmethod
+    def from_quotes(cls, df: pd.DataFrame, price_precision: int = 8) -> "BarPyramid":
+        """由报价 DataFrame（时间索引，bid_price/ask_price 列）构建，中间价按定点整数精确计算"""
+        mid_units = (
+            to_units(df["bid_price"].to_numpy(), price_precision)
+            + to_units(df["ask_price"].to_numpy(), price_precision)
+        )
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        return cls.from_mid(index.as_unit("ns").asi8, from_units(mid_units, price_precision) / 2, price_precision)
+
+    def save(self, path):
+        """保存为 npz"""
+        arrays = {
+            f"{name}_{field}": bars[field]
+            for name, bars in self.levels.items()
+            for field in BAR_FIELDS
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, offset=self.offset, price_precision=self.price_precision, **arrays)
+
+    @classmethod
+    def load(cls, path) -> "BarPyramid":
+        """从 npz 加载"""
+        with np.load(path) as data:
+            levels = {
+                name: {field: data[f"{name}_{field}"] for field in BAR_FIELDS}
+                for name in RESOLUTIONS
+            }
+            return cls(levels, float(data["offset"]), int(data["price_precision"]))
+
+    def _window(self, start=None, end=None):
+        """时间窗口 -> 按 1s 对齐的 [lo, hi) 纳秒区间（end 含端点）"""
+        resolution = RESOLUTIONS[_BASE]
+        base_ts = self.levels[_BASE]["ts"]
+        lo = base_ts[0] if start is None else _to_ns(start)
+        hi = base_ts[-1] if end is None else _to_ns(end)
+        return lo - lo % resolution, hi - hi % resolution + resolution
+
+    def _extremes(self, lo: int, hi: int):
+        """
+        [lo, hi) 内的最高、最低价
+
+        从 1s 层开始，把窗口两端不足一根上层K线的部分在当前层直接求最值，
+        剩下的中间部分交给上一层；到 1d 层用稀疏表查询。每层两端最多各扫描
+        (上层周期 / 本层周期 - 1) 根K线。
+        """
+        names = list(RESOLUTIONS)
+        high, low = -np.inf, np.inf
+        for level, name in enumerate(names):
+            bars = self.levels[name]
+            if name == _TOP:
+                segments = [(lo, hi)]
+            else:
+                coarse = RESOLUTIONS[names[level + 1]]
+                inner_lo = -(-lo // coarse) * coarse
+                inner_hi = hi - hi % coarse
+                if inner_lo >= inner_hi:
+                    segments = [(lo, hi)]
+                else:
+                    segments = [(lo, inner_lo), (inner_hi, hi)]
+
+            for seg_lo, seg_hi in segments:
+                i, j = np.searchsorted(bars["ts"], [seg_lo, seg_hi]).tolist()
+                if i >= j:
+                    continue
+                if name == _TOP:
+                    high = max(high, self._top_high.query(i, j))
+                    low = min(low, self._top_low.query(i, j))
+                else:
+                    high = max(high, bars["high"][i:j].max())
+                    low = min(low, bars["low"][i:j].min())
+
+            if len(segments) == 1:
+                break
+            lo, hi = inner_lo, inner_hi
+        return float(high), float(low)
+
+    def stats(self, start=None, end=None) -> dict:
+        """
+        时间窗口内中间价的统计（与 analyze_price_range 相同的字段）
+
+        count / mean / std 来自前缀和，min / max 来自金字塔和稀疏表，都不访问原始报价。
+        """
+        lo, hi = self._window(start, end)
+        i, j = np.searchsorted(self.levels[_BASE]["ts"], [lo, hi])
+        count = int(self._prefix["count"][j] - self._prefix["count"][i])
+        if count == 0:
+            raise ValueError(f"时间窗口内没有数据: {start or '开始'} 到 {end or '结束'}")
+
+        total = self._prefix["sum"][j] - self._prefix["sum"][i]
+        total_sq = self._prefix["sumsq"][j] - self._prefix["sumsq"][i]
+        mean = float(self.offset + total / count)
+        if count > 1:
+            std = float(np.sqrt(max(total_sq - total * total / count, 0.0) / (count - 1)))
+        else:
+            std = float("nan")
+        high, low = self._extremes(lo, hi)
+        return {
+            "count": count,
+            "mean": mean,
+            "std": std,
+            "min": low,
+            "max": high,
+            # 中间价是半个最小价格单位的整数倍，差值按多一位小数对齐
+            "range": float(snap(high - low, self.price_precision + 1)),
+            "volatility": std / mean * 100,
+        }
+
+    def window_stats(self, starts, ends) -> pd.DataFrame:
+        """
+        多个时间窗口的统计（滚动/前推分析用）
+
+        次数、均值、标准差对所有窗口一起向量化计算，最高、最低价逐窗口查询金字塔。
+        没有数据的窗口 count 为 0，其余字段为 NaN。
+        """
+        resolution = RESOLUTIONS[_BASE]
+        lo = np.array([_to_ns(value) for value in starts], dtype=np.int64)
+        hi = np.array([_to_ns(value) for value in ends], dtype=np.int64)
+        lo -= lo % resolution
+        hi += resolution - hi % resolution
+
+        base_ts = self.levels[_BASE]["ts"]
+        i, j = np.searchsorted(base_ts, lo), np.searchsorted(base_ts, hi)
+        count = self._prefix["count"][j] - self._prefix["count"][i]
+        total = self._prefix["sum"][j] - self._prefix["sum"][i]
+        total_sq = self._prefix["sumsq"][j] - self._prefix["sumsq"][i]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(count > 0, self.offset + total / count, np.nan)
+            variance = np.maximum(total_sq - total * total / count, 0.0) / (count - 1)
+            std = np.where(count > 1, np.sqrt(variance), np.nan)
+
+        extremes = [
+            self._extremes(a, b) if n > 0 else (np.nan, np.nan)
+            for a, b, n in zip(lo.tolist(), hi.tolist(), count.tolist())
+        ]
+        high, low = np.array(extremes, dtype=np.float64).reshape(-1, 2).T
+        return pd.DataFrame(
+            {
+                "start": pd.to_datetime(lo),
+                "end": pd.to_datetime(hi),
+                "count": count,
+                "mean": mean,
+                "std": std,
+                "min": low,
+                "max": high,
+            }
+        )
+
+    def bars(self, resolution: str = "1m", start=None, end=None) -> pd.DataFrame:
+        """取某一层的K线（open/high/low/close/count/mean），只包含有数据的K线"""
+        if resolution not in self.levels:
+            raise ValueError(f"不支持的K线周期: {resolution}，可选: {', '.join(RESOLUTIONS)}")
+        bars = self.levels[resolution]
+        i, j = 0, len(bars["ts"])
+        if start is not None:
+            ts = _to_ns(start)
+            i = int(np.searchsorted(bars["ts"], ts - ts % RESOLUTIONS[resolution]))
+        if end is not None:
+            j = int(np.searchsorted(bars["ts"], _to_ns(end), side="right"))
+
+        window = {field: bars[field][i:j] for field in BAR_FIELDS}
+        return pd.DataFrame(
+            {
+                "open": window["open"],
+                "high": window["high"],
+                "low": window["low"],
+                "close": window["close"],
+                "count": window["count"],
+                "mean": self.offset + window["sum"] / window["count"],
+            },
+            index=pd.DatetimeIndex(pd.to_datetime(window["ts"]), name="timestamp"),
+        )
+
+
+def build_pyramid(path: str, symbol: Optional[str] = None, price_precision: int = 8) -> BarPyramid:
+    """读取整个报价文件构建金字塔并写入缓存"""
+    pyramid = BarPyramid.from_quotes(quote_store.read_quotes(path, symbol=symbol), price_precision)
+    pyramid.save(quote_store.cache_path(path, "bars", f"{symbol or ''}:{price_precision}"))
+    return pyramid
+
+
+def load_pyramid(path: str, symbol: Optional[str] = None, price_precision: int = 8) -> Optional[BarPyramid]:
+    """
+    加载报价文件已缓存的K线金字塔，没有缓存（或文件已变化）时返回 None
+
+    不会隐式构建: 构建需要读取整个文件，按时间窗口回测时只应读取窗口内的数据。
+    """
+    cache = quote_store.cache_path(path, "bars", f"{symbol or ''}:{price_precision}")
+    if cache.exists():
+        return BarPyramid.load(cache)
+    return None
+
+
+def main():
+    """主函数：构建K线金字塔并查询时间窗口统计"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="构建报价数据的多分辨率K线金字塔")
+    parser.add_argument("data_file", type=str, help="报价CSV或parquet文件")
+    parser.add_argument("--symbol", type=str, default=None, help="品种代码（文件含 symbol 列时）")
+    parser.add_argument("--price-precision", type=int, default=8, help="价格精度")
+    parser.add_argument("--start", type=str, default=None, help="窗口开始时间")
+    parser.add_argument("--end", type=str, default=None, help="窗口结束时间")
+    parser.add_argument("--window", type=str, default=None, help="按该长度切分滚动窗口（如 1h、1D）")
+    parser.add_argument("--rebuild", action="store_true", help="读取整个文件构建（或重新构建）缓存")
+
+    args = parser.parse_args()
+
+    if args.rebuild:
+        pyramid = build_pyramid(args.data_file, args.symbol, args.price_precision)
+    else:
+        pyramid = load_pyramid(args.data_file, args.symbol, args.price_precision)
+        if pyramid is None:
+            print("没有该文件的K线金字塔缓存，使用 --rebuild 构建")
+            return
+    for name, bars in pyramid.levels.items():
+        print(f"{name:>3}: {len(bars['ts']):,} 根K线")
+
+    stats = pyramid.stats(args.start, args.end)
+    print(f"\n数据点: {stats['count']:,}")
+    print(f"平均价格: {stats['mean']:.{args.price_precision}f}")
+    print(f"价格范围: {stats['min']:.{args.price_precision}f} - {stats['max']:.{args.price_precision}f}")
+    print(f"波动率: {stats['volatility']:.4f}%")
+
+    if args.window:
+        first, last = pyramid.bars(_BASE, args.start, args.end).index[[0, -1]]
+        starts = pd.date_range(first.floor(args.window), last, freq=args.window)
+        ends = starts + pd.Timedelta(args.window) - pd.Timedelta(RESOLUTIONS[_BASE], "ns")
+        print()
+        print(pyramid.window_stats(starts, ends).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+按时间窗口读取报价数据（谓词下推）
+Time-window reads with predicate pushdown
+
+- Parquet: 时间过滤条件下推给 pyarrow，借助 row group 的 min/max 统计跳过无关的 row group
+- CSV: 首次读取时建立稀疏索引（每 N 行记录一次时间戳和字节偏移，缓存在 data/cache），
+  之后只读取时间窗口覆盖的字节范围
+
+短时间窗口的读取和转换成本与窗口大小成正比，而不是与整个文件成正比。
+"""
+
+import io
+import os
+import sys
+import hashlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 添加项目路径
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+
+# 索引缓存目录（固定在项目根目录下，与当前工作目录无关）
+CACHE_DIR = PROJECT_ROOT / "data" / "cache"
+
+# CSV稀疏索引的粒度（每多少行记录一个位置）
+INDEX_BLOCK_ROWS = 1000
+
+# 写parquet时每个row group的行数，越小时间过滤越精确
+DEFAULT_ROW_GROUP_SIZE = 100_000
+
+
+def _to_timestamp(value) -> Optional[pd.Timestamp]:
+    """统一转换为无时区的UTC时间戳"""
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts
+
+
+def _symbol_candidates(symbol: str) -> List[str]:
+    """品种代码的常见写法，如 EURUSD -> [EURUSD, EUR/USD]"""
+    symbol = symbol.upper()
+    candidates = [symbol]
+    if "/" not in symbol and len(symbol) == 6:
+        candidates.append(f"{symbol[:3]}/{symbol[3:]}")
+    return candidates
+
+
+def _finalize(df: pd.DataFrame) -> pd.DataFrame:
+    """设置时间索引并去掉时区，与 load_historical_quotes 的格式保持一致"""
+    if "timestamp" in df.columns:
+        df = df.set_index("timestamp")
+    if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is not None:
+        df.index = df.index.tz_convert("UTC").tz_localize(None)
+    return df
+
+
+def read_parquet_window(
+    path: str,
+    start=None,
+    end=None,
+    symbol: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> Tuple[pd.DataFrame, int, int]:
+    """
+    读取parquet文件的时间窗口
+
+    返回 (DataFrame, 读取的row group数, 总row group数)
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    schema = parquet_file.schema_arrow
+    ts_type = schema.field("timestamp").type
+
+    def bound(value):
+        ts = _to_timestamp(value)
+        if getattr(ts_type, "tz", None):
+            ts = ts.tz_localize("UTC")
+        return pa.scalar(ts, type=ts_type)
+
+    filters = []
+    if start is not None:
+        filters.append(("timestamp", ">=", bound(start)))
+    if end is not None:
+        filters.append(("timestamp", "<=", bound(end)))
+    if symbol and "symbol" in schema.names:
+        filters.append(("symbol", "in", _symbol_candidates(symbol)))
+
+    # 根据row group统计估算实际需要读取的row group（用于报告）
+    metadata = parquet_file.metadata
+    ts_index = schema.get_field_index("timestamp")
+    lo, hi = _to_timestamp(start), _to_timestamp(end)
+    groups_read = 0
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(ts_index).statistics
+        if stats is None or not stats.has_min_max:
+            groups_read += 1
+            continue
+        if (hi is None or _to_timestamp(stats.min) <= hi) and (lo is None or _to_timestamp(stats.max) >= lo):
+            groups_read += 1
+
+    if columns is not None and "timestamp" not in columns:
+        columns = ["timestamp", *columns]
+
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+    return _finalize(table.to_pandas()), groups_read, metadata.num_row_groups
+
+
+def cache_path(path: str, kind: str, extra: str = "") -> Path:
+    """
+    数据文件派生缓存的路径（文件路径、大小、修改时间变化后自动失效）
+
+    项目内的文件使用相对项目根目录的路径作为键，
+    同一份数据在不同目录检出或从不同工作目录运行时命中同一个缓存。
+    extra 区分同一文件按不同参数生成的缓存（如品种、价格精度）。
+    """
+    stat = os.stat(path)
+    resolved = Path(path).resolve()
+    try:
+        name = resolved.relative_to(PROJECT_ROOT.resolve()).as_posix()
+    except ValueError:
+        name = resolved.as_posix()
+    key = f"{name}:{stat.st_size}:{stat.st_mtime_ns}"
+    if extra:
+        key = f"{key}:{extra}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return Path(CACHE_DIR) / f"{Path(path).name}.{digest}.{kind}.npz"
+
+
+def _index_cache_path(path: str) -> Path:
+    """CSV索引缓存路径"""
+    return cache_path(path, "idx")
+
+
+def build_csv_index(path: str, block_rows: int = INDEX_BLOCK_ROWS) -> dict:
+    """
+    扫描一次CSV，每 block_rows 行记录一次首列时间戳和字节偏移
+
+    要求首列为时间戳且按时间排序；未排序时索引标记为不可用。
+    排序检查覆盖每一行（ISO格式的时间戳按字节串比较，不逐行解析）。
+    """
+    offsets = []
+    stamps = []
+    in_order = True
+
+    with open(path, "rb") as f:
+        header = f.readline()
+        offset = f.tell()
+        row = 0
+        previous = b""
+        for line in f:
+            stamp = line.split(b",", 1)[0]
+            if stamp < previous:
+                in_order = False
+            previous = stamp
+            if row % block_rows == 0:
+                offsets.append(offset)
+                stamps.append(stamp.decode())
+            offset += len(line)
+            row += 1
+
+    timestamps = pd.to_datetime(stamps).as_unit("ns").asi8 if stamps else np.array([], dtype=np.int64)
+    index = {
+        "header": np.frombuffer(header, dtype=np.uint8),
+        "timestamps": np.asarray(timestamps, dtype=np.int64),
+        "offsets": np.asarray(offsets + [offset], dtype=np.int64),
+        "sorted": in_order and bool(np.all(np.diff(timestamps) >= 0)),
+    }
+
+    cache_path = _index_cache_path(path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(cache_path, **index)
+    return index
+
+
+def load_csv_index(path: str) -> dict:
+    """加载（或首次建立）CSV稀疏索引"""
+    cache_path = _index_cache_path(path)
+    if cache_path.exists():
+        with np.load(cache_path) as data:
+            return {key: data[key] for key in data.files}
+    return build_csv_index(path)
+
+
+def read_csv_window(path: str, start=None, end=None) -> Tuple[pd.DataFrame, int, int]:
+    """
+    读取CSV文件的时间窗口
+
+    返回 (DataFrame, 读取的字节数, 文件总字节数)
+    """
+    index = load_csv_index(path)
+    total_bytes = int(index["offsets"][-1])
+    lo, hi = _to_timestamp(start), _to_timestamp(end)
+
+    if not bool(index["sorted"]):
+        # 文件未按时间排序，无法按位置截取，退回全量读取后过滤
+        df = pd.read_csv(path, index_col="timestamp", parse_dates=True)
+        mask = np.ones(len(df), dtype=bool)
+        if lo is not None:
+            mask &= df.index >= lo
+        if hi is not None:
+            mask &= df.index <= hi
+        return df[mask], total_bytes, total_bytes
+
+    timestamps = index["timestamps"]
+    offsets = index["offsets"]
+
+    first = 0
+    if lo is not None:
+        first = max(int(np.searchsorted(timestamps, lo.value, side="left")) - 1, 0)
+    last = len(timestamps)
+    if hi is not None:
+        last = int(np.searchsorted(timestamps, hi.value, side="right"))
+
+    begin, stop = int(offsets[first]), int(offsets[last])
+    with open(path, "rb") as f:
+        f.seek(begin)
+        body = f.read(stop - begin)
+
+    buffer = io.BytesIO(index["header"].tobytes() + body)
+    df = pd.read_csv(buffer, index_col="timestamp", parse_dates=True)
+    return df.loc[lo:hi], stop - begin, total_bytes
+
+
+def read_quotes(
+    path: str,
+    start=None,
+    end=None,
+    symbol: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    读取报价文件的时间窗口（CSV或Parquet）
+
+    参数:
+    - start / end: 时间窗口（含端点），None表示不限制
+    - symbol: 品种代码，文件含 symbol 列时按品种过滤
+    """
+    if str(path).endswith(".parquet"):
+        df, groups_read, groups_total = read_parquet_window(path, start, end, symbol)
+        if start is not None or end is not None:
+            print(f"时间过滤下推: 读取 {groups_read}/{groups_total} 个row group")
+        return df
+
+    if start is None and end is None:
+        return pd.read_csv(path, index_col="timestamp", parse_dates=True)
+
+    df, bytes_read, bytes_total = read_csv_window(path, start, end)
+    print(f"时间过滤下推: 读取 {bytes_read:,}/{bytes_total:,} 字节")
+    return df
+
+
+def write_quotes_parquet_sorted(
+    df: pd.DataFrame,
+    path: str,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+):
+    """按时间排序后写入parquet，row group较小时时间过滤效果更好"""
+    df = df.sort_index()
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path, row_group_size=row_group_size)
+    print(f"已写入 {len(df)} 行到 {path} (每个row group {row_group_size} 行)")
+
+
+def main():
+    """主函数：把报价CSV转换为适合时间过滤的parquet"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="转换报价数据为按时间分组的parquet")
+    parser.add_argument("source", type=str, help="源CSV或parquet文件")
+    parser.add_argument("target", type=str, help="目标parquet文件")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE, help="每个row group的行数")
+    parser.add_argument("--price-precision", type=int, default=None, help="同时按该价格精度预先构建K线金字塔缓存")
+
+    args = parser.parse_args()
+
+    write_quotes_parquet_sorted(read_quotes(args.source), args.target, args.row_group_size)
+    if args.price_precision is not None:
+        from src.data.bar_pyramid import build_pyramid
+
+        pyramid = build_pyramid(args.target, price_precision=args.price_precision)
+        print(f"已构建K线金字塔: {len(pyramid.levels['1s']['ts']):,} 根1秒K线")
+
+
+if __name__ == "__main__":
+    main()
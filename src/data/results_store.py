@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+回测结果存储（按分区追加写入的 Parquet 数据集）
+Append-only, partitioned Parquet store for backtest results
+
+目录结构（hive 分区，默认在 data/results）:
+    runs/kind=<类型>/date=<YYYY-MM-DD>/<批次>.parquet     每次运行一行: 元数据 + 汇总指标
+    fills/kind=<类型>/date=<YYYY-MM-DD>/<run_id>.parquet   可选的逐笔成交明细
+
+- 只追加: 每次写入一个新文件（先写临时文件再原子重命名），已有文件不修改，多个进程可以同时写入
+- 元数据: 配置哈希、数据指纹、代码版本，相同配置和数据的结果可以直接比较
+- 汇总指标使用固定的列（METRIC_COLUMNS），其他指标以JSON存放在 extra 列
+- 查询只读取需要的列，过滤条件下推到分区目录和 row group，排序取前N名时按批次流式处理，
+  内存占用与结果数量无关
+"""
+
+import os
+import sys
+import json
+import uuid
+import hashlib
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# 添加项目路径
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+
+# 结果目录（固定在项目根目录下，与当前工作目录无关）
+RESULTS_DIR = PROJECT_ROOT / "data" / "results"
+
+# 汇总指标列（缺失时为空值）
+METRIC_COLUMNS = (
+    "pnl",
+    "return",
+    "max_drawdown",
+    "sharpe",
+    "orders",
+    "fills",
+    "trades",
+    "round_trips",
+    "elapsed_secs",
+)
+
+RUNS_SCHEMA = pa.schema(
+    [
+        ("run_id", pa.string()),
+        ("created", pa.timestamp("ns", tz="UTC")),
+        ("strategy", pa.string()),
+        ("instrument", pa.string()),
+        ("config_hash", pa.string()),
+        ("data_hash", pa.string()),
+        ("code_version", pa.string()),
+        ("data_file", pa.string()),
+        ("start", pa.string()),
+        ("end", pa.string()),
+        ("config", pa.string()),
+        *[(name, pa.float64()) for name in METRIC_COLUMNS],
+        ("extra", pa.string()),
+    ]
+)
+
+PARTITION_SCHEMA = pa.schema([("kind", pa.string()), ("date", pa.string())])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+# 数据指纹读取文件首尾的字节数
+_FINGERPRINT_BYTES = 1 << 20
+
+
+def config_hash(config: dict) -> str:
+    """配置哈希（键排序后的JSON）"""
+    text = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def data_hash(path: Optional[str], start=None, end=None) -> str:
+    """
+    数据指纹: 文件大小、首尾各1MB内容和时间窗口
+
+    不读取整个文件（大文件也是毫秒级），内容变化几乎总会改变首尾字节或文件大小。
+    """
+    if not path or not os.path.exists(path):
+        return ""
+    digest = hashlib.sha1()
+    size = os.path.getsize(path)
+    digest.update(f"{size}:{start}:{end}".encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(_FINGERPRINT_BYTES))
+        if size > _FINGERPRINT_BYTES:
+            f.seek(max(size - _FINGERPRINT_BYTES, _FINGERPRINT_BYTES))
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """代码版本: git 提交号（工作区有未提交的修改时加 -dirty），不在 git 仓库中时为 unknown"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def fills_from_report(report: pd.DataFrame) -> pd.DataFrame:
+    """Nautilus 成交报告（trader.generate_fills_report）转换为数值列"""
+    if report.empty:
+        return pd.DataFrame(columns=["ts_event", "client_order_id", "instrument_id", "side", "quantity", "price", "commission"])
+    return pd.DataFrame(
+        {
+            "ts_event": report["ts_event"].to_numpy(),
+            "client_order_id": report.index.astype(str),
+            "instrument_id": report["instrument_id"].astype(str).to_numpy(),
+            "side": report["order_side"].astype(str).to_numpy(),
+            "quantity": report["last_qty"].astype(float).to_numpy(),
+            "price": report["last_px"].astype(float).to_numpy(),
+            "commission": report["commission"].astype(str).str.split().str[0].astype(float).to_numpy(),
+        }
+    )
+
+
+def _scalar(value):
+    """NumPy 标量转换为 Python 数值"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ResultsStore:
+    """
+    回测结果存储
+
+    用法:
+        store = ResultsStore()
+        run_id = store.append_run("backtest", config, {"pnl": 12.3, "fills": 40}, data_file=path, fills=fills_df)
+
+        # 参数扫描一次写入多条结果（一个文件）
+        store.append("sweep", [{"config": cfg, "metrics": m} for cfg, m in results])
+
+        # 查询: 只读取需要的列，按收益排序取前20名
+        store.query(["run_id", "config", "pnl"], filters=[("kind", "==", "sweep"), ("pnl", ">", 0)],
+                    sort_by="pnl", limit=20)
+    """
+
+    def __init__(self, root=RESULTS_DIR):
+        self.root = Path(root)
+        self.runs_dir = self.root / "runs"
+        self.fills_dir = self.root / "fills"
+
+    # ---------- 写入 ----------
+
+    def append(self, kind: str, runs: Iterable[dict]) -> List[str]:
+        """
+        追加一批运行结果（写入同一个文件），返回各自的 run_id
+
+        每条结果为dict:
+        - config: 策略/回测配置（dict，计算配置哈希并以JSON保存）
+        - metrics: 汇总指标（METRIC_COLUMNS 中的写入对应列，其余写入 extra）
+        - strategy / instrument / data_file / start / end: 可选的描述信息
+        - data_hash: 可选，未给出时按 data_file 和时间窗口计算
+        - fills: 可选的逐笔成交明细 DataFrame
+        """
+        created = pd.Timestamp.now(tz="UTC")
+        date = created.strftime("%Y-%m-%d")
+        version = code_version()
+        fingerprints: Dict[Tuple, str] = {}
+
+        rows = {name: [] for name in RUNS_SCHEMA.names}
+        run_ids = []
+        for run in runs:
+            run_id = uuid.uuid4().hex[:16]
+            config = run.get("config") or {}
+            metrics = {key: _scalar(value) for key, value in (run.get("metrics") or {}).items()}
+            data_file = run.get("data_file")
+            start, end = run.get("start"), run.get("end")
+
+            data_key = (data_file, str(start), str(end))
+            if "data_hash" in run:
+                fingerprint = run["data_hash"]
+            else:
+                if data_key not in fingerprints:
+                    fingerprints[data_key] = data_hash(data_file, start, end)
+                fingerprint = fingerprints[data_key]
+
+            values = {
+                "run_id": run_id,
+                "created": created,
+                "strategy": run.get("strategy"),
+                "instrument": run.get("instrument"),
+                "config_hash": config_hash(config),
+                "data_hash": fingerprint,
+                "code_version": version,
+                "data_file": str(data_file) if data_file else None,
+                "start": str(start) if start is not None else None,
+                "end": str(end) if end is not None else None,
+                "config": json.dumps(config, sort_keys=True, ensure_ascii=False, default=str),
+                "extra": json.dumps(
+                    {k: v for k, v in metrics.items() if k not in METRIC_COLUMNS}, ensure_ascii=False, default=str
+                ),
+            }
+            for name in METRIC_COLUMNS:
+                value = metrics.get(name)
+                values[name] = float(value) if value is not None else None
+            for name in RUNS_SCHEMA.names:
+                rows[name].append(values[name])
+
+            fills = run.get("fills")
+            if fills is not None:
+                self._write_fills(kind, date, run_id, fills)
+            run_ids.append(run_id)
+
+        if run_ids:
+            table = pa.Table.from_pydict(rows, schema=RUNS_SCHEMA)
+            batch = f"{created.strftime('%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            self._write(table, self.runs_dir / f"kind={kind}" / f"date={date}" / f"{batch}.parquet")
+        return run_ids
+
+    def append_run(self, kind: str, config: dict, metrics: dict, **details) -> str:
+        """追加一条运行结果，参数同 append 中的单条结果"""
+        return self.append(kind, [dict(details, config=config, metrics=metrics)])[0]
+
+    def _write_fills(self, kind: str, date: str, run_id: str, fills: pd.DataFrame):
+        table = pa.Table.from_pandas(fills, preserve_index=False)
+        table = table.add_column(0, "run_id", pa.array([run_id] * len(table), pa.string()))
+        self._write(table, self.fills_dir / f"kind={kind}" / f"date={date}" / f"{run_id}.parquet")
+
+    @staticmethod
+    def _write(table: pa.Table, path: Path):
+        """先写临时文件再重命名（以 _ 开头的文件不会被数据集读取）"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"_{path.name}.tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+    # ---------- 查询 ----------
+
+    def _runs_dataset(self) -> Optional[ds.Dataset]:
+        if not self.runs_dir.exists():
+            return None
+        schema = pa.unify_schemas([RUNS_SCHEMA, PARTITION_SCHEMA])
+        return ds.dataset(self.runs_dir, schema=schema, format="parquet", partitioning=PARTITIONING)
+
+    def query(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[List[tuple]] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = True,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        查询运行结果
+
+        参数:
+        - columns: 需要的列（None表示全部，包括分区列 kind/date）
+        - filters: [(列, 运算符, 值), ...]，运算符为 == != < <= > >= in not in，各条件为且的关系
+        - sort_by / descending / limit: 排序后取前 limit 条（limit 单独使用时不保证顺序）
+        """
+        dataset = self._runs_dataset()
+        columns = list(columns) if columns else RUNS_SCHEMA.names + PARTITION_SCHEMA.names
+        if dataset is None:
+            return pd.DataFrame(columns=columns)
+
+        needed = list(dict.fromkeys(columns + ([sort_by] if sort_by else [])))
+        expression = pq.filters_to_expression(filters) if filters else None
+        scanner = dataset.scanner(columns=needed, filter=expression)
+
+        if sort_by and limit:
+            # 流式取前N名: 每个批次与当前前N名合并后再选出前N名
+            order = "descending" if descending else "ascending"
+            best = None
+            for batch in scanner.to_batches():
+                if batch.num_rows == 0:
+                    continue
+                table = pa.Table.from_batches([batch])
+                if best is not None:
+                    table = pa.concat_tables([best, table])
+                best = table.take(pc.select_k_unstable(table, k=limit, sort_keys=[(sort_by, order)]))
+            table = best if best is not None else scanner.to_table()
+        else:
+            table = scanner.to_table()
+
+        if sort_by:
+            table = table.sort_by([(sort_by, "descending" if descending else "ascending")])
+        if limit:
+            table = table.slice(0, limit)
+        return table.select(columns).to_pandas()
+
+    def get(self, run_id: str) -> Optional[dict]:
+        """读取一条运行结果（配置和额外指标解析为dict）"""
+        rows = self.query(filters=[("run_id", "==", run_id)])
+        if rows.empty:
+            return None
+        record = rows.iloc[0].to_dict()
+        record["config"] = json.loads(record["config"])
+        record.update(json.loads(record.pop("extra") or "{}"))
+        return record
+
+    def fills(self, run_id: str) -> pd.DataFrame:
+        """读取一次运行的逐笔成交明细（没有明细时返回空表）"""
+        paths = list(self.fills_dir.glob(f"kind=*/date=*/{run_id}.parquet")) if self.fills_dir.exists() else []
+        if not paths:
+            return pd.DataFrame()
+        return pq.read_table(paths[0]).to_pandas()
+
+    def count(self, filters: Optional[List[tuple]] = None) -> int:
+        """满足条件的运行数（只读取元数据和过滤需要的列）"""
+        dataset = self._runs_dataset()
+        if dataset is None:
+            return 0
+        return dataset.count_rows(filter=pq.filters_to_expression(filters) if filters else None)
+
+
+def main():
+    """主函数: 查询结果存储"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="查询回测结果存储")
+    parser.add_argument("--root", type=str, default=str(RESULTS_DIR), help="结果目录")
+    parser.add_argument("--kind", type=str, help="运行类型（如 backtest、monte_carlo）")
+    parser.add_argument("--config-hash", type=str, help="只显示该配置的结果")
+    parser.add_argument("--sort", type=str, default="pnl", choices=METRIC_COLUMNS, help="排序指标")
+    parser.add_argument("--ascending", action="store_true", help="升序排列（默认降序）")
+    parser.add_argument("--top", type=int, default=20, help="显示前N条")
+
+    args = parser.parse_args()
+
+    filters = []
+    if args.kind:
+        filters.append(("kind", "==", args.kind))
+    if args.config_hash:
+        filters.append(("config_hash", "==", args.config_hash))
+
+    store = ResultsStore(args.root)
+    total = store.count(filters or None)
+    rows = store.query(
+        ["run_id", "kind", "date", "instrument", "config_hash", "code_version", "pnl", "return", "max_drawdown", "trades"],
+        filters=filters or None,
+        sort_by=args.sort,
+        descending=not args.ascending,
+        limit=args.top,
+    )
+    print(f"共 {total} 条结果，按 {args.sort} {'升序' if args.ascending else '降序'} 前 {len(rows)} 条:\n")
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(rows.to_string(index=False) if not rows.empty else "（无结果）")
+
+
+if __name__ == "__main__":
+    main()
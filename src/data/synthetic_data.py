@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+合成行情数据生成器
+High-volume synthetic market data generator
+
+用于离线压力测试回测与策略，无需网络。支持的价格过程：
+- gbm: 几何布朗运动
+- jump_diffusion: Merton跳跃扩散
+- mean_reverting: 对数价格的OU均值回归
+- regime_switching: 马尔可夫状态切换（不同状态有不同漂移和波动率）
+
+全部使用NumPy向量化生成，按块流式输出，可直接写入与
+nautilus_data/historical/BTCUSDT_quotes.parquet 相同格式的parquet文件。
+"""
+
+import sys
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.data.quote_store import DEFAULT_ROW_GROUP_SIZE
+
+PROCESSES = ("gbm", "jump_diffusion", "mean_reverting", "regime_switching")
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+# 独立的随机数流：每个流按报价顺序消耗随机数，生成结果与分块大小无关
+RANDOM_STREAMS = ("returns", "jumps", "jump_sizes", "regimes", "spread", "bid_size", "ask_size")
+
+# OU过程分块计算时 exp(kappa*dt*block) 的上限，防止浮点溢出
+_AR1_MAX_EXPONENT = 30.0
+
+
+def _ar1_filter(eps: np.ndarray, a: float, x0: float) -> np.ndarray:
+    """
+    向量化计算 AR(1) 递推 x[t] = a * x[t-1] + eps[t]
+
+    利用 x[t] = a^t * (x0 + cumsum(eps[k] * a^-k))，
+    分块进行以避免 a^-k 溢出。
+    """
+    n = len(eps)
+    out = np.empty(n)
+    if n == 0:
+        return out
+
+    if a >= 1.0:
+        np.cumsum(eps, out=out)
+        out += x0
+        return out
+
+    if a < np.exp(-_AR1_MAX_EXPONENT):
+        # 衰减极快（包括 a 下溢为0）：a^2 及更高阶项可忽略，避免除以 a^k
+        out[:] = eps
+        out[0] += a * x0
+        out[1:] += a * eps[:-1]
+        return out
+
+    block = max(1, int(_AR1_MAX_EXPONENT / -np.log(a)))
+    state = x0
+    for start in range(0, n, block):
+        seg = eps[start:start + block]
+        powers = a ** np.arange(1, len(seg) + 1)
+        out[start:start + len(seg)] = powers * (state + np.cumsum(seg / powers))
+        state = out[start + len(seg) - 1]
+
+    return out
+
+
+class SyntheticQuoteGenerator:
+    """
+    合成报价生成器
+
+    参数:
+    - process: 价格过程名称，见 PROCESSES
+    - start_price: 初始中间价
+    - start: 起始时间
+    - interval_ms: 报价时间间隔（毫秒）
+    - annual_vol: 年化波动率
+    - drift: 年化漂移
+    - spread_bps: 基础价差（基点），价格剧烈变动时自动放大
+    - mean_size: 报价量均值
+    - price_precision / size_precision: 价格与数量精度
+    - seed: 随机种子（相同参数和种子生成相同的数据，与 chunk_size 无关）
+
+    过程参数:
+    - jump_intensity: 每年跳跃次数（jump_diffusion）
+    - jump_mean / jump_std: 对数跳跃幅度的均值和标准差
+    - reversion_speed: 年化均值回归速度（mean_reverting）
+    - long_run_price: 长期均值价格，默认为初始价格
+    - regime_vols / regime_drifts: 各状态的年化波动率与漂移（regime_switching）
+    - regime_duration: 各状态平均持续的报价数
+    """
+
+    def __init__(
+        self,
+        process: str = "gbm",
+        start_price: float = 42000.0,
+        start: str = "2025-01-01",
+        interval_ms: int = 100,
+        annual_vol: float = 0.6,
+        drift: float = 0.0,
+        spread_bps: float = 1.0,
+        mean_size: float = 0.5,
+        price_precision: int = 2,
+        size_precision: int = 6,
+        seed: Optional[int] = None,
+        jump_intensity: float = 50.0,
+        jump_mean: float = 0.0,
+        jump_std: float = 0.02,
+        reversion_speed: float = 50.0,
+        long_run_price: Optional[float] = None,
+        regime_vols: Sequence[float] = (0.3, 1.2),
+        regime_drifts: Sequence[float] = (0.0, 0.0),
+        regime_duration: int = 50_000,
+    ):
+        if process not in PROCESSES:
+            raise ValueError(f"未知的价格过程: {process}，可选: {', '.join(PROCESSES)}")
+        if len(regime_vols) != len(regime_drifts):
+            raise ValueError("regime_vols 与 regime_drifts 长度必须一致")
+
+        self.process = process
+        self.interval_ns = int(interval_ms * 1_000_000)
+        self.dt = interval_ms / 1000 / SECONDS_PER_YEAR
+        self.annual_vol = annual_vol
+        self.drift = drift
+        self.spread_ratio = spread_bps / 10_000
+        self.mean_size = mean_size
+        self.price_precision = price_precision
+        self.size_precision = size_precision
+
+        self.jump_intensity = jump_intensity
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+        self.reversion_speed = reversion_speed
+        self.long_run_log_price = np.log(long_run_price or start_price)
+        self.regime_vols = np.asarray(regime_vols, dtype=float)
+        self.regime_drifts = np.asarray(regime_drifts, dtype=float)
+        self.regime_duration = regime_duration
+
+        # 每个随机数流使用由种子派生的独立生成器，避免不同用途的随机数在块内交错
+        self.rngs = {
+            name: np.random.default_rng(child)
+            for name, child in zip(RANDOM_STREAMS, np.random.SeedSequence(seed).spawn(len(RANDOM_STREAMS)))
+        }
+
+        # 跨块保持的状态
+        self._log_price = float(np.log(start_price))
+        self._next_ts = pd.Timestamp(start).value
+        self._regime = 0
+        self._regime_left = int(self.rngs["regimes"].geometric(1.0 / regime_duration))
+
+    def _regime_path(self, n: int) -> np.ndarray:
+        """生成长度为n的状态序列（几何分布持续时间，逐段填充）"""
+        regimes = np.empty(n, dtype=np.int64)
+        n_regimes = len(self.regime_vols)
+        rng = self.rngs["regimes"]
+        filled = 0
+
+        while filled < n:
+            if self._regime_left == 0:
+                if n_regimes > 1:
+                    # 切换到其他状态
+                    self._regime = (self._regime + rng.integers(1, n_regimes)) % n_regimes
+                self._regime_left = int(rng.geometric(1.0 / self.regime_duration))
+
+            take = min(self._regime_left, n - filled)
+            regimes[filled:filled + take] = self._regime
+            self._regime_left -= take
+            filled += take
+
+        return regimes
+
+    def _log_returns(self, n: int) -> np.ndarray:
+        """生成n步对数收益（mean_reverting 返回的是对数价格路径）"""
+        dt = self.dt
+        z = self.rngs["returns"].standard_normal(n)
+
+        if self.process == "gbm":
+            sigma = self.annual_vol
+            return (self.drift - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * z
+
+        if self.process == "jump_diffusion":
+            sigma = self.annual_vol
+            # 跳跃补偿使期望收益与漂移一致
+            k = np.exp(self.jump_mean + 0.5 * self.jump_std ** 2) - 1
+            base = (self.drift - self.jump_intensity * k - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * z
+            jumps = self.rngs["jumps"].poisson(self.jump_intensity * dt, n)
+            hit = jumps > 0
+            if hit.any():
+                count = jumps[hit]
+                base[hit] += count * self.jump_mean + np.sqrt(count) * self.jump_std * self.rngs["jump_sizes"].standard_normal(hit.sum())
+            return base
+
+        if self.process == "regime_switching":
+            regimes = self._regime_path(n)
+            sigma = self.regime_vols[regimes]
+            mu = self.regime_drifts[regimes]
+            return (mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * z
+
+        # mean_reverting: 精确离散化的OU过程
+        kappa = self.reversion_speed
+        a = np.exp(-kappa * dt)
+        step_std = self.annual_vol * np.sqrt((1 - a ** 2) / (2 * kappa))
+        deviation = _ar1_filter(step_std * z, a, self._log_price - self.long_run_log_price)
+        return deviation + self.long_run_log_price
+
+    def next_chunk(self, n: int) -> pd.DataFrame:
+        """生成接下来的n条报价"""
+        if self.process == "mean_reverting":
+            log_prices = self._log_returns(n)
+            returns = np.diff(log_prices, prepend=self._log_price)
+        else:
+            returns = self._log_returns(n)
+            log_prices = self._log_price + np.cumsum(returns)
+
+        self._log_price = float(log_prices[-1])
+        mid = np.exp(log_prices)
+
+        # 价差：基础价差，价格跳动越大价差越宽，并带随机扰动
+        step_vol = self.annual_vol * np.sqrt(self.dt)
+        shock = np.abs(returns) / step_vol if step_vol > 0 else 0.0
+        widen = 1.0 + 0.5 * np.minimum(shock, 20.0)
+        noise = self.rngs["spread"].lognormal(0.0, 0.25, n)
+        tick = 10.0 ** -self.price_precision
+        half_spread = np.maximum(mid * self.spread_ratio * widen * noise / 2, tick / 2)
+
+        bid = np.floor((mid - half_spread) / tick) * tick
+        ask = np.ceil((mid + half_spread) / tick) * tick
+        ask = np.maximum(ask, bid + tick)
+
+        # 报价量：对数正态分布
+        sigma_size = 1.0
+        mu_size = np.log(self.mean_size) - 0.5 * sigma_size ** 2
+        min_size = 10.0 ** -self.size_precision
+        bid_size = np.maximum(np.round(self.rngs["bid_size"].lognormal(mu_size, sigma_size, n), self.size_precision), min_size)
+        ask_size = np.maximum(np.round(self.rngs["ask_size"].lognormal(mu_size, sigma_size, n), self.size_precision), min_size)
+
+        timestamps = self._next_ts + np.arange(n, dtype=np.int64) * self.interval_ns
+        self._next_ts = int(timestamps[-1]) + self.interval_ns
+
+        return pd.DataFrame(
+            {
+                "bid_price": np.round(bid, self.price_precision),
+                "ask_price": np.round(ask, self.price_precision),
+                "bid_size": bid_size,
+                "ask_size": ask_size,
+            },
+            index=pd.DatetimeIndex(timestamps, name="timestamp"),
+        )
+
+    def chunks(self, n_quotes: int, chunk_size: int = 1_000_000) -> Iterator[pd.DataFrame]:
+        """按块流式生成共n_quotes条报价"""
+        remaining = n_quotes
+        while remaining > 0:
+            n = min(chunk_size, remaining)
+            yield self.next_chunk(n)
+            remaining -= n
+
+
+def generate_quotes(n_quotes: int, **kwargs) -> pd.DataFrame:
+    """一次性生成报价（适合小数据量）"""
+    generator = SyntheticQuoteGenerator(**kwargs)
+    return pd.concat(list(generator.chunks(n_quotes)))
+
+
+def write_quotes_parquet(
+    generator: SyntheticQuoteGenerator,
+    path: str,
+    n_quotes: int,
+    chunk_size: int = 1_000_000,
+) -> int:
+    """
+    流式写入parquet文件，每块再按 DEFAULT_ROW_GROUP_SIZE 行拆分为row group，
+    便于按时间窗口读取时跳过无关的row group
+
+    内存占用只与chunk_size有关，与总数据量无关。
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    writer = None
+    written = 0
+    try:
+        for chunk in generator.chunks(n_quotes, chunk_size):
+            table = pa.Table.from_pandas(chunk, preserve_index=True)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="snappy")
+            writer.write_table(table, row_group_size=DEFAULT_ROW_GROUP_SIZE)
+            written += len(chunk)
+            print(f"已生成 {written:,} / {n_quotes:,} 条报价")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return written
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="生成合成行情数据")
+    parser.add_argument("--process", choices=PROCESSES, default="gbm", help="价格过程")
+    parser.add_argument("--quotes", type=int, default=1_000_000, help="报价条数")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="每块条数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--start-price", type=float, default=42000.0, help="初始价格")
+    parser.add_argument("--start", type=str, default="2025-01-01", help="起始时间")
+    parser.add_argument("--interval-ms", type=int, default=100, help="报价间隔（毫秒）")
+    parser.add_argument("--vol", type=float, default=0.6, help="年化波动率")
+    parser.add_argument("--spread-bps", type=float, default=1.0, help="基础价差（基点）")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="输出parquet路径（默认 nautilus_data/synthetic/BTCUSDT_<process>.parquet）",
+    )
+
+    args = parser.parse_args(argv)
+    output = args.output or f"nautilus_data/synthetic/BTCUSDT_{args.process}.parquet"
+
+    print(f"=== 生成合成数据: {args.process} ===")
+    generator = SyntheticQuoteGenerator(
+        process=args.process,
+        start_price=args.start_price,
+        start=args.start,
+        interval_ms=args.interval_ms,
+        annual_vol=args.vol,
+        spread_bps=args.spread_bps,
+        seed=args.seed,
+    )
+
+    start = time.perf_counter()
+    written = write_quotes_parquet(generator, output, args.quotes, args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✅ 共生成 {written:,} 条报价，用时 {elapsed:.1f} 秒 ({written / elapsed:,.0f} 条/秒)")
+    print(f"数据已保存到: {output}")
+
+
+if __name__ == "__main__":
+    main()
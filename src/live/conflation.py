@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+报价合并（行情积压时只处理最新报价）
+Quote conflation for the strategy inbox
+
+实盘数据引擎从队列中连续取出积压的行情时不会让出事件循环，
+因此用 loop.call_soon 安排的回调一定在积压处理完之后才执行:
+- 报价足够新鲜且没有待处理报价时直接交给策略（不增加延迟）
+- 否则按交易工具只保留最新报价，积压处理完后统一交给策略，被覆盖的报价计入丢弃数
+"""
+
+from typing import Callable, Dict, Optional
+
+
+class QuoteConflator:
+    """
+    按交易工具合并报价
+
+    用法（策略内）:
+        conflator = QuoteConflator(self._handle_quote, loop.call_soon, max_age_ns=1_000_000)
+        conflator.offer(tick, self.clock.timestamp_ns())    # 在 on_quote_tick 中调用
+
+    max_age_ns: 报价从进入节点（ts_init）到策略处理的最大允许延迟，超过即视为行情积压。
+    """
+
+    def __init__(
+        self,
+        handler: Callable,
+        schedule_fn: Callable[[Callable], object],
+        max_age_ns: int = 1_000_000,
+        on_drop: Optional[Callable[[], None]] = None,
+    ):
+        self.handler = handler
+        self.schedule_fn = schedule_fn
+        self.max_age_ns = max_age_ns
+        self.on_drop = on_drop
+
+        self._pending: Dict[object, object] = {}
+        self._scheduled = False
+
+        # 统计
+        self.received = 0
+        self.dropped = 0
+        self.flushes = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def offer(self, tick, now_ns: int):
+        """收到一个报价"""
+        self.received += 1
+        if not self._pending and now_ns - tick.ts_init <= self.max_age_ns:
+            self.handler(tick)
+            return
+
+        key = tick.instrument_id
+        if key in self._pending:
+            self.dropped += 1
+            if self.on_drop:
+                self.on_drop()
+        self._pending[key] = tick
+        if not self._scheduled:
+            self._scheduled = True
+            self.schedule_fn(self.flush)
+
+    def flush(self):
+        """把每个交易工具的最新报价交给策略"""
+        self._scheduled = False
+        pending, self._pending = self._pending, {}
+        if pending:
+            self.flushes += 1
+        for tick in pending.values():
+            self.handler(tick)
+
+    def summary(self) -> dict:
+        return {
+            "received": self.received,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+        }
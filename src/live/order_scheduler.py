@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+订单限速与请求合并
+Venue-aware order rate limiting and request coalescing
+
+位于策略与执行客户端之间:
+- 令牌桶分别限制下单和撤单的请求速率（对应交易所各接口的限频）
+- 撤单优先于下单发送（先释放资金和挂单位置）
+- 同一网格价位上尚未发出的 撤单+相同新单 直接抵消，尚未发出的新单被撤销时直接丢弃
+- 多个撤单合并为一次批量撤单请求
+- 记录队列深度、排队等待时间、被限速和被合并的请求数
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.monitoring.profiling import LatencyHistogram
+
+
+class TokenBucket:
+    """令牌桶（速率: 个/秒，容量: 突发请求数）"""
+
+    __slots__ = ("rate", "capacity", "tokens", "last_ns")
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.last_ns: Optional[int] = None
+
+    def _refill(self, now_ns: int):
+        if self.last_ns is not None and now_ns > self.last_ns:
+            self.tokens = min(self.capacity, self.tokens + (now_ns - self.last_ns) * self.rate / 1e9)
+        self.last_ns = now_ns
+
+    def wait_ns(self, now_ns: int, n: int = 1) -> int:
+        """距离攒够n个令牌还需等待的时间"""
+        self._refill(now_ns)
+        missing = n - self.tokens
+        return 0 if missing <= 0 else int(missing * 1e9 / self.rate) + 1
+
+    def try_take(self, now_ns: int, n: int = 1) -> bool:
+        """尝试取出n个令牌"""
+        self._refill(now_ns)
+        if self.tokens >= n:
+            self.tokens -= n
+            return True
+        return False
+
+
+class OrderScheduler:
+    """
+    订单请求调度器
+
+    用法（策略内）:
+        scheduler = OrderScheduler(self._send_order, self.cancel_order, self.cancel_orders)
+        order = scheduler.submit(order, level, now_ns)   # 返回代表该价位的订单
+        scheduler.cancel(order, level, now_ns)
+        scheduler.drain(now_ns)                          # 在 next_drain_ns() 时刻再次调用
+
+    submit_rate / cancel_rate 为None时对应方向不限速。
+    """
+
+    def __init__(
+        self,
+        submit_fn: Callable,
+        cancel_fn: Callable,
+        batch_cancel_fn: Optional[Callable] = None,
+        submit_rate: Optional[float] = 10.0,
+        cancel_rate: Optional[float] = 10.0,
+        burst: int = 10,
+        batch_size: int = 10,
+    ):
+        self.submit_fn = submit_fn
+        self.cancel_fn = cancel_fn
+        self.batch_cancel_fn = batch_cancel_fn
+        self.batch_size = batch_size if batch_cancel_fn else 1
+
+        self.submit_bucket = TokenBucket(submit_rate, burst) if submit_rate else None
+        self.cancel_bucket = TokenBucket(cancel_rate, burst) if cancel_rate else None
+
+        # 订单ID -> (订单, 价位, 入队时间)
+        self._submits: "OrderedDict[str, Tuple[object, float, int]]" = OrderedDict()
+        self._cancels: "OrderedDict[str, Tuple[object, float, int]]" = OrderedDict()
+        self._cancel_by_level: Dict[float, str] = {}
+
+        # 统计
+        self.wait_histogram = LatencyHistogram()
+        self.sent_submits = 0
+        self.sent_cancels = 0
+        self.batches = 0
+        self.coalesced = 0   # 被抵消/丢弃的请求数
+        self.throttled = 0   # 因令牌不足而推迟发送的次数
+        self.max_depth = 0
+        self._last_ns = 0    # 回测中定时器可能带着较早的时间戳触发，内部时间只前进不后退
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._submits) + len(self._cancels)
+
+    def _track_depth(self):
+        depth = self.queue_depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    @staticmethod
+    def _same_order(a, b) -> bool:
+        return a.side == b.side and a.price == b.price and a.quantity == b.quantity
+
+    def submit(self, order, level: float, now_ns: int):
+        """
+        提交新订单（可能排队）
+
+        同一价位有尚未发出的撤单、且被撤订单与新订单完全相同时，
+        两个请求互相抵消：撤单取消，新单不发出，返回原订单。
+        """
+        cancel_id = self._cancel_by_level.get(level)
+        if cancel_id is not None:
+            existing = self._cancels[cancel_id][0]
+            if self._same_order(existing, order) and not existing.is_closed:
+                del self._cancels[cancel_id]
+                del self._cancel_by_level[level]
+                self.coalesced += 2
+                return existing
+
+        self._submits[order.client_order_id.value] = (order, level, now_ns)
+        self._track_depth()
+        self.drain(now_ns)
+        return order
+
+    def cancel(self, order, level: float, now_ns: int):
+        """撤销订单（可能排队）；尚未发出的新单直接丢弃"""
+        client_order_id = order.client_order_id.value
+        if self._submits.pop(client_order_id, None) is not None:
+            self.coalesced += 2
+            return
+
+        self._cancels[client_order_id] = (order, level, now_ns)
+        self._cancel_by_level[level] = client_order_id
+        self._track_depth()
+        self.drain(now_ns)
+
+    def pending_order(self, client_order_id: str):
+        """尚未发出的订单（不在队列中时返回None）"""
+        entry = self._submits.get(client_order_id)
+        return entry[0] if entry else None
+
+    def drop_submits(self) -> List:
+        """丢弃所有尚未发出的新单（如策略停止时），返回被丢弃的订单"""
+        dropped = [order for order, _, _ in self._submits.values()]
+        self._submits.clear()
+        self.coalesced += len(dropped)
+        return dropped
+
+    def clear(self):
+        """丢弃所有排队中的请求"""
+        self._submits.clear()
+        self._cancels.clear()
+        self._cancel_by_level.clear()
+
+    @staticmethod
+    def _take(bucket: Optional[TokenBucket], now_ns: int) -> bool:
+        return bucket is None or bucket.try_take(now_ns)
+
+    def _send_cancel_batch(self, now_ns: int):
+        """发送一批撤单（最多 batch_size 个，合并为一次请求）"""
+        batch = []
+        while self._cancels and len(batch) < self.batch_size:
+            client_order_id, (order, level, enqueued_ns) = self._cancels.popitem(last=False)
+            if self._cancel_by_level.get(level) == client_order_id:
+                del self._cancel_by_level[level]
+            if order.is_closed:
+                continue  # 排队期间已成交或已撤销
+            self.wait_histogram.record(now_ns - enqueued_ns)
+            batch.append(order)
+
+        if len(batch) == 1:
+            self.cancel_fn(batch[0])
+        elif batch:
+            self.batch_cancel_fn(batch)
+            self.batches += 1
+        self.sent_cancels += len(batch)
+
+    def flush_cancels(self, now_ns: int):
+        """不等令牌，立即分批发出所有排队的撤单（策略停止时使用）"""
+        while self._cancels:
+            self._send_cancel_batch(now_ns)
+
+    def drain(self, now_ns: int):
+        """在令牌允许的范围内发送排队的请求：先撤单，后下单"""
+        now_ns = self._last_ns = max(now_ns, self._last_ns)
+        while self._cancels:
+            if not self._take(self.cancel_bucket, now_ns):
+                self.throttled += 1
+                break
+            self._send_cancel_batch(now_ns)
+
+        while self._submits:
+            if not self._take(self.submit_bucket, now_ns):
+                self.throttled += 1
+                break
+            _, (order, _, enqueued_ns) = self._submits.popitem(last=False)
+            self.wait_histogram.record(now_ns - enqueued_ns)
+            self.submit_fn(order)
+            self.sent_submits += 1
+
+    def next_drain_ns(self, now_ns: int) -> Optional[int]:
+        """队列非空时下一次有令牌可用的时间，队列为空时返回None"""
+        waits = []
+        if self._cancels and self.cancel_bucket is not None:
+            waits.append(self.cancel_bucket.wait_ns(now_ns))
+        if self._submits and self.submit_bucket is not None:
+            waits.append(self.submit_bucket.wait_ns(now_ns))
+        return now_ns + max(min(waits), 1) if waits else None
+
+    def summary(self) -> dict:
+        """调度统计"""
+        return {
+            "queued_submits": len(self._submits),
+            "queued_cancels": len(self._cancels),
+            "max_depth": self.max_depth,
+            "sent_submits": self.sent_submits,
+            "sent_cancels": self.sent_cancels,
+            "batches": self.batches,
+            "coalesced": self.coalesced,
+            "throttled": self.throttled,
+            "wait_ns": self.wait_histogram.summary(),
+        }
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+断线重连后的挂单对账
+Open-order reconciliation against the grid ladder
+
+重连后执行引擎一次性拉取交易所的挂单和成交状态并更新缓存，
+策略再用本模块把缓存中的订单与自己记录的网格（订单ID -> 价位）逐价位比对，
+只修复差异，而不是撤掉全部订单重新布网格:
+- adopt: 交易所上有、策略不知道，且价位在网格上、该价位空闲 -> 纳入网格
+- cancel: 交易所上有、但不在网格价位上或该价位已被占用 -> 撤单
+- replace: 策略认为在挂、交易所上已关闭（被撤/过期/拒绝）-> 原价位按剩余数量重新下单
+- missed_fill: 策略认为在挂、交易所上已（部分）成交但策略没处理成交 -> 补下反向订单
+
+比对只依赖一次批量查询得到的挂单列表和按ID的缓存查找，耗时与网格大小成正比。
+仍在途（已提交未确认、或在限速队列中尚未发出）的订单不参与比对。
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class ReconcilePlan:
+    """对账结果"""
+
+    adopt: List[Tuple[object, float]] = field(default_factory=list)      # (订单, 价位)
+    cancel: List[object] = field(default_factory=list)                   # 订单
+    replace: List[Tuple[str, float, object, float]] = field(default_factory=list)  # (原订单ID, 价位, 方向, 数量)
+    missed_fills: List[Tuple[object, float]] = field(default_factory=list)  # (订单, 价位)
+    matched: int = 0
+
+    @property
+    def changes(self) -> int:
+        return len(self.adopt) + len(self.cancel) + len(self.replace) + len(self.missed_fills)
+
+    def summary(self) -> dict:
+        return {
+            "matched": self.matched,
+            "adopt": len(self.adopt),
+            "cancel": len(self.cancel),
+            "replace": len(self.replace),
+            "missed_fills": len(self.missed_fills),
+        }
+
+
+def match_level(price: float, levels: Sequence[float], tolerance: float) -> Optional[float]:
+    """把订单价格匹配到最近的网格价位（levels 升序，超出容差时返回None）"""
+    if not levels:
+        return None
+    i = bisect_left(levels, price)
+    candidates = levels[max(i - 1, 0):i + 1]
+    nearest = min(candidates, key=lambda level: abs(level - price))
+    return nearest if abs(nearest - price) <= tolerance else None
+
+
+def plan_reconciliation(
+    active_orders: Dict[str, float],
+    open_orders: Iterable,
+    lookup: Callable[[str], Optional[object]],
+    grid_prices: Sequence[float],
+    tolerance: float,
+) -> ReconcilePlan:
+    """
+    比对策略记录的网格与交易所状态
+
+    参数:
+    - active_orders: 策略认为在挂的订单 (订单ID -> 价位)
+    - open_orders: 交易所当前的挂单（一次批量查询的结果）
+    - lookup: 按订单ID查找订单（缓存），用于判断不在挂的订单最终状态
+    - grid_prices: 升序网格价位
+    - tolerance: 订单价格与网格价位的匹配容差（通常为一个最小价格变动）
+    """
+    plan = ReconcilePlan()
+    levels = sorted(grid_prices)
+
+    occupied = set(active_orders.values())
+    open_ids = set()
+
+    for order in open_orders:
+        client_order_id = order.client_order_id.value
+        open_ids.add(client_order_id)
+        if client_order_id in active_orders:
+            plan.matched += 1
+            continue
+
+        price = getattr(order, "price", None)
+        level = match_level(float(price), levels, tolerance) if price is not None else None
+        if level is not None and level not in occupied:
+            plan.adopt.append((order, level))
+            occupied.add(level)
+        else:
+            plan.cancel.append(order)
+
+    for client_order_id, level in active_orders.items():
+        if client_order_id in open_ids:
+            continue
+
+        order = lookup(client_order_id)
+        if order is None or not order.is_closed:
+            continue  # 尚未发出或仍在途，等确认后再比对
+
+        if float(order.filled_qty) > 0:
+            plan.missed_fills.append((order, level))
+        remaining = float(order.quantity) - float(order.filled_qty)
+        if order.status.name != "FILLED" and remaining > 0:
+            plan.replace.append((client_order_id, level, order.side, remaining))
+
+    return plan
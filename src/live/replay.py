@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+本地回放交易所（离线压测实盘路径）
+Local replay venue for load-testing the live TradingNode path
+
+- ReplayDataClient: 实盘数据客户端，按倍速（1x-1000x）把历史报价文件回放为 QuoteTick，
+  时间戳映射到当前墙钟时间，落后于时刻表时把所有到期报价成批发出（突发负载）
+- ReplayExecutionClient: Nautilus 的 SandboxExecutionClient（内置模拟撮合引擎，限价单按回放的报价撮合），
+  补上批量撤单（限速调度器会合并撤单请求）
+
+策略、风控、限速、延迟遥测都走与实盘完全相同的 TradingNode 代码路径，只是没有网络。
+回放结束后发布 events.replay.<客户端ID> 事件，附带吞吐量和调度延迟统计。
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import msgspec
+import numpy as np
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from nautilus_trader.adapters.sandbox.execution import SandboxExecutionClient
+from nautilus_trader.cache.cache import Cache
+from nautilus_trader.common.component import LiveClock, MessageBus
+from nautilus_trader.common.providers import InstrumentProvider
+from nautilus_trader.config import LiveDataClientConfig
+from nautilus_trader.live.data_client import LiveMarketDataClient
+from nautilus_trader.live.factories import LiveDataClientFactory
+from nautilus_trader.model.data import QuoteTick
+from nautilus_trader.model.identifiers import ClientId
+from nautilus_trader.model.objects import Price, Quantity
+
+from src.backtest.instruments import get_test_instrument
+from src.data.quote_store import read_quotes
+from src.monitoring.profiling import LatencyHistogram
+
+
+REPLAY = "REPLAY"
+DEFAULT_REPLAY_FILE = "nautilus_data/BTCUSDT_quotes.parquet"
+MIN_SPEED = 1.0
+MAX_SPEED = 1000.0
+
+
+class ReplayDataClientConfig(LiveDataClientConfig, frozen=True):
+    """回放数据客户端配置"""
+
+    data_path: str = DEFAULT_REPLAY_FILE
+    symbol: str = "BTCUSDT"               # 测试交易工具代码（见 src.backtest.instruments）
+    speed: float = 1.0                    # 回放倍速（1x-1000x）
+    start: Optional[str] = None           # 回放时间窗口
+    end: Optional[str] = None
+
+
+def replay_offsets(timestamps_ns: np.ndarray, speed: float) -> np.ndarray:
+    """按倍速把历史时间戳换算为相对回放开始时刻的墙钟偏移（纳秒）"""
+    if not MIN_SPEED <= speed <= MAX_SPEED:
+        raise ValueError(f"回放倍速必须在 {MIN_SPEED:g}-{MAX_SPEED:g} 之间: {speed}")
+    if len(timestamps_ns) == 0:
+        return np.empty(0, dtype=np.int64)
+    elapsed = timestamps_ns.astype(np.int64) - np.int64(timestamps_ns[0])
+    return (elapsed / speed).astype(np.int64)
+
+
+class ReplayDataClient(LiveMarketDataClient):
+    """按时刻表回放历史报价的实盘数据客户端"""
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        client_id: ClientId,
+        msgbus: MessageBus,
+        cache: Cache,
+        clock: LiveClock,
+        config: ReplayDataClientConfig,
+    ):
+        self.instrument = get_test_instrument(config.symbol)
+        super().__init__(
+            loop=loop,
+            client_id=client_id,
+            venue=self.instrument.id.venue,
+            msgbus=msgbus,
+            cache=cache,
+            clock=clock,
+            instrument_provider=InstrumentProvider(),
+            config=config,
+        )
+        self.replay_config = config
+        self._replay_task: Optional[asyncio.Task] = None
+
+        # 统计
+        self.published = 0
+        self.bursts = 0
+        self.max_burst = 0
+        self.lag_histogram = LatencyHistogram()   # 实际发出时间相对时刻表的落后（纳秒）
+        self.wall_secs = 0.0
+
+    async def _connect(self):
+        if self._cache.instrument(self.instrument.id) is None:
+            self._cache.add_instrument(self.instrument)
+        self._handle_data(self.instrument)
+
+    async def _disconnect(self):
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+            self._replay_task = None
+
+    async def _subscribe_quote_ticks(self, command):
+        if command.instrument_id != self.instrument.id:
+            self._log.warning(f"回放数据中没有 {command.instrument_id}")
+            return
+        if self._replay_task is None:
+            self._replay_task = self.create_task(self._replay())
+
+    async def _subscribe_trade_ticks(self, command):
+        pass  # 回放数据只有报价
+
+    async def _unsubscribe_quote_ticks(self, command):
+        pass
+
+    async def _unsubscribe_trade_ticks(self, command):
+        pass
+
+    async def _replay(self):
+        """按时刻表发出报价，每批发出后让出事件循环"""
+        config = self.replay_config
+        df = read_quotes(config.data_path, config.start, config.end, symbol=config.symbol)
+        offsets = replay_offsets(df.index.values.astype("datetime64[ns]").astype(np.int64), config.speed)
+
+        instrument_id = self.instrument.id
+        price_precision = self.instrument.price_precision
+        size_precision = self.instrument.size_precision
+        bid = df["bid_price"].tolist()
+        ask = df["ask_price"].tolist()
+        bid_size = df["bid_size"].tolist()
+        ask_size = df["ask_size"].tolist()
+
+        self._log.info(f"开始回放 {len(df)} 条报价, 倍速 {config.speed:g}x")
+        started = time.perf_counter()
+        start_ns = self._clock.timestamp_ns()
+        i, n = 0, len(offsets)
+        while i < n:
+            now_ns = self._clock.timestamp_ns()
+            j = int(np.searchsorted(offsets, now_ns - start_ns, side="right"))
+            if j <= i:
+                await asyncio.sleep((offsets[i] - (now_ns - start_ns)) / 1e9)
+                continue
+
+            self.lag_histogram.record(now_ns - start_ns - int(offsets[i]))
+            for k in range(i, j):
+                self._handle_data(QuoteTick(
+                    instrument_id=instrument_id,
+                    bid_price=Price(bid[k], price_precision),
+                    ask_price=Price(ask[k], price_precision),
+                    bid_size=Quantity(bid_size[k], size_precision),
+                    ask_size=Quantity(ask_size[k], size_precision),
+                    ts_event=start_ns + int(offsets[k]),
+                    ts_init=now_ns,
+                ))
+            self.published += j - i
+            self.bursts += 1
+            self.max_burst = max(self.max_burst, j - i)
+            i = j
+            await asyncio.sleep(0)
+
+        self.wall_secs = time.perf_counter() - started
+        self._log.info(f"回放完成: {self.summary()}")
+        self._msgbus.publish(f"events.replay.{self.id}", self.summary())
+
+    def summary(self) -> dict:
+        """回放统计"""
+        return {
+            "published": self.published,
+            "wall_secs": self.wall_secs,
+            "quotes_per_sec": self.published / self.wall_secs if self.wall_secs else 0.0,
+            "bursts": self.bursts,
+            "max_burst": self.max_burst,
+            "lag_ns": self.lag_histogram.summary(),
+        }
+
+
+class ReplayLiveDataClientFactory(LiveDataClientFactory):
+    """回放数据客户端工厂（注册到 TradingNode）"""
+
+    @staticmethod
+    def create(
+        loop: asyncio.AbstractEventLoop,
+        name: str,
+        config: ReplayDataClientConfig,
+        msgbus: MessageBus,
+        cache: Cache,
+        clock: LiveClock,
+    ) -> ReplayDataClient:
+        return ReplayDataClient(
+            loop=loop,
+            client_id=ClientId(name),
+            msgbus=msgbus,
+            cache=cache,
+            clock=clock,
+            config=config,
+        )
+
+
+class ReplayExecutionClient(SandboxExecutionClient):
+    """模拟撮合执行客户端（支持批量撤单）"""
+
+    def batch_cancel_orders(self, command):
+        # Sandbox 客户端没有公开的批量撤单接口，逐个转发给公开的 cancel_order
+        for cancel in command.cancels:
+            self.cancel_order(cancel)
+
+
+def prepare_replay_strategies(strategy_configs: List, instrument, first_mid: float) -> List:
+    """
+    把策略配置改到回放交易工具上
+
+    固定价格范围不包含回放数据的起始价格时改为自动计算，并打开延迟遥测。
+    """
+    prepared = []
+    for config in strategy_configs:
+        changes = {"instrument_id": str(instrument.id), "latency_telemetry": True}
+        if config.upper_price is not None and config.lower_price is not None:
+            if not config.lower_price <= first_mid <= config.upper_price:
+                print(
+                    f"回放起始价格 {first_mid:.2f} 不在网格范围 "
+                    f"{config.lower_price}-{config.upper_price} 内，改为自动计算"
+                )
+                changes.update(upper_price=None, lower_price=None)
+        prepared.append(msgspec.structs.replace(config, **changes))
+    return prepared
+
+
+async def run_replay_node(
+    strategy_configs: List,
+    data_path: str = DEFAULT_REPLAY_FILE,
+    speed: float = 1.0,
+    symbol: str = "BTCUSDT",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    starting_balance: float = 100_000,
+) -> dict:
+    """
+    在本地回放交易所上运行交易节点，回放结束后停止节点并返回统计
+
+    只支持单个策略（回放文件只有一个交易工具）。
+    """
+    from nautilus_trader.adapters.sandbox.config import SandboxExecutionClientConfig
+    from nautilus_trader.config import LiveExecEngineConfig, LoggingConfig, TradingNodeConfig
+    from nautilus_trader.live.node import TradingNode
+
+    from src.strategies.grid import GridStrategy
+
+    if len(strategy_configs) != 1:
+        raise ValueError("回放模式只支持单个策略配置")
+    replay_offsets(np.zeros(1, dtype=np.int64), speed)   # 提前检查倍速
+
+    instrument = get_test_instrument(symbol)
+    venue = str(instrument.id.venue)
+    first = read_quotes(data_path, start, end, symbol=symbol).iloc[0]
+    strategy_configs = prepare_replay_strategies(
+        strategy_configs, instrument, float(first["bid_price"] + first["ask_price"]) / 2
+    )
+
+    node_config = TradingNodeConfig(
+        trader_id="REPLAY-001",
+        logging=LoggingConfig(log_level="WARNING"),
+        exec_engine=LiveExecEngineConfig(reconciliation=False),
+        data_clients={
+            REPLAY: ReplayDataClientConfig(
+                data_path=data_path, symbol=symbol, speed=speed, start=start, end=end
+            ),
+        },
+    )
+
+    node = TradingNode(config=node_config, loop=asyncio.get_running_loop())
+    node.add_data_client_factory(REPLAY, ReplayLiveDataClientFactory)
+    node.build()
+    node.kernel.cache.add_instrument(instrument)   # 模拟撮合引擎连接时从缓存加载交易工具
+
+    # 执行客户端直接注册（节点构建器只认 Sandbox 自带的工厂）
+    exec_client = ReplayExecutionClient(
+        loop=node.kernel.loop,
+        portfolio=node.portfolio,
+        msgbus=node.kernel.msgbus,
+        cache=node.kernel.cache,
+        clock=node.kernel.clock,
+        config=SandboxExecutionClientConfig(
+            venue=venue,
+            starting_balances=[f"{starting_balance} {instrument.quote_currency}"],
+            oms_type="NETTING",
+            account_type="MARGIN",
+        ),
+    )
+    node.kernel.exec_engine.register_client(exec_client)
+    strategies = [GridStrategy(config) for config in strategy_configs]
+    node.trader.add_strategies(strategies)
+
+    finished = asyncio.Event()
+    result = {}
+
+    def on_finished(summary: dict):
+        result.update(summary)
+        finished.set()
+
+    node.kernel.msgbus.subscribe(topic="events.replay.*", handler=on_finished)
+
+    run_task = asyncio.create_task(node.run_async())
+    done, _ = await asyncio.wait(
+        [run_task, asyncio.create_task(finished.wait())], return_when=asyncio.FIRST_COMPLETED
+    )
+    if run_task in done:
+        run_task.result()   # 节点提前退出时抛出原始异常
+
+    now_ns = node.kernel.clock.timestamp_ns()
+    latency = strategies[0].latency.summary(now_ns, lifetime=True)
+    conflator = strategies[0].conflator
+    await node.stop_async()
+    await asyncio.gather(run_task, return_exceptions=True)
+    node.kernel.dispose()   # node.dispose() 会停止事件循环，在协程内只释放内核
+
+    result["order_latency_ns"] = latency
+    result["conflation"] = conflator.summary() if conflator else None
+    result["orders"] = len(node.kernel.cache.orders())
+    result["fills"] = sum(len(order.trade_ids) for order in node.kernel.cache.orders())
+    return result
+
+
+def print_replay_summary(result: dict):
+    """输出回放压测结果"""
+    lag = result["lag_ns"]
+    print(f"\n{'='*60}")
+    print("回放压测结果")
+    print(f"{'='*60}")
+    print(f"报价: {result['published']:,} 条, 用时 {result['wall_secs']:.2f} 秒, "
+          f"{result['quotes_per_sec']:,.0f} 条/秒")
+    print(f"批次: {result['bursts']:,}, 最大批次 {result['max_burst']}")
+    print(f"调度落后 (ms): p50={lag['p50'] / 1e6:.2f} p99={lag['p99'] / 1e6:.2f} max={lag['max'] / 1e6:.2f}")
+    if result.get("conflation"):
+        conflation = result["conflation"]
+        print(f"报价合并: 收到 {conflation['received']:,}, 丢弃 {conflation['dropped']:,}, "
+              f"合并批次 {conflation['flushes']:,}")
+    print(f"订单: {result['orders']}, 成交: {result['fills']}")
+    print("下单延迟 (us):")
+    for stage, stats in result["order_latency_ns"].items():
+        if stats["count"]:
+            print(f"  {stage}: n={stats['count']} p50={stats['p50'] / 1000:.1f} "
+                  f"p99={stats['p99'] / 1000:.1f} max={stats['max'] / 1000:.1f}")
@@ -2,52 +2,121 @@
 """
 网格交易策略运行脚本
 Grid Trading Strategy Runner
+
+--config 运行单个策略；--config-dir 把目录下所有YAML配置的策略放进同一个交易节点，
+共用一组行情连接（同一品种只订阅一次）和一个执行客户端。
+
+Nautilus 和 Bybit 适配器在用到时才导入，--help 和参数错误立即返回；
+解析并校验过的YAML配置缓存在 data/cache。
+
+--replay 在本地回放交易所上运行同一个交易节点（离线压测，见 src/live/replay.py）。
 """
 
 import os
 import sys
 import asyncio
-import yaml
+from contextlib import nullcontext
 from pathlib import Path
 from datetime import datetime
+from typing import TYPE_CHECKING, List
 from dotenv import load_dotenv
 
 # 添加项目路径
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from nautilus_trader.config import TradingNodeConfig
-from nautilus_trader.live.node import TradingNode
-from nautilus_trader.adapters.bybit.common.enums import BybitProductType
+from src.utils.config_cache import load_yaml_config
 
-from src.strategies.grid import GridStrategy, GridStrategyConfig
+if TYPE_CHECKING:
+    from nautilus_trader.config import LoggingConfig, TradingNodeConfig
+    from src.strategies.grid import GridStrategyConfig
 
 
 # 加载环境变量
 load_dotenv()
 
 
+# 策略配置中必须存在的字段（章节 -> 字段）
+REQUIRED_FIELDS = {
+    'strategy': ['name'],
+    'trading': ['instrument_id'],
+    'grid': ['levels', 'spacing_type', 'spacing'],
+    'price_range': ['upper_price', 'lower_price', 'range_ratio'],
+    'capital': ['total_amount', 'base_currency_ratio'],
+    'order': [],
+    'risk': ['max_positions', 'stop_loss_ratio', 'take_profit_ratio'],
+}
+
+
+def validate_strategy_config(yaml_config: dict):
+    """检查策略配置的必需字段，缺失时抛出 ValueError"""
+    if not isinstance(yaml_config, dict):
+        raise ValueError("配置文件内容不是有效的YAML映射")
+    missing = []
+    for section, fields in REQUIRED_FIELDS.items():
+        if not isinstance(yaml_config.get(section), dict):
+            missing.append(section)
+            continue
+        missing.extend(f"{section}.{name}" for name in fields if name not in yaml_config[section])
+    if missing:
+        raise ValueError(f"配置缺少字段: {', '.join(missing)}")
+
+
 def load_strategy_config(config_path: str) -> dict:
-    """加载策略配置文件"""
-    with open(config_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    """加载策略配置文件（解析和校验结果会被缓存）"""
+    try:
+        return load_yaml_config(config_path, validate=validate_strategy_config)
+    except ValueError as e:
+        raise ValueError(f"{config_path}: {e}") from e
+
 
+def load_strategy_configs(config_dir: str) -> List[dict]:
+    """加载目录下的所有策略配置文件（按文件名排序）"""
+    paths = sorted(Path(config_dir).glob("*.yaml")) + sorted(Path(config_dir).glob("*.yml"))
+    return [load_strategy_config(str(path)) for path in paths]
 
-def create_grid_strategy_config(yaml_config: dict) -> GridStrategyConfig:
-    """从YAML配置创建策略配置对象"""
+
+def create_grid_strategy_config(yaml_config: dict, order_id_tag: str = None) -> "GridStrategyConfig":
+    """
+    从YAML配置创建策略配置对象
+
+    同一节点运行多个网格策略时，每个策略需要不同的 order_id_tag（策略ID和订单ID中的标识），
+    YAML中 strategy.order_id_tag 优先，否则使用传入值。
+    """
+    from src.strategies.grid import GridStrategyConfig
+    from src.monitoring.event_log import parse_size
+    
     trading = yaml_config['trading']
     grid = yaml_config['grid']
     price_range = yaml_config['price_range']
     capital = yaml_config['capital']
     order = yaml_config['order']
     risk = yaml_config['risk']
+    execution = yaml_config.get('execution', {})
+    monitoring = yaml_config.get('monitoring', {})
+    market_data = yaml_config.get('market_data', {})
+    logging = yaml_config.get('logging', {})
+    conditions = yaml_config.get('market_conditions', {})
     
     return GridStrategyConfig(
         instrument_id=trading['instrument_id'],
+        order_id_tag=str(yaml_config['strategy'].get('order_id_tag', order_id_tag or '000')),
+        
+        # 行情订阅
+        subscribe_trades=market_data.get('subscribe_trades', False),
+        quote_conflation=market_data.get('quote_conflation', False),
+        conflation_max_age_ms=market_data.get('conflation_max_age_ms', 1.0),
         
         # 网格参数
         grid_levels=grid['levels'],
         grid_spacing_type=grid['spacing_type'],
         grid_spacing=grid['spacing'],
+        adaptive_spacing=grid.get('adaptive', False),
+        spacing_vol_multiplier=grid.get('vol_multiplier', 1.0),
+        spacing_horizon_secs=grid.get('vol_horizon_secs', 3600),
+        spacing_halflife_secs=grid.get('vol_halflife_secs', 3600),
+        spacing_update_threshold=grid.get('update_threshold', 0.25),
+        min_grid_spacing=grid.get('min_spacing', 0.001),
+        max_grid_spacing=grid.get('max_spacing', 0.05),
         
         # 价格范围
         upper_price=price_range['upper_price'],
@@ -62,14 +131,98 @@ def create_grid_strategy_config(yaml_config: dict) -> GridStrategyConfig:
         max_positions=risk['max_positions'],
         stop_loss_ratio=risk['stop_loss_ratio'],
         take_profit_ratio=risk['take_profit_ratio'],
+        max_drawdown=risk.get('max_drawdown'),
+        max_position_value=risk.get('max_position_value'),
+        max_total_value=risk.get('max_total_value'),
+        reserve_ratio=capital.get('reserve_ratio', 0.0),
+        
+        # 执行参数
+        min_profit_ratio=execution.get('min_profit_ratio'),
+        submit_rate_limit=execution.get('submit_rate_limit'),
+        cancel_rate_limit=execution.get('cancel_rate_limit'),
+        rate_limit_burst=execution.get('rate_limit_burst', 10),
+        reconcile_interval=execution.get('reconcile_interval'),
+        
+        # 市场条件
+        max_volatility=conditions.get('max_volatility'),
+        min_volume=conditions.get('min_volume'),
+        trend_threshold=conditions.get('trend_threshold'),
+        volatility_spike=conditions.get('volatility_spike'),
+        condition_window_secs=conditions.get('window_secs', 86400),
+        trend_window_secs=conditions.get('trend_window_secs', 14400),
+        spike_halflife_secs=conditions.get('spike_halflife_secs', 3600),
+        condition_sample_secs=conditions.get('sample_secs', 60),
+        
+        # 监控
+        enable_profiling=monitoring.get('profile_callbacks', False),
+        latency_telemetry=monitoring.get('latency_telemetry', False),
+        latency_export_interval=monitoring.get('latency_export_interval', 15),
+        latency_export_dir=monitoring.get('latency_export_dir', 'logs/live'),
+        enable_metrics=monitoring.get('enable_metrics', False),
+        metrics_flush_interval=monitoring.get('metrics_flush_interval', 10.0),
+        metrics_dir=monitoring.get('metrics_dir', 'logs/live'),
+        
+        # 结构化事件日志（与节点日志使用相同的轮转设置）
+        event_log=logging.get('event_log', False),
+        event_log_dir=logging.get('event_log_dir', 'logs/live'),
+        event_log_max_bytes=parse_size(logging.get('max_size', '100MB')),
+        event_log_backup_count=logging.get('backup_count', 5),
+        event_log_sample=logging.get('event_sample'),
+    )
+
+
+def create_grid_strategy_configs(yaml_configs: List[dict]) -> List["GridStrategyConfig"]:
+    """
+    从多个YAML配置创建策略配置
+
+    同一品种只能由一个网格策略交易（持仓和风控状态按品种独占）；
+    order_id_tag 按配置顺序编号，保证策略ID唯一。
+    """
+    strategy_configs = [
+        create_grid_strategy_config(yaml_config, order_id_tag=f"{i:03d}")
+        for i, yaml_config in enumerate(yaml_configs)
+    ]
+
+    seen = {}
+    for strategy_config in strategy_configs:
+        if strategy_config.instrument_id in seen:
+            raise ValueError(f"多个策略配置使用同一交易对: {strategy_config.instrument_id}")
+        if strategy_config.order_id_tag in seen.values():
+            raise ValueError(f"策略 order_id_tag 重复: {strategy_config.order_id_tag}")
+        seen[strategy_config.instrument_id] = strategy_config.order_id_tag
+    return strategy_configs
+
+
+def create_logging_config(logging: dict = None) -> "LoggingConfig":
+    """
+    按YAML的 logging 设置创建节点日志配置
+
+    文件日志由 Nautilus 日志线程缓冲写出，超过 max_size 后轮转，保留 backup_count 个文件。
+    """
+    from nautilus_trader.config import LoggingConfig
+    from src.monitoring.event_log import parse_size
+    
+    logging = logging or {}
+    level = str(logging.get('level', 'INFO')).upper()
+    log_file = Path(logging.get('file') or f"logs/grid_{datetime.now().strftime('%Y%m%d')}.log")
+    return LoggingConfig(
+        log_level=level,
+        log_level_file=level,
+        log_directory=str(log_file.parent),
+        log_file_name=log_file.stem,
+        log_file_max_size=parse_size(logging.get('max_size', '100MB')),
+        log_file_max_backup_count=logging.get('backup_count', 5),
     )
 
 
 def create_trading_node_config(
-    strategy_config: GridStrategyConfig,
-    testnet: bool = True
-) -> TradingNodeConfig:
-    """创建交易节点配置"""
+    strategy_configs: List["GridStrategyConfig"],
+    testnet: bool = True,
+    logging: dict = None,
+) -> "TradingNodeConfig":
+    """创建交易节点配置（所有策略共用同一组数据客户端和执行客户端）"""
+    from nautilus_trader.config import TradingNodeConfig
+    from nautilus_trader.adapters.bybit.common.enums import BybitProductType
     
     # 获取API密钥
     if testnet:
@@ -82,21 +235,17 @@ def create_trading_node_config(
     if not api_key or not api_secret:
         raise ValueError("请设置 Bybit API 密钥环境变量")
         
-    # 确定产品类型
+    # 确定产品类型（所有策略交易对的并集）
     product_types = []
-    if "LINEAR" in strategy_config.instrument_id:
+    if any("LINEAR" in c.instrument_id for c in strategy_configs):
         product_types.append(BybitProductType.LINEAR)
-    if "SPOT" in strategy_config.instrument_id:
+    if any("SPOT" in c.instrument_id for c in strategy_configs):
         product_types.append(BybitProductType.SPOT)
         
     return TradingNodeConfig(
         trader_id=f"GRID-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
         
-        logging={
-            "log_level": "INFO",
-            "log_to_file": True,
-            "log_file_path": f"logs/grid_{datetime.now().strftime('%Y%m%d')}.log",
-        },
+        logging=create_logging_config(logging),
         
         data_clients={
             "BYBIT": {
@@ -116,40 +265,76 @@ def create_trading_node_config(
             },
         },
         
-        strategies=[strategy_config],
+        strategies=list(strategy_configs),
     )
 
 
-async def run_grid_strategy(config_path: str, testnet: bool = True):
-    """运行网格策略"""
+async def run_grid_strategy(
+    config_path: str = None,
+    testnet: bool = True,
+    config_dir: str = None,
+    profile_startup: bool = False,
+):
+    """运行网格策略（config_dir 不为空时在同一节点运行目录下的所有策略）"""
     print(f"\n{'='*60}")
     print(f"网格交易策略启动器")
     print(f"{'='*60}")
-    print(f"配置文件: {config_path}")
+    print(f"配置{'目录' if config_dir else '文件'}: {config_dir or config_path}")
     print(f"使用{'测试网' if testnet else '主网'}")
     print(f"启动时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*60}\n")
     
     # 加载配置
-    yaml_config = load_strategy_config(config_path)
-    strategy_name = yaml_config['strategy']['name']
-    
-    print(f"策略名称: {strategy_name}")
-    print(f"交易对: {yaml_config['trading']['instrument_id']}")
-    print(f"网格数量: {yaml_config['grid']['levels']}")
-    print(f"投资金额: {yaml_config['capital']['total_amount']} USDT")
+    try:
+        yaml_configs = load_strategy_configs(config_dir) if config_dir else [load_strategy_config(config_path)]
+    except ValueError as e:
+        print(f"错误: {e}")
+        return
+    if not yaml_configs:
+        print(f"错误: 配置目录中没有策略配置文件: {config_dir}")
+        return
     
-    # 创建策略配置
-    strategy_config = create_grid_strategy_config(yaml_config)
+    for yaml_config in yaml_configs:
+        print(f"策略名称: {yaml_config['strategy']['name']}")
+        print(f"  交易对: {yaml_config['trading']['instrument_id']}")
+        print(f"  网格数量: {yaml_config['grid']['levels']}")
+        print(f"  投资金额: {yaml_config['capital']['total_amount']} USDT")
     
-    # 创建交易节点配置
-    node_config = create_trading_node_config(strategy_config, testnet)
+    # 创建策略和交易节点配置（Nautilus、Bybit适配器和策略模块在这里首次导入）
+    profiler = None
+    if profile_startup:
+        from src.monitoring.profiling import ImportProfiler
+        profiler = ImportProfiler()
+    with profiler or nullcontext():
+        try:
+            strategy_configs = create_grid_strategy_configs(yaml_configs)
+        except ValueError as e:
+            print(f"错误: {e}")
+            return
+        # 节点日志设置取第一个策略配置的 logging
+        node_config = create_trading_node_config(strategy_configs, testnet, yaml_configs[0].get('logging'))
+        from nautilus_trader.live.node import TradingNode
+    if profiler:
+        profiler.print_summary()
     
     # 创建并运行交易节点
+    dispatcher = None
     try:
         print("\n正在初始化交易节点...")
         node = TradingNode(config=node_config)
         
+        # 通知（节点级设置取第一个策略配置的 notifications，发送不阻塞事件循环）
+        from src.monitoring.notifications import (
+            STRATEGY_START, create_notification_dispatcher, subscribe_node_events,
+        )
+        notifications = yaml_configs[0].get('notifications') or {}
+        dispatcher = create_notification_dispatcher(notifications)
+        if dispatcher:
+            dispatcher.start()
+            subscribe_node_events(dispatcher, node.kernel.msgbus, notifications.get('large_profit'))
+            for strategy_config in strategy_configs:
+                dispatcher.notify(STRATEGY_START, f"网格策略启动: {strategy_config.instrument_id}")
+        
         print("连接到交易所...")
         print("\n策略开始运行，按 Ctrl+C 停止\n")
         
@@ -163,9 +348,44 @@ async def run_grid_strategy(config_path: str, testnet: bool = True):
         import traceback
         traceback.print_exc()
     finally:
+        if dispatcher:
+            from src.monitoring.notifications import STRATEGY_STOP
+            for strategy_config in strategy_configs:
+                dispatcher.notify(STRATEGY_STOP, f"网格策略停止: {strategy_config.instrument_id}")
+            await dispatcher.stop()
+            print(f"通知统计: {dispatcher.summary()}")
         print("\n策略已停止")
 
 
+async def run_replay(
+    config_path: str,
+    data_path: str,
+    speed: float = 1.0,
+    symbol: str = "BTCUSDT",
+    start: str = None,
+    end: str = None,
+):
+    """在本地回放交易所上运行网格策略（不连接交易所，不需要API密钥）"""
+    from src.live.replay import run_replay_node, print_replay_summary
+    
+    print(f"\n{'='*60}")
+    print(f"网格策略本地回放压测")
+    print(f"{'='*60}")
+    print(f"配置文件: {config_path}")
+    print(f"回放数据: {data_path} ({symbol}, {speed:g}x)")
+    print(f"{'='*60}\n")
+    
+    try:
+        strategy_configs = create_grid_strategy_configs([load_strategy_config(config_path)])
+        result = await run_replay_node(
+            strategy_configs, data_path, speed=speed, symbol=symbol, start=start, end=end
+        )
+    except ValueError as e:
+        print(f"错误: {e}")
+        return
+    print_replay_summary(result)
+
+
 def main():
     """主函数"""
     import argparse
@@ -177,6 +397,12 @@ def main():
         default="config/strategies/grid_btcusdt.yaml",
         help="策略配置文件路径"
     )
+    parser.add_argument(
+        "--config-dir",
+        type=str,
+        default=None,
+        help="策略配置目录（目录下所有YAML配置的策略在同一交易节点中运行）"
+    )
     parser.add_argument(
         "--testnet",
         action="store_true",
@@ -188,9 +414,52 @@ def main():
         action="store_true",
         help="使用主网（谨慎使用）"
     )
+    parser.add_argument(
+        "--replay",
+        type=str,
+        nargs="?",
+        const="nautilus_data/BTCUSDT_quotes.parquet",
+        default=None,
+        help="在本地回放交易所上运行（可指定报价文件，默认 nautilus_data/BTCUSDT_quotes.parquet）"
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="回放倍速（1-1000，仅用于 --replay）"
+    )
+    parser.add_argument(
+        "--replay-symbol",
+        type=str.upper,
+        default="BTCUSDT",
+        help="回放数据的品种代码（仅用于 --replay）"
+    )
+    parser.add_argument(
+        "--start",
+        type=str,
+        help="回放开始时间，如 2025-07-15T00:00（仅用于 --replay）"
+    )
+    parser.add_argument(
+        "--end",
+        type=str,
+        help="回放结束时间（仅用于 --replay）"
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="输出启动阶段的模块导入耗时分解"
+    )
     
     args = parser.parse_args()
     
+    if args.replay:
+        if not 1 <= args.speed <= 1000:
+            parser.error("--speed 必须在 1-1000 之间")
+        asyncio.run(run_replay(
+            args.config, args.replay, args.speed, args.replay_symbol, args.start, args.end
+        ))
+        return
+    
     # 确定使用测试网还是主网
     use_testnet = not args.mainnet
     
@@ -202,7 +471,11 @@ def main():
             return
             
     # 检查配置文件
-    if not os.path.exists(args.config):
+    if args.config_dir:
+        if not os.path.isdir(args.config_dir):
+            print(f"错误: 配置目录不存在: {args.config_dir}")
+            return
+    elif not os.path.exists(args.config):
         print(f"错误: 配置文件不存在: {args.config}")
         return
         
@@ -210,7 +483,12 @@ def main():
     os.makedirs("logs", exist_ok=True)
     
     # 运行策略
-    asyncio.run(run_grid_strategy(args.config, use_testnet))
+    asyncio.run(run_grid_strategy(
+        args.config,
+        use_testnet,
+        config_dir=args.config_dir,
+        profile_startup=args.profile_startup,
+    ))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+结构化事件日志
+Structured, size-rotated event log for strategy hot paths
+
+- emit() 只做一次字典查找和一次 deque 追加（事件类型、时间戳和原始字段值的元组），不做任何格式化
+- 后台线程定期取出事件，按事件类型的字段表组装为 JSON Lines 批量写出
+- 文件超过 max_bytes 时轮转（path.1 ... path.N，与 logging.handlers.RotatingFileHandler 的命名一致）
+- 可按事件类型抽样（每N条记录1条），高频成交时日志开销可控
+"""
+
+import os
+import re
+import json
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Sequence, Tuple, Union
+
+
+# 各事件类型的字段名（emit 时按顺序传入字段值）
+GRID_EVENT_SCHEMAS: Dict[str, Tuple[str, ...]] = {
+    "order": ("client_order_id", "side", "quantity", "price"),
+    "fill": ("client_order_id", "side", "quantity", "price"),
+    "near_boundary": ("price", "lower", "upper"),
+}
+
+_SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(value: Union[int, str]) -> int:
+    """解析 "100MB" / "512KB" / 1048576 形式的文件大小"""
+    if isinstance(value, int):
+        return value
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*", str(value).upper())
+    if not match:
+        raise ValueError(f"无法解析文件大小: {value}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+class EventLog:
+    """
+    结构化事件日志
+
+    用法（策略内）:
+        events = EventLog("logs/live/BTCUSDT_events.jsonl", GRID_EVENT_SCHEMAS, sample={"fill": 10})
+        events.start()
+        events.emit("fill", ts_ns, client_order_id, side_name, quantity, price)
+        events.stop()                  # 写出剩余事件并关闭文件
+    """
+
+    def __init__(
+        self,
+        path: str,
+        schemas: Dict[str, Sequence[str]] = GRID_EVENT_SCHEMAS,
+        max_bytes: int = 100 * 1024 ** 2,
+        backup_count: int = 5,
+        sample: Optional[Dict[str, int]] = None,
+        max_queue: int = 100_000,
+        flush_interval: float = 0.5,
+    ):
+        self.path = Path(path)
+        self.schemas = {event: tuple(fields) for event, fields in schemas.items()}
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.sample = {event: rate for event, rate in (sample or {}).items() if rate > 1}
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+
+        self._queue: Deque[tuple] = deque()
+        self._seen: Dict[str, int] = {}
+        self._file = None
+        self._size = 0
+        self._lock = threading.Lock()      # flush 可能同时在后台线程和 stop() 中调用
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计
+        self.written = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.rotations = 0
+
+    def emit(self, event: str, ts_ns: int, *values):
+        """记录一个事件（只入队，不格式化）"""
+        rate = self.sample.get(event)
+        if rate:
+            seen = self._seen[event] = self._seen.get(event, 0) + 1
+            if (seen - 1) % rate:
+                self.sampled_out += 1
+                return
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.append((event, ts_ns, values))
+
+    def start(self):
+        """打开文件并启动后台写出线程"""
+        if self._thread is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """格式化并写出队列中的事件"""
+        with self._lock:
+            if self._file is None:
+                return
+            lines = []
+            while True:
+                try:
+                    event, ts_ns, values = self._queue.popleft()
+                except IndexError:
+                    break
+                record = {"ts": ts_ns, "event": event}
+                record.update(zip(self.schemas.get(event, ()), values))
+                lines.append(json.dumps(record, ensure_ascii=False, default=str))
+            if not lines:
+                return
+            try:
+                self._write(("\n".join(lines) + "\n").encode())
+                self.written += len(lines)
+            except OSError:
+                # 写出失败不能影响交易，丢弃这一批
+                self.dropped += len(lines)
+
+    def _write(self, data: bytes):
+        if self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def _rotate(self):
+        """path -> path.1 -> ... -> path.N（超出 backup_count 的最旧文件删除）"""
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = self.path.with_name(f"{self.path.name}.{i}")
+                if source.exists():
+                    os.replace(source, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        self._file = open(self.path, "wb")
+        self._size = 0
+        self.rotations += 1
+
+    def stop(self):
+        """停止后台线程，写出剩余事件并关闭文件"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=self.flush_interval + 1)
+        self._thread = None
+        self.flush()
+        with self._lock:
+            self._file.close()
+            self._file = None
+
+    def summary(self) -> dict:
+        return {
+            "written": self.written,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "rotations": self.rotations,
+        }
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+实盘行情到下单的延迟遥测
+Live tick-to-order latency telemetry
+
+对每个订单记录触发它的行情/成交事件的时间链路:
+- ts_event: 交易所事件时间
+- ts_init: 本地收到事件的时间
+- handle: 策略开始处理事件的时间
+- submit: 订单提交的时间
+- ack: 收到交易所确认（OrderAccepted）的时间
+
+相邻时间点的差值按阶段写入滚动窗口直方图和全程累计直方图（均为固定内存），
+并定期以 Prometheus 文本格式导出到 logs/live，供本地采集器读取:
+分位数取自滚动窗口，_sum/_count 按 Prometheus summary 的约定为全程累计值。
+"""
+
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from src.monitoring.profiling import LatencyHistogram
+
+
+# 阶段名称 -> (起点, 终点)
+STAGES = {
+    "feed": ("ts_event", "ts_init"),          # 交易所 -> 本地
+    "queue": ("ts_init", "handle"),           # 本地接收 -> 策略处理
+    "decision": ("handle", "submit"),         # 策略处理 -> 提交订单
+    "ack": ("submit", "ack"),                 # 提交订单 -> 交易所确认
+    "tick_to_submit": ("ts_init", "submit"),  # 本地接收 -> 提交订单
+    "tick_to_ack": ("ts_init", "ack"),        # 本地接收 -> 交易所确认
+}
+
+EXPORT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+DEFAULT_EXPORT_DIR = "logs/live"
+
+
+class RollingHistogram:
+    """
+    滚动窗口直方图
+
+    窗口按时间分为若干槽，每个槽是一个固定内存的 LatencyHistogram，
+    过期的槽被清空复用，内存占用与记录次数无关。
+    """
+
+    def __init__(self, window_secs: int = 60, slots: int = 6, significant_bits: int = 7):
+        self.significant_bits = significant_bits
+        self.slot_ns = max(1, window_secs * 1_000_000_000 // slots)
+        self.slots = [LatencyHistogram(significant_bits=significant_bits) for _ in range(slots)]
+        self.epochs = [-1] * slots  # 每个槽当前对应的时间段编号
+
+    def _slot(self, now_ns: int) -> LatencyHistogram:
+        """当前时间对应的槽（必要时清空过期数据）"""
+        epoch = now_ns // self.slot_ns
+        index = epoch % len(self.slots)
+        if self.epochs[index] != epoch:
+            self.slots[index].reset()
+            self.epochs[index] = epoch
+        return self.slots[index]
+
+    def record(self, value_ns: int, now_ns: int):
+        """记录一个延迟值"""
+        self._slot(now_ns).record(value_ns)
+
+    def snapshot(self, now_ns: int) -> LatencyHistogram:
+        """合并窗口内所有槽，返回新的直方图"""
+        current = now_ns // self.slot_ns
+        merged = LatencyHistogram(significant_bits=self.significant_bits)
+        for epoch, hist in zip(self.epochs, self.slots):
+            if 0 <= current - epoch < len(self.slots):
+                merged.merge(hist)
+        return merged
+
+
+class OrderLatencyTracker:
+    """
+    订单延迟追踪器
+
+    用法（策略内）:
+        tracker.on_event(event.ts_event, event.ts_init, clock.timestamp_ns())  # 回调入口
+        tracker.on_submit(order.client_order_id.value, clock.timestamp_ns())   # 提交订单前
+        tracker.on_ack(event.client_order_id.value, clock.timestamp_ns())      # OrderAccepted
+    """
+
+    def __init__(
+        self,
+        window_secs: int = 60,
+        slots: int = 6,
+        max_pending: int = 10_000,
+    ):
+        self.histograms: Dict[str, RollingHistogram] = {
+            stage: RollingHistogram(window_secs, slots) for stage in STAGES
+        }
+        # 全程累计（_sum/_count 和停止时的汇总）
+        self.lifetime: Dict[str, LatencyHistogram] = {
+            stage: LatencyHistogram() for stage in STAGES
+        }
+        self.max_pending = max_pending
+
+        # 当前正在处理的事件 (ts_event, ts_init, handle)
+        self._trigger: Optional[Tuple[int, int, int]] = None
+        # 已提交、等待确认的订单 -> 时间链路
+        self._pending: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+        self.acked_total = 0
+        self.dropped_total = 0  # 超出 max_pending 被丢弃的记录
+
+    def on_event(self, ts_event: int, ts_init: int, handle_ns: int):
+        """记录触发下单的行情或成交事件"""
+        self._trigger = (ts_event, ts_init, handle_ns)
+
+    def on_submit(self, client_order_id: str, submit_ns: int):
+        """记录订单提交"""
+        if self._trigger is None:
+            ts_event = ts_init = handle = submit_ns
+        else:
+            ts_event, ts_init, handle = self._trigger
+
+        self._pending[client_order_id] = {
+            "ts_event": ts_event,
+            "ts_init": ts_init,
+            "handle": handle,
+            "submit": submit_ns,
+        }
+        if len(self._pending) > self.max_pending:
+            self._pending.popitem(last=False)
+            self.dropped_total += 1
+
+    def on_ack(self, client_order_id: str, ack_ns: int):
+        """记录交易所确认，并把各阶段延迟写入直方图"""
+        stamps = self._pending.pop(client_order_id, None)
+        if stamps is None:
+            return
+
+        stamps["ack"] = ack_ns
+        for stage, (begin, end) in STAGES.items():
+            value = stamps[end] - stamps[begin]
+            self.histograms[stage].record(value, ack_ns)
+            self.lifetime[stage].record(value)
+        self.acked_total += 1
+
+    def discard(self, client_order_id: str):
+        """订单被拒绝或拒收时移除记录"""
+        self._pending.pop(client_order_id, None)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def summary(self, now_ns: int, lifetime: bool = False) -> Dict[str, dict]:
+        """各阶段在滚动窗口内（lifetime=True 时为全程）的统计（纳秒）"""
+        if lifetime:
+            return {stage: hist.summary() for stage, hist in self.lifetime.items()}
+        return {
+            stage: hist.snapshot(now_ns).summary()
+            for stage, hist in self.histograms.items()
+        }
+
+    def to_prometheus(
+        self,
+        now_ns: int,
+        labels: Optional[Dict[str, str]] = None,
+        lifetime: bool = False,
+    ) -> str:
+        """
+        生成 Prometheus 文本格式（单位: 秒）
+
+        分位数默认取自滚动窗口，lifetime=True 时取自全程（如停止时的最终导出）；
+        _sum/_count 始终为全程累计值，保证计数器单调递增。
+        """
+        base = ",".join(f'{key}="{value}"' for key, value in (labels or {}).items())
+        prefix = f"{base}," if base else ""
+        scalar = f"{{{base}}}" if base else ""
+
+        scope = "lifetime" if lifetime else "rolling window"
+        lines = [
+            f"# HELP grid_order_latency_seconds Tick-to-order latency by stage (quantiles over {scope}).",
+            "# TYPE grid_order_latency_seconds summary",
+        ]
+        for stage, hist in self.histograms.items():
+            total = self.lifetime[stage]
+            quantiles = total if lifetime else hist.snapshot(now_ns)
+            stage_labels = f'{prefix}stage="{stage}"'
+            for q in EXPORT_QUANTILES:
+                value = quantiles.percentile(q * 100) / 1e9
+                lines.append(f'grid_order_latency_seconds{{{stage_labels},quantile="{q:g}"}} {value:.9f}')
+            lines.append(f"grid_order_latency_seconds_sum{{{stage_labels}}} {total.total_sum / 1e9:.9f}")
+            lines.append(f"grid_order_latency_seconds_count{{{stage_labels}}} {total.total_count}")
+
+        lines += [
+            "# HELP grid_order_latency_pending Orders submitted and awaiting acknowledgement.",
+            "# TYPE grid_order_latency_pending gauge",
+            f"grid_order_latency_pending{scalar} {self.pending_count}",
+            "# HELP grid_order_latency_acked_total Orders with a complete latency record.",
+            "# TYPE grid_order_latency_acked_total counter",
+            f"grid_order_latency_acked_total{scalar} {self.acked_total}",
+            "# HELP grid_order_latency_dropped_total Pending records dropped to bound memory.",
+            "# TYPE grid_order_latency_dropped_total counter",
+            f"grid_order_latency_dropped_total{scalar} {self.dropped_total}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def export(
+        self,
+        path: str,
+        now_ns: int,
+        labels: Optional[Dict[str, str]] = None,
+        lifetime: bool = False,
+    ):
+        """原子写入 Prometheus 文本文件（采集器不会读到写了一半的文件）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus(now_ns, labels, lifetime))
+        os.replace(tmp_path, path)
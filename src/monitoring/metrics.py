@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+进程内指标注册表
+In-process metrics registry
+
+- Counter: 单调递增计数
+- Gauge: 可增可减的当前值
+- RollingRate: 滚动窗口速率（预分配的环形计数数组，按秒分桶）
+
+热路径上的操作只有几次属性读写；快照由后台线程定期写出，
+不会阻塞 TradingNode 的事件循环。
+"""
+
+import json
+import time
+import threading
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+
+class Counter:
+    """单调递增计数器"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Gauge:
+    """可增可减的当前值"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+
+class RollingRate:
+    """
+    滚动窗口速率
+
+    环形数组的每个元素对应一秒，记录时只更新当前秒的计数，
+    跨秒时清零被复用的桶，内存大小固定为窗口秒数。
+    """
+
+    __slots__ = ("window", "counts", "seconds")
+
+    def __init__(self, window_secs: int = 60):
+        self.window = window_secs
+        self.counts = array("q", bytes(8 * window_secs))
+        self.seconds = array("q", [-1] * window_secs)  # 每个桶对应的秒
+
+    def mark(self, now_ns: int, count: int = 1):
+        """记录 count 次事件"""
+        second = now_ns // 1_000_000_000
+        index = second % self.window
+        if self.seconds[index] != second:
+            self.seconds[index] = second
+            self.counts[index] = 0
+        self.counts[index] += count
+
+    def rate(self, now_ns: int) -> float:
+        """窗口内的平均速率（次/秒）"""
+        current = now_ns // 1_000_000_000
+        total = 0
+        for second, count in zip(self.seconds, self.counts):
+            if 0 <= current - second < self.window:
+                total += count
+        return total / self.window
+
+
+class MetricsRegistry:
+    """
+    指标注册表
+
+    用法:
+        metrics = MetricsRegistry()
+        orders = metrics.counter("orders_placed")
+        orders.inc()
+        metrics.snapshot(time.time_ns())
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, Counter] = {}
+        self.gauges: Dict[str, Gauge] = {}
+        self.rates: Dict[str, RollingRate] = {}
+
+    def counter(self, name: str) -> Counter:
+        """获取（或创建）计数器"""
+        if name not in self.counters:
+            self.counters[name] = Counter()
+        return self.counters[name]
+
+    def gauge(self, name: str) -> Gauge:
+        """获取（或创建）当前值指标"""
+        if name not in self.gauges:
+            self.gauges[name] = Gauge()
+        return self.gauges[name]
+
+    def rate(self, name: str, window_secs: int = 60) -> RollingRate:
+        """获取（或创建）滚动速率"""
+        if name not in self.rates:
+            self.rates[name] = RollingRate(window_secs)
+        return self.rates[name]
+
+    def snapshot(self, now_ns: Optional[int] = None) -> dict:
+        """当前所有指标的快照"""
+        now_ns = now_ns if now_ns is not None else time.time_ns()
+        return {
+            "ts": now_ns,
+            "counters": {name: c.value for name, c in list(self.counters.items())},
+            "gauges": {name: g.value for name, g in list(self.gauges.items())},
+            "rates": {name: r.rate(now_ns) for name, r in list(self.rates.items())},
+        }
+
+
+class MetricsFlusher:
+    """
+    后台快照写出线程
+
+    以守护线程按固定间隔把快照追加写入 JSON Lines 文件，
+    文件IO完全不在事件循环线程中进行。
+
+    clock 返回快照时间（纳秒），必须与记录 RollingRate 时使用的时钟一致
+    （回测中传入策略时钟，否则滚动速率按墙上时间计算会始终为0）。
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        path: str,
+        interval_secs: float = 10.0,
+        clock: Callable[[], int] = time.time_ns,
+    ):
+        self.registry = registry
+        self.path = Path(path)
+        self.interval = interval_secs
+        self.clock = clock
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台线程"""
+        if self._thread is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-flusher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        """立即写出一次快照"""
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.registry.snapshot(self.clock())) + "\n")
+        except OSError:
+            # 写出失败不能影响交易，下一个周期重试
+            pass
+
+    def stop(self, final_flush: bool = True):
+        """停止后台线程（可选写出最后一次快照）"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=self.interval + 1)
+        self._thread = None
+        if final_flush:
+            self.flush()
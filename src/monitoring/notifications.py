@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+异步通知分发
+Non-blocking asynchronous notification dispatcher
+
+对应策略YAML中的 notifications:
+- notify() 只把通知放入有界队列（满时丢弃并计数），策略回调中调用不会等待任何IO
+- 后台任务按 batch_window 收集一批通知，同一事件+合并键的通知合并为一条（如1秒内的多笔成交）
+- 每条消息并发发往所有通道，失败时按指数退避重试
+- 通道: 本地文件（JSON Lines）、HTTP webhook、Telegram、邮件；阻塞IO在线程池中执行
+"""
+
+import os
+import json
+import time
+import asyncio
+import smtplib
+import urllib.request
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# 通知事件类型
+STRATEGY_START = "strategy_start"
+STRATEGY_STOP = "strategy_stop"
+FILL = "fill"
+LARGE_PROFIT = "large_profit"
+STOP_LOSS_TRIGGERED = "stop_loss_triggered"
+GRID_PAUSED = "grid_paused"
+GRID_RESUMED = "grid_resumed"
+ERROR = "error"
+
+EVENT_TITLES = {
+    STRATEGY_START: "策略启动",
+    STRATEGY_STOP: "策略停止",
+    FILL: "订单成交",
+    LARGE_PROFIT: "大额盈利",
+    STOP_LOSS_TRIGGERED: "触发止损",
+    GRID_PAUSED: "网格暂停",
+    GRID_RESUMED: "网格恢复",
+    ERROR: "错误",
+}
+
+# 合并后的消息最多列出的明细条数
+MAX_MERGED_LINES = 5
+
+
+@dataclass
+class Notification:
+    """一条通知"""
+
+    event: str
+    text: str
+    key: str = ""        # 合并键（同一批次内 event 和 key 都相同的通知合并）
+    ts: float = field(default_factory=time.time)
+
+
+class FileSink:
+    """追加写入本地 JSON Lines 文件（测试与审计用）"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def _write(self, line: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def send(self, event: str, text: str):
+        line = json.dumps({"ts": time.time(), "event": event, "text": text}, ensure_ascii=False)
+        await asyncio.to_thread(self._write, line)
+
+
+class HttpSink:
+    """以JSON POST到任意 webhook（可指向本地测试服务）"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def _payload(self, event: str, text: str) -> dict:
+        return {"event": event, "text": text}
+
+    def _post(self, payload: dict):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload, ensure_ascii=False).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def send(self, event: str, text: str):
+        await asyncio.to_thread(self._post, self._payload(event, text))
+
+
+class TelegramSink(HttpSink):
+    """Telegram 机器人消息（令牌从环境变量读取，不写入配置文件）"""
+
+    def __init__(self, token: str, chat_id: str, timeout: float = 5.0):
+        super().__init__(f"https://api.telegram.org/bot{token}/sendMessage", timeout)
+        self.chat_id = chat_id
+
+    def _payload(self, event: str, text: str) -> dict:
+        return {"chat_id": self.chat_id, "text": f"[{EVENT_TITLES.get(event, event)}] {text}"}
+
+
+class EmailSink:
+    """SMTP 邮件"""
+
+    def __init__(self, address: str, host: str, port: int = 587, user: str = None, password: str = None):
+        self.address = address
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+
+    def _send(self, subject: str, text: str):
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = self.user or self.address
+        message["To"] = self.address
+        message.set_content(text)
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            if self.user:
+                smtp.starttls()
+                smtp.login(self.user, self.password)
+            smtp.send_message(message)
+
+    async def send(self, event: str, text: str):
+        await asyncio.to_thread(self._send, f"[网格策略] {EVENT_TITLES.get(event, event)}", text)
+
+
+def merge_notifications(batch: List[Notification]) -> List[Tuple[str, str]]:
+    """按 (event, key) 合并一批通知，保持首次出现的顺序，返回 [(event, text)]"""
+    groups: Dict[Tuple[str, str], List[Notification]] = {}
+    for notification in batch:
+        groups.setdefault((notification.event, notification.key), []).append(notification)
+
+    messages = []
+    for (event, _), items in groups.items():
+        if len(items) == 1:
+            messages.append((event, items[0].text))
+            continue
+        lines = [item.text for item in items[:MAX_MERGED_LINES]]
+        if len(items) > MAX_MERGED_LINES:
+            lines.append(f"... 共 {len(items)} 条")
+        messages.append((event, f"{EVENT_TITLES.get(event, event)} x{len(items)}\n" + "\n".join(lines)))
+    return messages
+
+
+class NotificationDispatcher:
+    """
+    通知分发器
+
+    用法:
+        dispatcher = NotificationDispatcher([FileSink("logs/live/notifications.jsonl")])
+        dispatcher.start()                       # 在事件循环中调用
+        dispatcher.notify(FILL, "BUY 0.01 @ 42000", key="BTCUSDT")
+        await dispatcher.stop()                  # 发送队列中剩余的通知
+
+    events 为None时发送所有事件类型，否则只发送列出的类型。
+    """
+
+    def __init__(
+        self,
+        sinks: Iterable,
+        events: Optional[Iterable[str]] = None,
+        max_queue: int = 1000,
+        batch_window: float = 1.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+    ):
+        self.sinks = list(sinks)
+        self.events = set(events) if events is not None else None
+        self.max_queue = max_queue
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # 统计
+        self.queued = 0
+        self.dropped = 0
+        self.merged = 0
+        self.sent = 0
+        self.retries = 0
+        self.failed = 0
+
+    def wants(self, event: str) -> bool:
+        """是否需要发送该类型的事件（调用方可据此跳过消息格式化）"""
+        return self._queue is not None and (self.events is None or event in self.events)
+
+    def start(self):
+        """启动后台发送任务（必须在运行中的事件循环内调用）"""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def notify(self, event: str, text: str, key: str = "") -> bool:
+        """放入发送队列（不等待），队列已满或未启动时丢弃并返回False"""
+        if not self.wants(event) or self._stopping:
+            return False
+        try:
+            self._queue.put_nowait(Notification(event, text, key))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.queued += 1
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = loop.time() + self.batch_window
+            stop = False
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            messages = merge_notifications(batch)
+            self.merged += len(batch) - len(messages)
+            for event, text in messages:
+                await asyncio.gather(*(self._send(sink, event, text) for sink in self.sinks))
+            if stop:
+                return
+
+    async def _send(self, sink, event: str, text: str):
+        """发送一条消息，失败时指数退避重试"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                await sink.send(event, text)
+                self.sent += 1
+                return
+            except Exception:
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    return
+                self.retries += 1
+                await asyncio.sleep(min(self.backoff * 2 ** attempt, self.max_backoff))
+
+    async def stop(self, timeout: float = 10.0):
+        """停止接收新通知，等待队列中的通知发送完（超时后放弃）"""
+        if self._task is None:
+            return
+        self._stopping = True
+        try:
+            self._queue.put_nowait(None)
+        except asyncio.QueueFull:
+            # 队列已满时结束标记放不进去，等待超时后直接取消
+            pass
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+        self._queue = None
+
+    def summary(self) -> dict:
+        return {
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "sent": self.sent,
+            "retries": self.retries,
+            "failed": self.failed,
+        }
+
+
+def create_notification_dispatcher(config: dict) -> Optional[NotificationDispatcher]:
+    """
+    按YAML的 notifications 配置创建分发器（没有可用通道时返回None）
+
+    密钥只从环境变量读取: TELEGRAM_BOT_TOKEN, SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD
+    """
+    if not config:
+        return None
+
+    sinks = []
+    telegram = config.get("telegram") or {}
+    if telegram.get("enabled"):
+        token = os.getenv("TELEGRAM_BOT_TOKEN")
+        if token:
+            sinks.append(TelegramSink(token, str(telegram["chat_id"])))
+        else:
+            print("警告: 未设置 TELEGRAM_BOT_TOKEN，Telegram 通知未启用")
+
+    email = config.get("email") or {}
+    if email.get("enabled"):
+        host = os.getenv("SMTP_HOST")
+        if host:
+            sinks.append(EmailSink(
+                email["address"],
+                host,
+                int(os.getenv("SMTP_PORT", "587")),
+                os.getenv("SMTP_USER"),
+                os.getenv("SMTP_PASSWORD"),
+            ))
+        else:
+            print("警告: 未设置 SMTP_HOST，邮件通知未启用")
+
+    if config.get("webhook"):
+        sinks.append(HttpSink(config["webhook"]))
+    if config.get("file"):
+        sinks.append(FileSink(config["file"]))
+
+    if not sinks:
+        return None
+    return NotificationDispatcher(
+        sinks,
+        events=config.get("events"),
+        max_queue=config.get("max_queue", 1000),
+        batch_window=config.get("batch_window", 1.0),
+        max_retries=config.get("max_retries", 3),
+    )
+
+
+def subscribe_node_events(dispatcher: NotificationDispatcher, msgbus, large_profit: Optional[float] = None):
+    """
+    把交易节点消息总线上的事件转为通知
+
+    - 订单成交 -> fill（按品种合并），订单被拒 -> error
+    - 平仓实现盈亏 >= large_profit -> large_profit
+    - 风控回撤暂停 -> stop_loss_triggered
+    - 市场条件暂停/恢复 -> grid_paused / grid_resumed
+    """
+    from nautilus_trader.model.events import OrderFilled, OrderRejected, PositionClosed
+
+    def on_order_event(event):
+        if isinstance(event, OrderFilled):
+            if dispatcher.wants(FILL):
+                dispatcher.notify(
+                    FILL,
+                    f"{event.instrument_id} {event.order_side.name} {event.last_qty} @ {event.last_px}",
+                    key=str(event.instrument_id),
+                )
+        elif isinstance(event, OrderRejected):
+            if dispatcher.wants(ERROR):
+                dispatcher.notify(ERROR, f"订单被拒: {event.client_order_id} {event.reason}", key="rejected")
+
+    def on_position_event(event):
+        if large_profit is None or not isinstance(event, PositionClosed) or not dispatcher.wants(LARGE_PROFIT):
+            return
+        pnl = event.realized_pnl
+        if pnl is not None and float(pnl) >= large_profit:
+            dispatcher.notify(LARGE_PROFIT, f"{event.instrument_id} 平仓盈利 {pnl}")
+
+    def on_risk_event(event):
+        if event.kind == "drawdown_halt":
+            dispatcher.notify(STOP_LOSS_TRIGGERED, event.reason)
+
+    def on_market_event(event):
+        dispatcher.notify(event.kind, event.reason)
+
+    msgbus.subscribe(topic="events.order.*", handler=on_order_event)
+    msgbus.subscribe(topic="events.position.*", handler=on_position_event)
+    msgbus.subscribe(topic="events.risk.*", handler=on_risk_event)
+    msgbus.subscribe(topic="events.market.*", handler=on_market_event)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+策略回调耗时统计
+Per-callback latency profiling for strategies
+
+按需启用：只有在启用时才把计时包装挂到策略实例上，
+未启用时策略方法保持原样，没有任何额外开销。
+回测与实盘节点中用法相同。
+
+ImportProfiler 统计命令行入口启动阶段各个包的导入耗时（--profile-startup）。
+"""
+
+import builtins
+import sys
+import time
+from array import array
+from functools import wraps
+from typing import Dict, Iterable, List
+
+
+class LatencyHistogram:
+    """
+    HDR风格的固定内存延迟直方图（单位: 纳秒）
+
+    使用对数-线性分桶：每个2的幂区间再等分为 2^significant_bits 个子桶，
+    相对误差约为 1 / 2^significant_bits，内存大小只由量程和精度决定，
+    与记录次数无关。
+    """
+
+    def __init__(self, significant_bits: int = 7, max_bits: int = 40):
+        self.sub_bucket_half = 1 << significant_bits     # 每个区间的子桶数
+        self.sub_bucket_count = self.sub_bucket_half * 2  # 线性区间的桶数
+        self.shift = significant_bits + 1
+        self.max_value = (1 << max_bits) - 1             # 默认约18分钟
+
+        bucket_count = (max_bits - self.shift + 2) * self.sub_bucket_half
+        self.counts = array("q", bytes(8 * bucket_count))
+
+        self.total_count = 0
+        self.total_sum = 0
+        self.min_value = 0
+        self.max_recorded = 0
+
+    def _index(self, value: int) -> int:
+        """数值 -> 桶索引"""
+        if value < self.sub_bucket_count:
+            return value
+        exponent = value.bit_length() - self.shift
+        return (exponent + 1) * self.sub_bucket_half + (value >> exponent) - self.sub_bucket_half
+
+    def _value_at(self, index: int) -> int:
+        """桶索引 -> 桶内最大值"""
+        if index < self.sub_bucket_count:
+            return index
+        exponent = index // self.sub_bucket_half - 1
+        mantissa = index % self.sub_bucket_half + self.sub_bucket_half
+        return ((mantissa + 1) << exponent) - 1
+
+    def record(self, value: int):
+        """记录一个延迟值（纳秒），超出量程的值按最大值计"""
+        if value < 0:
+            value = 0
+        elif value > self.max_value:
+            value = self.max_value
+
+        self.counts[self._index(value)] += 1
+
+        if self.total_count == 0 or value < self.min_value:
+            self.min_value = value
+        if value > self.max_recorded:
+            self.max_recorded = value
+        self.total_count += 1
+        self.total_sum += value
+
+    def percentile(self, q: float) -> int:
+        """返回第q百分位的延迟（纳秒）"""
+        if self.total_count == 0:
+            return 0
+
+        target = max(1, int(round(self.total_count * q / 100.0)))
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count:
+                cumulative += count
+                if cumulative >= target:
+                    return min(self._value_at(index), self.max_recorded)
+
+        return self.max_recorded
+
+    def mean(self) -> float:
+        """平均延迟（纳秒）"""
+        return self.total_sum / self.total_count if self.total_count else 0.0
+
+    def summary(self, percentiles: Iterable[float] = (50, 90, 99, 99.9)) -> dict:
+        """汇总统计"""
+        result = {
+            "count": self.total_count,
+            "min": self.min_value,
+            "mean": self.mean(),
+            "max": self.max_recorded,
+        }
+        for q in percentiles:
+            result[f"p{q:g}"] = self.percentile(q)
+        return result
+
+    def merge(self, other: "LatencyHistogram"):
+        """合并另一个相同精度和量程的直方图"""
+        if len(other.counts) != len(self.counts):
+            raise ValueError("直方图的精度或量程不一致，无法合并")
+        if not other.total_count:
+            return
+
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+
+        if self.total_count == 0 or other.min_value < self.min_value:
+            self.min_value = other.min_value
+        if other.max_recorded > self.max_recorded:
+            self.max_recorded = other.max_recorded
+        self.total_count += other.total_count
+        self.total_sum += other.total_sum
+
+    def reset(self):
+        """清空记录"""
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.total_count = 0
+        self.total_sum = 0
+        self.min_value = 0
+        self.max_recorded = 0
+
+
+class CallbackProfiler:
+    """
+    策略回调计时器
+
+    用法:
+        profiler = CallbackProfiler()
+        profiler.instrument(strategy, ["on_quote_tick", "on_order_filled"])
+        ...
+        profiler.log_summary(strategy.log)
+    """
+
+    def __init__(self, significant_bits: int = 7):
+        self.significant_bits = significant_bits
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        """获取（或创建）指定回调的直方图"""
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = LatencyHistogram(significant_bits=self.significant_bits)
+            self.histograms[name] = hist
+        return hist
+
+    def wrap(self, name: str, func):
+        """返回带计时的函数包装"""
+        record = self.histogram(name).record
+        clock = time.perf_counter_ns
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(clock() - start)
+
+        return timed
+
+    def instrument(self, obj, method_names: List[str]):
+        """
+        在实例上用计时包装替换指定方法
+
+        包装挂在实例属性上，Nautilus 分发回调时同样会经过包装，
+        因此回测和实盘节点都能统计到。
+        """
+        for name in method_names:
+            setattr(obj, name, self.wrap(name, getattr(obj, name)))
+
+    def summary(self) -> Dict[str, dict]:
+        """所有回调的汇总统计"""
+        return {name: hist.summary() for name, hist in self.histograms.items()}
+
+    def log_summary(self, log=None):
+        """输出各回调的延迟百分位（微秒）"""
+        emit = log.info if log is not None else print
+
+        emit("回调耗时统计 (us):")
+        for name, stats in self.summary().items():
+            if not stats["count"]:
+                continue
+            emit(
+                f"  {name}: n={stats['count']} "
+                f"mean={stats['mean'] / 1000:.2f} "
+                f"p50={stats['p50'] / 1000:.2f} "
+                f"p90={stats['p90'] / 1000:.2f} "
+                f"p99={stats['p99'] / 1000:.2f} "
+                f"p99.9={stats['p99.9'] / 1000:.2f} "
+                f"max={stats['max'] / 1000:.2f}"
+            )
+
+    def reset(self):
+        """清空所有统计"""
+        for hist in self.histograms.values():
+            hist.reset()
+
+
+class ImportProfiler:
+    """
+    启动阶段的导入耗时统计（按顶层包汇总）
+
+    启用期间替换 builtins.__import__，对每次导入计时，
+    并扣除其中嵌套导入的耗时，把自身耗时记到模块所属的顶层包上
+    （如 nautilus_trader、pandas、numpy），各包耗时之和约等于导入总耗时。
+
+    用法:
+        with ImportProfiler() as profiler:
+            from src.backtest.bar_backtest import run_bar_backtest
+        profiler.print_summary()
+    """
+
+    def __init__(self):
+        self.totals: Dict[str, int] = {}    # 顶层包 -> 自身耗时（纳秒）
+        self.counts: Dict[str, int] = {}    # 顶层包 -> 首次加载的导入次数
+        self.elapsed_ns = 0
+        self._stack: List[list] = []        # [子导入耗时] 栈
+        self._original = None
+        self._start_ns = 0
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level:
+            package = (globals or {}).get("__package__") or name
+        else:
+            package = name
+        package = package.split(".", 1)[0]
+        loaded = name in sys.modules
+
+        frame = [0]
+        self._stack.append(frame)
+        start = time.perf_counter_ns()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][0] += elapsed
+            self.totals[package] = self.totals.get(package, 0) + elapsed - frame[0]
+            if not loaded:
+                self.counts[package] = self.counts.get(package, 0) + 1
+
+    def __enter__(self):
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self._original
+        self.elapsed_ns += time.perf_counter_ns() - self._start_ns
+        return False
+
+    def summary(self, top: int = 15) -> List[tuple]:
+        """耗时最多的顶层包 [(包名, 耗时毫秒, 模块数)]"""
+        ranked = sorted(self.totals.items(), key=lambda item: item[1], reverse=True)[:top]
+        return [(name, ns / 1e6, self.counts.get(name, 0)) for name, ns in ranked]
+
+    def print_summary(self, top: int = 15):
+        """输出导入耗时分解"""
+        print(f"启动导入耗时: {self.elapsed_ns / 1e6:.1f} ms")
+        for name, ms, count in self.summary(top):
+            print(f"  {name:<24} {ms:8.1f} ms  ({count} 个模块)")
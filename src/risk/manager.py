@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+下单前风险检查
+Pre-trade risk checks with incrementally maintained state
+
+对应策略YAML中的风险限制:
+- max_position_value: 单个网格订单的最大价值（超出时按比例缩小订单）
+- max_total_value: 总持仓最大价值（持仓 + 同方向挂单，超出时缩小或拒绝）
+- reserve_ratio: 保留资金比例（买方向占用资金不超过 total_amount * (1 - reserve_ratio)）
+- max_drawdown: 最大回撤（触发后停止增加敞口的订单）
+
+持仓、挂单数量和名义价值、权益峰值都在成交/挂单/标记价格更新时增量维护，
+每次检查只做常数次算术运算，不扫描订单缓存。
+"""
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from nautilus_trader.model.enums import OrderSide
+
+
+ALLOW = "allow"
+SCALE = "scale"
+BLOCK = "block"
+
+
+@dataclass
+class RiskDecision:
+    """风险检查结果"""
+
+    action: str          # allow / scale / block
+    quantity: float      # 允许的下单数量
+    reason: str = ""
+
+
+@dataclass
+class RiskEvent:
+    """风险事件（订单被缩小/拒绝，回撤触发暂停）"""
+
+    kind: str            # order_scaled / order_blocked / drawdown_halt
+    reason: str
+    side: Optional[str] = None
+    requested_qty: float = 0.0
+    allowed_qty: float = 0.0
+    price: float = 0.0
+    drawdown: float = 0.0
+
+
+class RiskManager:
+    """
+    增量维护敞口与回撤状态的下单前风控
+
+    用法（策略内）:
+        decision = risk.check(OrderSide.BUY, quantity, price)
+        risk.on_order_submitted(client_order_id, side, decision.quantity, price)
+        risk.on_fill(client_order_id, side, last_qty, last_px)
+        risk.on_order_closed(client_order_id)
+        risk.on_mark(mid_price)
+    """
+
+    def __init__(
+        self,
+        capital: float,
+        max_position_value: Optional[float] = None,
+        max_total_value: Optional[float] = None,
+        max_drawdown: Optional[float] = None,
+        reserve_ratio: float = 0.0,
+        min_quantity: float = 0.0,
+        size_increment: float = 0.0,
+        on_event: Optional[Callable[[RiskEvent], None]] = None,
+        max_events: int = 1000,
+    ):
+        self.capital = capital
+        self.max_position_value = max_position_value
+        self.max_total_value = max_total_value
+        self.max_drawdown = max_drawdown
+        self.max_buy_commitment = capital * (1 - reserve_ratio)
+        self.min_quantity = min_quantity
+        self.size_increment = size_increment  # 数量步长，缩小后的数量按步长向下取整
+        self.on_event = on_event
+
+        # 增量状态
+        self.position = 0.0          # 净持仓（正为多）
+        self.cash = 0.0              # 成交引起的现金变化
+        self.open_buy_qty = 0.0      # 未成交买单数量
+        self.open_sell_qty = 0.0     # 未成交卖单数量
+        self.open_buy_notional = 0.0 # 未成交买单占用资金
+        self.mark_price = 0.0
+        self.peak_equity = capital
+        self.drawdown = 0.0
+        self.halted = False          # 回撤超限后停止增加敞口
+
+        self._open: Dict[str, Tuple[OrderSide, float, float]] = {}  # 订单ID -> (方向, 剩余数量, 价格)
+        self.events: Deque[RiskEvent] = deque(maxlen=max_events)
+
+    def _emit(self, event: RiskEvent):
+        self.events.append(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+    @property
+    def equity(self) -> float:
+        """按标记价格计算的权益"""
+        return self.capital + self.cash + self.position * self.mark_price
+
+    def check(self, side: OrderSide, quantity: float, price: float) -> RiskDecision:
+        """检查一笔新订单，返回允许/缩小/拒绝"""
+        allowed = quantity
+        reason = ""
+
+        if side == OrderSide.BUY:
+            exposure = self.position + self.open_buy_qty      # 已有多头敞口（含挂单）
+        else:
+            exposure = self.open_sell_qty - self.position     # 已有空头敞口（含挂单）
+        increases_exposure = exposure + quantity > 0
+
+        if self.halted and increases_exposure:
+            return self._block(side, quantity, price, f"回撤 {self.drawdown:.2%} 超过限制，暂停开仓")
+
+        # 单个网格订单价值
+        if self.max_position_value is not None and allowed * price > self.max_position_value:
+            allowed = self.max_position_value / price
+            reason = f"单格价值超过 {self.max_position_value}"
+
+        # 总持仓价值（持仓 + 同方向挂单 + 本单）
+        if self.max_total_value is not None and increases_exposure:
+            room = self.max_total_value / price - max(exposure, 0.0)
+            if allowed > room:
+                allowed = room
+                reason = f"总持仓价值超过 {self.max_total_value}"
+
+        # 保留资金（只约束买方向占用的资金）
+        if side == OrderSide.BUY:
+            committed = self.open_buy_notional + max(self.position, 0.0) * price
+            room = (self.max_buy_commitment - committed) / price
+            if allowed > room:
+                allowed = room
+                reason = f"可用资金不足（保留 {1 - self.max_buy_commitment / self.capital:.0%}）"
+
+        if allowed < quantity:
+            allowed = self._round_down(allowed)
+
+        if allowed < self.min_quantity or allowed <= 0:
+            return self._block(side, quantity, price, reason or "数量低于最小下单量")
+
+        if allowed < quantity:
+            self._emit(RiskEvent("order_scaled", reason, side.name, quantity, allowed, price, self.drawdown))
+            return RiskDecision(SCALE, allowed, reason)
+
+        return RiskDecision(ALLOW, quantity)
+
+    def _round_down(self, quantity: float) -> float:
+        """按数量步长向下取整（与 instrument.make_qty(round_down=True) 一致，取整后不会超限）"""
+        if self.size_increment <= 0:
+            return quantity
+        steps = math.floor(quantity / self.size_increment + 1e-9)
+        return round(steps * self.size_increment, 12)
+
+    def _block(self, side: OrderSide, quantity: float, price: float, reason: str) -> RiskDecision:
+        self._emit(RiskEvent("order_blocked", reason, side.name, quantity, 0.0, price, self.drawdown))
+        return RiskDecision(BLOCK, 0.0, reason)
+
+    def on_order_submitted(self, client_order_id: str, side: OrderSide, quantity: float, price: float):
+        """登记新挂单"""
+        self._open[client_order_id] = (side, quantity, price)
+        if side == OrderSide.BUY:
+            self.open_buy_qty += quantity
+            self.open_buy_notional += quantity * price
+        else:
+            self.open_sell_qty += quantity
+
+    def _release(self, side: OrderSide, quantity: float, price: float):
+        if side == OrderSide.BUY:
+            self.open_buy_qty -= quantity
+            self.open_buy_notional -= quantity * price
+        else:
+            self.open_sell_qty -= quantity
+
+    def on_fill(self, client_order_id: str, side: OrderSide, quantity: float, price: float):
+        """成交：更新持仓、现金，并扣减对应挂单"""
+        if side == OrderSide.BUY:
+            self.position += quantity
+            self.cash -= quantity * price
+        else:
+            self.position -= quantity
+            self.cash += quantity * price
+
+        entry = self._open.get(client_order_id)
+        if entry is not None:
+            order_side, remaining, order_price = entry
+            filled = min(quantity, remaining)
+            self._release(order_side, filled, order_price)
+            if remaining - filled <= 0:
+                del self._open[client_order_id]
+            else:
+                self._open[client_order_id] = (order_side, remaining - filled, order_price)
+
+        self.on_mark(price)
+
+    def on_order_closed(self, client_order_id: str):
+        """订单撤销/拒绝/过期：释放剩余挂单"""
+        entry = self._open.pop(client_order_id, None)
+        if entry is not None:
+            self._release(*entry)
+
+    def on_mark(self, price: float):
+        """更新标记价格、权益峰值和回撤"""
+        self.mark_price = price
+        equity = self.equity
+        if equity > self.peak_equity:
+            self.peak_equity = equity
+        self.drawdown = (self.peak_equity - equity) / self.peak_equity if self.peak_equity > 0 else 0.0
+
+        if self.max_drawdown is None:
+            return
+        if not self.halted and self.drawdown >= self.max_drawdown:
+            self.halted = True
+            self._emit(RiskEvent("drawdown_halt", f"回撤 {self.drawdown:.2%} 达到限制 {self.max_drawdown:.2%}", drawdown=self.drawdown))
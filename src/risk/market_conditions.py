@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+市场条件监控（流式估计，自动暂停/恢复网格）
+Streaming market-condition gates
+
+对应策略YAML中的 market_conditions:
+- max_volatility: 窗口内已实现波动率（默认24小时）超过该值时暂停
+- min_volume: 窗口内成交额低于该值时暂停（需要K线或逐笔成交提供成交量）
+- trend_threshold: 趋势窗口内回归拟合的对数价格变化超过该值时暂停（网格不适合单边行情）
+- volatility_spike: 短期EWMA波动率（折算到同一窗口）超过该值时暂停
+
+价格按行情自带的事件时间（ts_event）切分为固定间隔的采样点，
+回测与实盘看到相同的行情即得到相同的采样和判断，与处理时刻无关。
+每个行情只做常数次运算；采样点关闭时各估计器 O(1) 更新，环形缓冲区在创建时预分配。
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+NANOS_PER_SECOND = 1_000_000_000
+
+PAUSED = "grid_paused"
+RESUMED = "grid_resumed"
+
+
+class EwmaVariance:
+    """指数加权方差（均值视为0，用于对数收益率；样本数不足 1/alpha 时按简单平均预热）"""
+
+    __slots__ = ("alpha", "value", "count")
+
+    def __init__(self, halflife: float):
+        self.alpha = 1.0 - 0.5 ** (1.0 / halflife)
+        self.value = 0.0
+        self.count = 0
+
+    def update(self, x: float):
+        self.count += 1
+        self.value += max(self.alpha, 1.0 / self.count) * (x * x - self.value)
+
+
+class RollingWelford:
+    """固定窗口的均值和方差（Welford 增量更新，窗口满后替换最旧的样本）"""
+
+    __slots__ = ("window", "_values", "_index", "count", "mean", "_m2")
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = [0.0] * window
+        self._index = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x: float):
+        if self.count < self.window:
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (x - self.mean)
+        else:
+            old = self._values[self._index]
+            old_mean = self.mean
+            self.mean += (x - old) / self.count
+            self._m2 += (x - old) * (x - self.mean + old - old_mean)
+            if self._m2 < 0.0:
+                self._m2 = 0.0
+        self._values[self._index] = x
+        self._index = (self._index + 1) % self.window
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+class RollingSum:
+    """固定窗口的滚动求和（环形缓冲区）"""
+
+    __slots__ = ("window", "_values", "_index", "count", "total")
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = [0.0] * window
+        self._index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def update(self, x: float):
+        self.total += x - self._values[self._index]
+        self._values[self._index] = x
+        self._index = (self._index + 1) % self.window
+        if self.count < self.window:
+            self.count += 1
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.window
+
+
+class RollingTrend:
+    """
+    固定窗口的线性回归斜率（横轴为采样序号）
+
+    窗口满后整体左移一位: Sxy' = Sxy - (Sy - y_old) + (n-1) * y_new，Sy' = Sy - y_old + y_new。
+    """
+
+    __slots__ = ("window", "_values", "_index", "count", "_sy", "_sxy", "_origin")
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = [0.0] * window
+        self._index = 0
+        self.count = 0
+        self._sy = 0.0
+        self._sxy = 0.0
+        self._origin: Optional[float] = None   # 以首个样本为原点，减小累加的数值误差
+
+    def update(self, y: float):
+        if self._origin is None:
+            self._origin = y
+        y -= self._origin
+        n = self.count
+        if n < self.window:
+            self._sxy += n * y
+            self._sy += y
+            self.count += 1
+        else:
+            old = self._values[self._index]
+            self._sxy += (n - 1) * y - (self._sy - old)
+            self._sy += y - old
+        self._values[self._index] = y
+        self._index = (self._index + 1) % self.window
+
+    @property
+    def slope(self) -> float:
+        n = self.count
+        if n < 2:
+            return 0.0
+        sx = n * (n - 1) / 2
+        sxx = (n - 1) * n * (2 * n - 1) / 6
+        return (n * self._sxy - sx * self._sy) / (n * sxx - sx * sx)
+
+    @property
+    def change(self) -> float:
+        """回归直线在当前窗口首尾之间的变化"""
+        return self.slope * (self.count - 1)
+
+
+@dataclass
+class MarketConditionEvent:
+    """市场条件事件（网格暂停/恢复）"""
+
+    kind: str            # grid_paused / grid_resumed
+    reason: str
+    ts_ns: int
+    volatility: float = 0.0
+    volume: float = 0.0
+    trend: float = 0.0
+    spike: float = 0.0
+
+
+class MarketConditionMonitor:
+    """
+    市场条件监控
+
+    用法（策略内）:
+        monitor.update(tick.ts_event, mid_price)          # 每个报价/K线
+        monitor.add_volume(trade.ts_event, notional)      # 每笔成交（或K线成交额）
+        monitor.paused                                    # 当前是否应暂停网格
+
+    阈值为None的条件不检查。波动率和趋势在积累 min_samples 个采样点后开始判断，
+    成交额在整个窗口都有数据后开始判断。暂停后需要所有指标回落到阈值的 resume_ratio 以内才恢复。
+    """
+
+    def __init__(
+        self,
+        max_volatility: Optional[float] = None,
+        min_volume: Optional[float] = None,
+        trend_threshold: Optional[float] = None,
+        volatility_spike: Optional[float] = None,
+        sample_secs: int = 60,
+        window_secs: int = 86_400,
+        trend_window_secs: int = 14_400,
+        spike_halflife_secs: int = 3_600,
+        min_samples: int = 30,
+        resume_ratio: float = 0.8,
+        on_event: Optional[Callable[[MarketConditionEvent], None]] = None,
+    ):
+        self.max_volatility = max_volatility
+        self.min_volume = min_volume
+        self.trend_threshold = trend_threshold
+        self.volatility_spike = volatility_spike
+        self.min_samples = min_samples
+        self.resume_ratio = resume_ratio
+        self.on_event = on_event
+
+        self.sample_ns = sample_secs * NANOS_PER_SECOND
+        self.window = max(window_secs // sample_secs, 2)
+        self.window_scale = math.sqrt(self.window)   # 单个采样间隔的波动率折算到整个窗口
+
+        self.returns = RollingWelford(self.window)
+        self.spike = EwmaVariance(spike_halflife_secs / sample_secs)
+        self.volume = RollingSum(self.window)
+        self.trend = RollingTrend(max(trend_window_secs // sample_secs, 2))
+
+        # 当前采样区间
+        self._bucket: Optional[int] = None
+        self._last_price = 0.0
+        self._sample_price = 0.0     # 上一个采样点的收盘价
+        self._bucket_volume = 0.0
+
+        self.paused = False
+        self.reasons: List[str] = []
+        self.samples = 0
+
+    def update(self, ts_ns: int, price: float):
+        """行情价格更新"""
+        if self._bucket is None:
+            self._bucket = ts_ns // self.sample_ns
+            self._sample_price = price
+        elif ts_ns >= (self._bucket + 1) * self.sample_ns:
+            self._advance(ts_ns)
+        self._last_price = price
+
+    def add_volume(self, ts_ns: int, notional: float):
+        """成交额（计价货币）"""
+        if self._bucket is not None and ts_ns >= (self._bucket + 1) * self.sample_ns:
+            self._advance(ts_ns)
+        self._bucket_volume += notional
+
+    def _advance(self, ts_ns: int):
+        """关闭已经结束的采样区间（行情中断时空白区间按价格不变、成交额为0补齐）"""
+        bucket = ts_ns // self.sample_ns
+        steps = min(bucket - self._bucket, self.window)
+        self._close_sample(self._last_price, self._bucket_volume)
+        for _ in range(steps - 1):
+            self._close_sample(self._last_price, 0.0)
+        self._bucket = bucket
+        self._bucket_volume = 0.0
+        self._evaluate(ts_ns)
+
+    def _close_sample(self, price: float, volume: float):
+        r = math.log(price / self._sample_price)
+        self.returns.update(r)
+        self.spike.update(r)
+        self.volume.update(volume)
+        self.trend.update(math.log(price))
+        self._sample_price = price
+        self.samples += 1
+
+    def values(self) -> Dict[str, float]:
+        """当前指标（波动率均折算到 window_secs）"""
+        return {
+            "volatility": math.sqrt(self.returns.variance) * self.window_scale,
+            "volume": self.volume.total,
+            "trend": self.trend.change,
+            "spike": math.sqrt(self.spike.value) * self.window_scale,
+        }
+
+    def _violations(self, values: Dict[str, float], ratio: float) -> List[str]:
+        reasons = []
+        warm = self.samples >= self.min_samples
+        if warm and self.max_volatility is not None and values["volatility"] > self.max_volatility * ratio:
+            reasons.append(f"波动率 {values['volatility']:.2%} 超过 {self.max_volatility * ratio:.2%}")
+        if warm and self.volatility_spike is not None and values["spike"] > self.volatility_spike * ratio:
+            reasons.append(f"短期波动率 {values['spike']:.2%} 超过 {self.volatility_spike * ratio:.2%}")
+        if warm and self.trend_threshold is not None and abs(values["trend"]) > self.trend_threshold * ratio:
+            reasons.append(f"趋势 {values['trend']:+.2%} 超过 ±{self.trend_threshold * ratio:.2%}")
+        if self.min_volume is not None and self.volume.full and values["volume"] < self.min_volume / ratio:
+            reasons.append(f"成交额 {values['volume']:,.0f} 低于 {self.min_volume / ratio:,.0f}")
+        return reasons
+
+    def _evaluate(self, ts_ns: int):
+        values = self.values()
+        if not self.paused:
+            reasons = self._violations(values, 1.0)
+            if reasons:
+                self.paused = True
+                self.reasons = reasons
+                self._emit(PAUSED, "; ".join(reasons), ts_ns, values)
+        elif not self._violations(values, self.resume_ratio):
+            self.paused = False
+            self.reasons = []
+            self._emit(RESUMED, "市场条件恢复正常", ts_ns, values)
+
+    def _emit(self, kind: str, reason: str, ts_ns: int, values: Dict[str, float]):
+        if self.on_event is not None:
+            self.on_event(MarketConditionEvent(kind, reason, ts_ns, **values))
@@ -4,17 +4,48 @@
 Grid Trading Strategy Implementation
 """
 
+import json
+import asyncio
 from decimal import Decimal
 from typing import Optional, Dict, List, Set
-import numpy as np
 from datetime import timedelta
+from pathlib import Path
 
 from nautilus_trader.config import StrategyConfig
 from nautilus_trader.trading.strategy import Strategy
-from nautilus_trader.model.identifiers import InstrumentId
+from nautilus_trader.model.identifiers import InstrumentId, ClientOrderId
+from nautilus_trader.model.data import Bar, BarType
 from nautilus_trader.model.enums import OrderSide, OrderType, TimeInForce
 from nautilus_trader.model.objects import Price, Quantity
-from nautilus_trader.model.events import OrderFilled
+from nautilus_trader.model.events import (
+    OrderAccepted,
+    OrderCanceled,
+    OrderDenied,
+    OrderExpired,
+    OrderFilled,
+    OrderRejected,
+)
+
+from src.live.conflation import QuoteConflator
+from src.live.order_scheduler import OrderScheduler
+from src.strategies.grid_geometry import (
+    bounded_ladder,
+    centered_ladder,
+    ladder_prices,
+    level_quantities,
+    make_ladder,
+    min_spacing_ratio,
+    snap_to_tick,
+)
+from src.strategies.grid_spacing import VolatilitySpacing, spacing_step
+from src.live.reconciliation import ReconcilePlan, plan_reconciliation
+from src.monitoring.latency import OrderLatencyTracker, DEFAULT_EXPORT_DIR
+from src.monitoring.event_log import EventLog, GRID_EVENT_SCHEMAS
+from src.monitoring.metrics import MetricsRegistry, MetricsFlusher
+from src.monitoring.profiling import CallbackProfiler
+from src.risk.manager import RiskManager, RiskEvent, BLOCK
+from src.risk.market_conditions import MarketConditionMonitor, MarketConditionEvent, PAUSED
+from src.utils.fixed_point import FixedPoint, raw_mid
 
 
 class GridStrategyConfig(StrategyConfig):
@@ -26,10 +57,23 @@ class GridStrategyConfig(StrategyConfig):
     # 资金管理 (required fields first)
     total_amount: float                   # 总投资额
     
+    # 行情来源
+    bar_type: Optional[str] = None       # 以K线作为价格来源（None表示使用报价）
+    subscribe_trades: bool = False       # 订阅逐笔成交（报价模式下设置 min_volume 时自动订阅）
+    quote_conflation: bool = False       # 行情积压时只处理每个交易工具的最新报价（仅实盘）
+    conflation_max_age_ms: float = 1.0   # 报价处理延迟超过该值视为积压（毫秒）
+    
     # 网格参数
     grid_levels: int = 20                # 网格数量
     grid_spacing_type: str = "arithmetic" # arithmetic/geometric
-    grid_spacing: float = 0.005          # 网格间距（百分比）
+    grid_spacing: Optional[float] = None # 网格间距（比例，以当前价格为中心展开；None表示在价格范围内均分）
+    adaptive_spacing: bool = False       # 按实时波动率调整网格间距
+    spacing_vol_multiplier: float = 1.0  # 间距 = 倍数 × 波动率（折算到 spacing_horizon_secs）
+    spacing_horizon_secs: int = 3600     # 波动率折算周期（秒）
+    spacing_halflife_secs: int = 3600    # 波动率EWMA半衰期（秒）
+    spacing_update_threshold: float = 0.25  # 估计间距偏离当前间距超过该比例才调整网格
+    min_grid_spacing: float = 0.001      # 自适应间距下限
+    max_grid_spacing: float = 0.05       # 自适应间距上限
     
     # 价格范围
     upper_price: Optional[float] = None  # 网格上限（None表示自动计算）
@@ -49,10 +93,42 @@ class GridStrategyConfig(StrategyConfig):
     stop_loss_ratio: float = 0.15        # 止损比例
     take_profit_ratio: float = 0.30      # 止盈比例
     enable_trailing_stop: bool = False   # 是否启用移动止损
+    max_drawdown: Optional[float] = None        # 最大回撤（触发后暂停开仓）
+    max_position_value: Optional[float] = None  # 单个网格最大持仓价值
+    max_total_value: Optional[float] = None     # 总持仓最大价值
+    reserve_ratio: float = 0.0                  # 保留资金比例
     
     # 执行控制
-    min_profit_ratio: float = 0.002      # 最小利润率（扣除手续费）
+    min_profit_ratio: Optional[float] = None   # 最小利润率（设置后相邻网格间距不小于 双边手续费 + 该值；None表示不约束）
     rebalance_threshold: float = 0.05    # 再平衡阈值
+    submit_rate_limit: Optional[float] = None  # 下单速率限制（个/秒，None表示不限速）
+    cancel_rate_limit: Optional[float] = None  # 撤单速率限制（个/秒，None表示不限速）
+    rate_limit_burst: int = 10           # 令牌桶容量（允许的突发请求数）
+    reconcile_interval: Optional[int] = None  # 挂单对账间隔（秒，None表示只在恢复运行时对账）
+    
+    # 市场条件（None表示不检查，触发后撤销网格挂单，恢复后按当前价格重新挂单）
+    max_volatility: Optional[float] = None    # 窗口内最大波动率
+    min_volume: Optional[float] = None        # 窗口内最小成交额（计价货币）
+    trend_threshold: Optional[float] = None   # 趋势强度阈值（回归拟合的价格变化比例）
+    volatility_spike: Optional[float] = None  # 短期波动率激增阈值（折算到同一窗口）
+    condition_window_secs: int = 86400        # 波动率/成交额窗口（秒）
+    trend_window_secs: int = 14400            # 趋势窗口（秒）
+    spike_halflife_secs: int = 3600           # 短期波动率EWMA半衰期（秒）
+    condition_sample_secs: int = 60           # 采样间隔（秒，按行情事件时间切分）
+    
+    # 监控
+    enable_profiling: bool = False       # 是否统计回调耗时
+    latency_telemetry: bool = False      # 是否记录行情到下单的延迟
+    latency_export_interval: int = 15    # 延迟指标导出间隔（秒）
+    latency_export_dir: str = DEFAULT_EXPORT_DIR  # Prometheus 文本文件目录
+    enable_metrics: bool = False         # 是否收集订单/成交/报价等运行指标
+    metrics_flush_interval: float = 10.0 # 指标快照写出间隔（秒，后台线程）
+    metrics_dir: str = DEFAULT_EXPORT_DIR  # 指标快照目录
+    event_log: bool = False              # 是否记录结构化事件日志（下单/成交等，后台线程写出）
+    event_log_dir: str = DEFAULT_EXPORT_DIR  # 事件日志目录（JSON Lines）
+    event_log_max_bytes: int = 100 * 1024 * 1024  # 单个事件日志文件大小上限（超过后轮转）
+    event_log_backup_count: int = 5      # 保留的轮转文件数
+    event_log_sample: Optional[Dict[str, int]] = None  # 按事件类型抽样（每N条记录1条）
 
 
 class GridStrategy(Strategy):
@@ -71,9 +147,17 @@ class GridStrategy(Strategy):
         
         # 策略配置
         self.instrument_id = InstrumentId.from_str(config.instrument_id)
+        self.bar_type = BarType.from_str(config.bar_type) if config.bar_type else None
+        # 报价模式下的成交额只能来自逐笔成交
+        self.subscribe_trades = config.subscribe_trades or (
+            config.min_volume is not None and not config.bar_type
+        )
         self.grid_levels = config.grid_levels
         self.grid_spacing_type = config.grid_spacing_type
         self.grid_spacing = config.grid_spacing
+        self.min_profit_ratio = config.min_profit_ratio
+        self.min_spacing = 0.0                      # 相邻价位的最小间距比例（启动时按手续费计算）
+        self.level_quantities: Dict[float, float] = {}  # 网格价位 -> 每格下单数量
         
         # 价格范围
         self.upper_price = config.upper_price
@@ -94,17 +178,140 @@ class GridStrategy(Strategy):
         self.stop_loss_ratio = config.stop_loss_ratio
         self.take_profit_ratio = config.take_profit_ratio
         
+        # 下单前风控（未配置任何限制时不启用）
+        self.risk: Optional[RiskManager] = None
+        if (
+            config.max_drawdown is not None
+            or config.max_position_value is not None
+            or config.max_total_value is not None
+            or config.reserve_ratio > 0
+        ):
+            self.risk = RiskManager(
+                capital=config.total_amount,
+                max_position_value=config.max_position_value,
+                max_total_value=config.max_total_value,
+                max_drawdown=config.max_drawdown,
+                reserve_ratio=config.reserve_ratio,
+                on_event=self._on_risk_event,
+            )
+        
+        # 市场条件监控（未配置任何条件时不启用）
+        self.conditions: Optional[MarketConditionMonitor] = None
+        if (
+            config.max_volatility is not None
+            or config.min_volume is not None
+            or config.trend_threshold is not None
+            or config.volatility_spike is not None
+        ):
+            self.conditions = MarketConditionMonitor(
+                max_volatility=config.max_volatility,
+                min_volume=config.min_volume,
+                trend_threshold=config.trend_threshold,
+                volatility_spike=config.volatility_spike,
+                sample_secs=config.condition_sample_secs,
+                window_secs=config.condition_window_secs,
+                trend_window_secs=config.trend_window_secs,
+                spike_halflife_secs=config.spike_halflife_secs,
+                on_event=self._on_market_condition,
+            )
+        
+        # 自适应网格间距（按需启用，初始间距在网格初始化时确定）
+        self.adaptive_spacing = config.adaptive_spacing
+        self.spacing: Optional[VolatilitySpacing] = None
+        
+        # 订单限速与合并（按需启用）
+        self.scheduler: Optional[OrderScheduler] = None
+        if config.submit_rate_limit or config.cancel_rate_limit:
+            self.scheduler = OrderScheduler(
+                submit_fn=self._send_order,
+                cancel_fn=self.cancel_order,
+                batch_cancel_fn=self.cancel_orders,
+                submit_rate=config.submit_rate_limit,
+                cancel_rate=config.cancel_rate_limit,
+                burst=config.rate_limit_burst,
+            )
+        self._drain_pending = False                 # 是否已安排下一次发送
+        self._drain_alerts = 0                      # 已安排的发送定时器数（用于生成唯一名称）
+        self.reconcile_interval = config.reconcile_interval
+        
         # 内部状态
         self.grid_prices: List[float] = []          # 网格价格列表
         self.grid_orders: Dict[float, str] = {}     # 价格 -> 订单ID映射
         self.filled_grids: Set[float] = set()       # 已成交的网格价格
         self.active_orders: Dict[str, float] = {}   # 订单ID -> 价格映射
+        self.instrument = None                      # 交易工具（启动时从缓存获取）
+        self.fixed: Optional[FixedPoint] = None     # 品种精度下的定点数换算（启动时创建）
+        self.tick_size = 0.0                        # 最小价格单位
+        self._waiting_for_price = False             # 是否在等待首个价格以初始化网格
+        self._restored_orders: Optional[List[list]] = None  # 从检查点恢复的挂单 [价格, 方向, 数量]
+        self._restored_position = 0.0               # 从检查点恢复的净持仓
+        self.restored_order_ids: Set[str] = set()   # 为恢复检查点挂单而重新提交的网格订单
+        self.position_restore_order_id: Optional[str] = None  # 为恢复检查点持仓而提交的市价单
         
         # 统计信息
         self.total_trades = 0
         self.winning_trades = 0
         self.total_pnl = Decimal("0")
         
+        # 回调耗时统计（按需启用，未启用时无额外开销）
+        self.profiler: Optional[CallbackProfiler] = None
+        if config.enable_profiling:
+            self.profiler = CallbackProfiler()
+            self.profiler.instrument(
+                self, ["on_quote_tick", "on_bar", "on_order_filled", "_place_grid_order"]
+            )
+            
+        # 行情到下单的延迟遥测（按需启用）
+        self.latency: Optional[OrderLatencyTracker] = None
+        if config.latency_telemetry:
+            self.latency = OrderLatencyTracker()
+            self.latency_export_interval = config.latency_export_interval
+            self.latency_export_path = str(
+                Path(config.latency_export_dir) / f"{self.instrument_id.symbol}_latency.prom"
+            )
+            
+        # 运行指标（按需启用，快照由后台线程写出）
+        self.metrics: Optional[MetricsRegistry] = None
+        self.metrics_flusher: Optional[MetricsFlusher] = None
+        if config.enable_metrics:
+            self.metrics = MetricsRegistry()
+            self._m_orders = self.metrics.counter("orders_placed")
+            self._m_fills = self.metrics.counter("fills")
+            self._m_rejects = self.metrics.counter("rejects")
+            self._m_quotes = self.metrics.counter("quotes")
+            self._m_quote_rate = self.metrics.rate("quote_rate")
+            self._m_conflated = self.metrics.counter("quotes_conflated")
+            self._m_trades = self.metrics.counter("trades")
+            self._m_paused = self.metrics.gauge("grid_paused")
+            self._m_inventory = self.metrics.gauge("inventory")
+            self._m_open = {
+                OrderSide.BUY: self.metrics.gauge("open_orders_buy"),
+                OrderSide.SELL: self.metrics.gauge("open_orders_sell"),
+            }
+            self.metrics_flusher = MetricsFlusher(
+                self.metrics,
+                str(Path(config.metrics_dir) / f"{self.instrument_id.symbol}_metrics.jsonl"),
+                config.metrics_flush_interval,
+                clock=lambda: self.clock.timestamp_ns(),  # 与 quote_rate 记录使用同一时钟
+            )
+            
+        # 结构化事件日志（按需启用，格式化和写文件在后台线程）
+        self.events: Optional[EventLog] = None
+        if config.event_log:
+            self.events = EventLog(
+                str(Path(config.event_log_dir) / f"{self.instrument_id.symbol}_events.jsonl"),
+                GRID_EVENT_SCHEMAS,
+                max_bytes=config.event_log_max_bytes,
+                backup_count=config.event_log_backup_count,
+                sample=config.event_log_sample,
+            )
+        self._near_boundary = False                 # 价格是否处于网格边界附近（只在进入时告警）
+            
+        # 报价合并（需要事件循环，在 on_start 中创建）
+        self.quote_conflation = config.quote_conflation
+        self.conflation_max_age_ns = int(config.conflation_max_age_ms * 1_000_000)
+        self.conflator: Optional[QuoteConflator] = None
+        
     def on_start(self):
         """策略启动初始化"""
         self.log.info("=" * 50)
@@ -113,31 +320,78 @@ class GridStrategy(Strategy):
         self.log.info(f"总资金: {self.total_amount}")
         self.log.info("=" * 50)
         
-        # 订阅市场数据
-        self.subscribe_quote_ticks(self.instrument_id)
-        self.subscribe_trade_ticks(self.instrument_id)
+        self.instrument = self.cache.instrument(self.instrument_id)
+        if self.instrument is None:
+            self.log.error(f"找不到交易工具: {self.instrument_id}")
+            self.stop()
+            return
+        self.fixed = FixedPoint.from_instrument(self.instrument)
+        self.tick_size = float(self.instrument.price_increment)
+        if self.min_profit_ratio is not None:
+            self.min_spacing = min_spacing_ratio(self.min_profit_ratio, float(self.instrument.maker_fee))
+            
+        if self.risk:
+            if self.instrument.min_quantity is not None:
+                self.risk.min_quantity = float(self.instrument.min_quantity)
+            self.risk.size_increment = float(self.instrument.size_increment)
+        
+        # 订阅市场数据（只订阅策略用到的数据）
+        if self.bar_type:
+            self.subscribe_bars(self.bar_type)
+        else:
+            self.subscribe_quote_ticks(self.instrument_id)
+            if self.quote_conflation:
+                self._start_conflation()
+        if self.subscribe_trades:
+            self.subscribe_trade_ticks(self.instrument_id)
+        
+        if self.metrics_flusher:
+            self.metrics_flusher.start()
+        if self.events:
+            self.events.start()
+            
+        # 定期导出延迟指标
+        if self.latency:
+            self.clock.set_timer(
+                name="latency_export",
+                interval=timedelta(seconds=self.latency_export_interval),
+                callback=self._export_latency,
+            )
+        
+        # 定期与交易所挂单对账（断线重连后由执行引擎更新缓存，这里修复网格差异）
+        if self.reconcile_interval:
+            self.clock.set_timer(
+                name="reconcile_orders",
+                interval=timedelta(seconds=self.reconcile_interval),
+                callback=self.reconcile_orders,
+            )
         
         # 延迟初始化网格（等待市场数据）
-        self.clock.set_timer(
+        self.clock.set_time_alert(
             name="init_grid",
-            interval=timedelta(seconds=2),  # 2秒后
+            alert_time=self.clock.utc_now() + timedelta(seconds=2),  # 2秒后（只触发一次）
             callback=self._initialize_grid,
         )
         
     def _initialize_grid(self, event):
         """初始化网格"""
+        if self.latency and event is not None:
+            self.latency.on_event(event.ts_event, event.ts_init, self.clock.timestamp_ns())
+            
         # 获取当前价格
-        last_quote = self.cache.quote_tick(self.instrument_id)
-        if not last_quote:
-            self.log.error("无法获取当前价格，延迟初始化")
-            self.clock.set_timer(
-                name="init_grid_retry",
-                interval=timedelta(seconds=5),
-                callback=self._initialize_grid,
-            )
+        current_price = self._current_price()
+        if current_price is None:
+            # 等待首个价格到达后再初始化（见 on_quote_tick / on_bar）
+            self.log.warning("无法获取当前价格，等待行情后初始化")
+            self._waiting_for_price = True
             return
             
-        current_price = float(last_quote.ask_price.as_decimal() + last_quote.bid_price.as_decimal()) / 2
+        self._waiting_for_price = False
+        
+        # 从检查点恢复时直接重建持仓和挂单
+        if self._restored_orders is not None:
+            self._restore_from_checkpoint()
+            return
         
         # 计算价格范围
         if self.upper_price is None or self.lower_price is None:
@@ -149,34 +403,169 @@ class GridStrategy(Strategy):
         self.log.info(f"网格范围: {self.lower_price:.2f} - {self.upper_price:.2f}")
         
         # 计算网格价格
-        self._calculate_grid_prices()
+        self._calculate_grid_prices(current_price)
         
         # 设置初始订单
         self._setup_initial_orders(current_price)
         
-    def _calculate_grid_prices(self):
-        """计算网格价格列表"""
-        if self.grid_spacing_type == "arithmetic":
-            # 等差网格
-            self.grid_prices = np.linspace(
-                self.lower_price,
-                self.upper_price,
-                self.grid_levels
-            ).tolist()
+    def _restore_from_checkpoint(self):
+        """按检查点状态重建持仓和挂单"""
+        # 网格价位来自检查点，每格下单数量按当前品种精度重新计算（暂停后恢复挂单时使用）
+        quantities = level_quantities(
+            self.grid_prices, float(self.total_amount) / self.grid_levels, self.fixed.size_precision
+        )
+        self.level_quantities = dict(zip(self.grid_prices, quantities.tolist()))
+        
+        before = set(self.active_orders)
+        if self._restored_position:
+            # 以市价重建净持仓（成交价与检查点时的持仓均价会略有差异）
+            side = OrderSide.BUY if self._restored_position > 0 else OrderSide.SELL
+            order = self.order_factory.market(
+                instrument_id=self.instrument_id,
+                order_side=side,
+                quantity=self.instrument.make_qty(abs(self._restored_position)),
+            )
+            self.submit_order(order)
+            self.position_restore_order_id = order.client_order_id.value
+            
+        for price, side_name, quantity in self._restored_orders:
+            self._place_grid_order(price=price, side=OrderSide[side_name], quantity=quantity)
+        self.restored_order_ids.update(set(self.active_orders) - before)
+            
+        self.log.info(
+            f"已从检查点恢复: 持仓 {self._restored_position}, 挂单 {len(self._restored_orders)} 个"
+        )
+        self._restored_orders = None
+        self._restored_position = 0.0
+        
+    def _current_price(self) -> Optional[float]:
+        """当前价格：K线模式取最新收盘价，否则取最新报价中间价"""
+        if self.bar_type:
+            last_bar = self.cache.bar(self.bar_type)
+            return last_bar.close.as_double() if last_bar else None
+            
+        last_quote = self.cache.quote_tick(self.instrument_id)
+        if not last_quote:
+            return None
+        return raw_mid(last_quote.bid_price.raw, last_quote.ask_price.raw)
+        
+    def _calculate_grid_prices(self, current_price: float):
+        """
+        计算网格价格列表和每格下单数量
+        
+        未设置间距时在价格范围内均分，间距不足 min_spacing（双边手续费 + 最小利润率）的价位去掉；
+        设置了间距时以当前价格为中心展开（间距不小于 min_spacing），超出价格范围的价位丢弃。
+        价位对齐到最小价格单位，与订单价格的 as_double 完全相同，成交和撤单时按价位查找不受舍入影响。
+        """
+        if self.grid_spacing is None:
+            prices = bounded_ladder(self.lower_price, self.upper_price, self.grid_levels, self.grid_spacing_type)
+            min_ratio = self.min_spacing
         else:
-            # 等比网格
-            log_lower = np.log(self.lower_price)
-            log_upper = np.log(self.upper_price)
-            log_prices = np.linspace(log_lower, log_upper, self.grid_levels)
-            self.grid_prices = np.exp(log_prices).tolist()
+            self.grid_spacing = max(self.grid_spacing, self.min_spacing)
+            center = min(max(current_price, self.lower_price), self.upper_price)
+            prices = centered_ladder(center, self.grid_spacing, self.grid_levels, self.grid_spacing_type)
+            min_ratio = 0.0
+        ladder = make_ladder(
+            prices,
+            tick_size=self.tick_size,
+            price_precision=self.fixed.price_precision,
+            lower_price=self.lower_price,
+            upper_price=self.upper_price,
+            min_ratio=min_ratio,
+            amount_per_level=float(self.total_amount) / self.grid_levels,
+            size_precision=self.fixed.size_precision,
+        )
+        self.grid_prices = ladder.prices.tolist()
+        self.level_quantities = dict(zip(self.grid_prices, ladder.quantities.tolist()))
+        if ladder.dropped and self.grid_spacing is None:
+            self.log.warning(
+                f"网格间距不足 {self.min_spacing:.2%}（手续费 + 最小利润率），去掉 {ladder.dropped} 个价位"
+            )
+            
+        if self.adaptive_spacing and self.spacing is None:
+            # 初始间距: 配置值，未配置时取均分价格范围得到的间距
+            initial = self.grid_spacing
+            if initial is None:
+                if self.grid_spacing_type == "arithmetic":
+                    initial = (self.upper_price - self.lower_price) / (self.grid_levels - 1) / current_price
+                else:
+                    initial = (self.upper_price / self.lower_price) ** (1.0 / (self.grid_levels - 1)) - 1.0
+            config = self.config
+            self.spacing = VolatilitySpacing(
+                initial_spacing=initial,
+                multiplier=config.spacing_vol_multiplier,
+                horizon_secs=config.spacing_horizon_secs,
+                halflife_secs=config.spacing_halflife_secs,
+                min_spacing=max(config.min_grid_spacing, self.min_spacing),
+                max_spacing=config.max_grid_spacing,
+                threshold=config.spacing_update_threshold,
+            )
             
         self.log.info(f"网格价格计算完成: {len(self.grid_prices)} 个价格点")
         
+    def _respace_grid(self, spacing: float):
+        """
+        按新间距调整网格
+        
+        以离当前价格最近的挂单价位为锚点（保留其排队位置），其余价位按序号映射到新间距下的价格；
+        价格变化不足半个最小价格单位的挂单保留，其他挂单按原方向和数量撤销后在新价位重挂，
+        超出价格范围的价位只撤单。
+        """
+        current_price = self._current_price()
+        if current_price is None or not self.grid_prices:
+            return
+            
+        levels = self.grid_prices
+        anchors = [p for p in levels if p in self.grid_orders] or levels
+        anchor = min(anchors, key=lambda p: abs(p - current_price))
+        step = spacing_step(spacing, anchor, self.grid_spacing_type)
+        new_levels = snap_to_tick(
+            ladder_prices(anchor, levels.index(anchor), step, len(levels), self.grid_spacing_type),
+            self.tick_size,
+            self.fixed.price_precision,
+        ).tolist()
+        half_tick = self.tick_size / 2
+        
+        moves = []
+        for old, new in zip(levels, new_levels):
+            client_order_id = self.grid_orders.get(old)
+            in_range = self.lower_price <= new <= self.upper_price
+            if client_order_id is None or (abs(new - old) < half_tick and in_range):
+                continue
+            order = self.cache.order(ClientOrderId(client_order_id))
+            if order is None and self.scheduler:
+                order = self.scheduler.pending_order(client_order_id)
+            if order is None or order.is_closed:
+                continue
+            moves.append((old, new if in_range else None, order.side, float(order.leaves_qty)))
+            
+        # 保留的挂单沿用原价位作为新网格价位，新价位的每格数量按原每格投资额计算
+        self.grid_prices = [
+            old if old in self.grid_orders and abs(new - old) < half_tick else new
+            for old, new in zip(levels, new_levels)
+            if self.lower_price <= new <= self.upper_price
+        ]
+        amount_per_level = float(self.total_amount) / self.grid_levels
+        self.level_quantities = {
+            price: self.level_quantities.get(price) or amount_per_level / price for price in self.grid_prices
+        }
+        for old, new, side, quantity in moves:
+            self._cancel_grid_order(old)
+            if new is not None:
+                self._place_grid_order(price=new, side=side, quantity=quantity)
+                
+        self.log.info(
+            f"网格间距调整: {self.grid_spacing or 0:.4%} -> {spacing:.4%}, "
+            f"重挂 {sum(1 for m in moves if m[1] is not None)} 个, 撤销 {sum(1 for m in moves if m[1] is None)} 个"
+        )
+        self.grid_spacing = spacing
+        
     def _setup_initial_orders(self, current_price: float):
         """设置初始网格订单"""
-        # 计算每格投资额
-        amount_per_grid = float(self.total_amount) / self.grid_levels
-        
+        if self.conditions and self.conditions.paused:
+            self.log.warning(f"市场条件不满足（{'; '.join(self.conditions.reasons)}），暂缓挂单")
+            return
+            
         buy_orders_placed = 0
         sell_orders_placed = 0
         
@@ -184,13 +573,16 @@ class GridStrategy(Strategy):
             if abs(grid_price - current_price) / current_price < 0.001:
                 # 跳过太接近当前价格的网格
                 continue
+            if grid_price in self.grid_orders:
+                # 暂停后恢复时保留仍在挂单的价位
+                continue
                 
             if grid_price < current_price:
                 # 在当前价格下方放置买单
                 self._place_grid_order(
                     price=grid_price,
                     side=OrderSide.BUY,
-                    amount=amount_per_grid
+                    quantity=self.level_quantities[grid_price]
                 )
                 buy_orders_placed += 1
                 
@@ -198,47 +590,211 @@ class GridStrategy(Strategy):
                 # 在当前价格上方放置卖单
                 # 需要先检查是否有足够的基础货币
                 # 这里简化处理，实际应该根据持仓计算
-                quantity = amount_per_grid / grid_price
                 self._place_grid_order(
                     price=grid_price,
                     side=OrderSide.SELL,
-                    amount=amount_per_grid
+                    quantity=self.level_quantities[grid_price]
                 )
                 sell_orders_placed += 1
                 
         self.log.info(f"初始订单设置完成: {buy_orders_placed} 买单, {sell_orders_placed} 卖单")
         
-    def _place_grid_order(self, price: float, side: OrderSide, amount: float):
+    def _place_grid_order(self, price: float, side: OrderSide, quantity: float):
         """下网格订单"""
-        # 计算订单数量
-        quantity = amount / price if side == OrderSide.BUY else amount / price
+        if self.conditions and self.conditions.paused:
+            return
+            
+        # 下单前风控：超限时缩小或拒绝
+        if self.risk:
+            decision = self.risk.check(side, quantity, price)
+            if decision.action == BLOCK:
+                return
+            quantity = decision.quantity
         
         # 创建订单
         order = self.order_factory.limit(
             instrument_id=self.instrument_id,
             order_side=side,
-            quantity=Quantity.from_str(f"{quantity:.6f}"),
-            price=Price.from_str(f"{price:.2f}"),
+            quantity=self.fixed.quantity(quantity),
+            price=self.fixed.price(price),
             time_in_force=self.time_in_force,
             post_only=self.post_only,
         )
         
-        # 提交订单
-        self.submit_order(order)
+        # 提交订单（启用限速时进入队列，同价位的撤单+相同新单会被抵消）
+        if self.scheduler:
+            queued = self.scheduler.submit(order, price, self.clock.timestamp_ns())
+            self._schedule_drain()
+            if queued is not order:
+                # 与同价位排队中的撤单抵消，原订单继续有效
+                self.grid_orders[price] = queued.client_order_id.value
+                self.active_orders[queued.client_order_id.value] = price
+                return
+        else:
+            self._send_order(order)
+        if self.risk:
+            self.risk.on_order_submitted(order.client_order_id.value, side, float(order.quantity), price)
+        if self.metrics:
+            self._m_orders.inc()
+            self._m_open[side].inc()
         
         # 记录订单
         self.grid_orders[price] = order.client_order_id.value
         self.active_orders[order.client_order_id.value] = price
         
-        self.log.info(f"下单: {side.name} {quantity:.6f} @ {price:.2f}")
+        if self.events:
+            self.events.emit("order", self.clock.timestamp_ns(), order.client_order_id.value, side.name, quantity, price)
+        
+    def _send_order(self, order):
+        """向执行客户端发送订单"""
+        if self.latency:
+            self.latency.on_submit(order.client_order_id.value, self.clock.timestamp_ns())
+        self.submit_order(order)
         
+    def _cancel_grid_order(self, price: float):
+        """撤销某个网格价位上的订单"""
+        client_order_id = self.grid_orders.pop(price, None)
+        if not client_order_id:
+            return
+        self.active_orders.pop(client_order_id, None)
+        
+        order = self.cache.order(ClientOrderId(client_order_id))
+        if order is None:
+            # 尚未发出的订单只存在于限速队列中，直接出队并释放占用
+            pending = self.scheduler.pending_order(client_order_id) if self.scheduler else None
+            if pending is not None:
+                self.scheduler.cancel(pending, price, self.clock.timestamp_ns())
+                if self.risk:
+                    self.risk.on_order_closed(client_order_id)
+                if self.metrics:
+                    self._m_open[pending.side].dec()
+            return
+        if order.is_closed:
+            return
+            
+        if self.scheduler:
+            self.scheduler.cancel(order, price, self.clock.timestamp_ns())
+            self._schedule_drain()
+        else:
+            self.cancel_order(order)
+            
+    def _schedule_drain(self):
+        """队列中还有请求时，在下一个令牌可用的时刻安排一次发送"""
+        if self._drain_pending:
+            return
+        next_ns = self.scheduler.next_drain_ns(self.clock.timestamp_ns())
+        if next_ns is not None:
+            # 实盘时钟在回调执行期间仍保留当前定时器的名称，每次使用新名称
+            self._drain_pending = True
+            self._drain_alerts += 1
+            self.clock.set_time_alert_ns(
+                name=f"order_scheduler-{self._drain_alerts}",
+                alert_time_ns=next_ns,
+                callback=self._drain_scheduler,
+            )
+            
+    def _drain_scheduler(self, event):
+        """发送限速队列中的请求，并更新队列指标（定时器触发或收到行情时调用）"""
+        if event is not None:
+            self._drain_pending = False
+        self.scheduler.drain(self.clock.timestamp_ns())
+        self._schedule_drain()
+        if self.metrics:
+            self.metrics.gauge("order_queue_depth").set(self.scheduler.queue_depth)
+            self.metrics.gauge("order_queue_wait_p99_us").set(self.scheduler.wait_histogram.percentile(99) / 1000)
+
+    def reconcile_orders(self, event=None) -> Optional[ReconcilePlan]:
+        """
+        与交易所挂单对账，只修复差异（定时器触发、恢复运行时或重连后手动调用）
+
+        断线重连时执行引擎已批量拉取挂单和成交并更新缓存，
+        这里一次查询本策略的全部挂单，与网格逐价位比对后:
+        纳入网格外的挂单、撤掉多余挂单、补下丢失的挂单、补做漏处理的成交。
+        """
+        if not self.grid_prices or self.instrument is None:
+            return None
+
+        open_orders = self.cache.orders_open(instrument_id=self.instrument_id, strategy_id=self.id)
+        plan = plan_reconciliation(
+            self.active_orders,
+            open_orders,
+            lambda client_order_id: self.cache.order(ClientOrderId(client_order_id)),
+            self.grid_prices,
+            float(self.instrument.price_increment),
+        )
+        if not plan.changes:
+            return plan
+
+        # 网格外的挂单（断线期间发出、或同价位重复）：撤销
+        if self.scheduler:
+            now_ns = self.clock.timestamp_ns()
+            for order in plan.cancel:
+                self.scheduler.cancel(order, float(order.price), now_ns)
+            self._schedule_drain()
+        elif plan.cancel:
+            self.cancel_orders(plan.cancel)
+
+        # 网格价位空闲、交易所上却有挂单：纳入网格
+        for order, price in plan.adopt:
+            client_order_id = order.client_order_id.value
+            self.grid_orders[price] = client_order_id
+            self.active_orders[client_order_id] = price
+            if self.risk:
+                self.risk.on_order_submitted(client_order_id, order.side, float(order.leaves_qty), price)
+            if self.metrics:
+                self._m_open[order.side].inc()
+
+        # 漏处理的成交：补下反向订单
+        for order, price in plan.missed_fills:
+            client_order_id = order.client_order_id.value
+            filled_qty = float(order.filled_qty)
+            self.active_orders.pop(client_order_id, None)
+            if self.risk:
+                self.risk.on_fill(client_order_id, order.side, filled_qty, float(order.avg_px))
+            if self.metrics:
+                self._m_fills.inc()
+                self._m_inventory.inc(filled_qty if order.side == OrderSide.BUY else -filled_qty)
+                self._m_open[order.side].dec()
+            self.total_trades += 1
+            self._place_counter_order(order.side, float(order.avg_px), filled_qty)
+
+        # 已被撤销/过期/拒绝的网格订单：原价位按剩余数量重新下单
+        for client_order_id, price, side, quantity in plan.replace:
+            self.active_orders.pop(client_order_id, None)
+            if self.grid_orders.get(price) == client_order_id:
+                del self.grid_orders[price]
+            if self.risk:
+                self.risk.on_order_closed(client_order_id)
+            self._place_grid_order(price=price, side=side, quantity=quantity)
+
+        self.log.warning(f"挂单对账完成: {plan.summary()}")
+        return plan
+
     def on_order_filled(self, event: OrderFilled):
         """订单成交处理"""
+        if self.latency:
+            self.latency.on_event(event.ts_event, event.ts_init, self.clock.timestamp_ns())
+            
         # 获取成交价格和信息
         filled_price = float(event.last_px)
         filled_qty = float(event.last_qty)
         order_side = event.order_side
         
+        if self.risk:
+            self.risk.on_fill(event.client_order_id.value, order_side, filled_qty, filled_price)
+            
+        if self.metrics:
+            self._m_fills.inc()
+            self._m_inventory.inc(filled_qty if order_side == OrderSide.BUY else -filled_qty)
+            order = self.cache.order(event.client_order_id)
+            if order is not None and order.is_closed:
+                self._m_open[order_side].dec()
+        
+        if self.events:
+            self.events.emit(
+                "fill", event.ts_event, event.client_order_id.value, order_side.name, filled_qty, filled_price
+            )
+        
         # 移除已成交订单
         if event.client_order_id.value in self.active_orders:
             grid_price = self.active_orders.pop(event.client_order_id.value)
@@ -247,28 +803,30 @@ class GridStrategy(Strategy):
             self.total_trades += 1
             
             # 下反向订单
-            if order_side == OrderSide.BUY:
-                # 买单成交，下卖单
-                target_price = self._find_next_grid_price(filled_price, direction="up")
-                if target_price:
-                    self._place_grid_order(
-                        price=target_price,
-                        side=OrderSide.SELL,
-                        amount=filled_qty * target_price
-                    )
-                    
-            else:
-                # 卖单成交，下买单
-                target_price = self._find_next_grid_price(filled_price, direction="down")
-                if target_price:
-                    self._place_grid_order(
-                        price=target_price,
-                        side=OrderSide.BUY,
-                        amount=filled_qty * filled_price
-                    )
-                    
-            self.log.info(f"订单成交: {order_side.name} {filled_qty:.6f} @ {filled_price:.2f}")
+            self._place_counter_order(order_side, filled_price, filled_qty)
             
+    def _place_counter_order(self, order_side: OrderSide, filled_price: float, filled_qty: float):
+        """网格订单成交后，在相邻网格价位下反向订单"""
+        if order_side == OrderSide.BUY:
+            # 买单成交，下卖单
+            target_price = self._find_next_grid_price(filled_price, direction="up")
+            if target_price:
+                self._place_grid_order(
+                    price=target_price,
+                    side=OrderSide.SELL,
+                    quantity=filled_qty
+                )
+                
+        else:
+            # 卖单成交，下买单
+            target_price = self._find_next_grid_price(filled_price, direction="down")
+            if target_price:
+                self._place_grid_order(
+                    price=target_price,
+                    side=OrderSide.BUY,
+                    quantity=filled_qty * filled_price / target_price
+                )
+                
     def _find_next_grid_price(self, current_price: float, direction: str) -> Optional[float]:
         """找到下一个网格价格"""
         if direction == "up":
@@ -284,15 +842,188 @@ class GridStrategy(Strategy):
                     
         return None
         
+    def _start_conflation(self):
+        """创建报价合并器（回测没有运行中的事件循环，逐条处理）"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.log.warning("没有运行中的事件循环，报价合并未启用")
+            return
+        self.conflator = QuoteConflator(
+            self._handle_quote,
+            loop.call_soon,
+            max_age_ns=self.conflation_max_age_ns,
+            on_drop=self._m_conflated.inc if self.metrics else None,
+        )
+        
     def on_quote_tick(self, tick):
         """处理报价更新"""
-        # 检查是否需要调整网格范围
-        mid_price = float(tick.ask_price.as_decimal() + tick.bid_price.as_decimal()) / 2
+        # 市场条件和波动率在合并之前更新，保证实盘与回测看到相同的报价序列
+        if self.conditions or self.spacing:
+            mid_price = raw_mid(tick.bid_price.raw, tick.ask_price.raw)
+            if self.conditions:
+                self.conditions.update(tick.ts_event, mid_price)
+            if self.spacing:
+                new_spacing = self.spacing.update(tick.ts_event, mid_price)
+                if new_spacing is not None:
+                    self._respace_grid(new_spacing)
+        if self.conflator:
+            self.conflator.offer(tick, self.clock.timestamp_ns())
+        else:
+            self._handle_quote(tick)
+            
+    def _handle_quote(self, tick):
+        """处理报价（合并模式下只处理积压中的最新报价）"""
+        if self.latency:
+            self.latency.on_event(tick.ts_event, tick.ts_init, self.clock.timestamp_ns())
+        if self.metrics:
+            self._m_quotes.inc()
+            self._m_quote_rate.mark(self.clock.timestamp_ns())
+            
+        if self._waiting_for_price:
+            self._initialize_grid(None)
+        if self.scheduler and self.scheduler.queue_depth:
+            self._drain_scheduler(None)
+            
+        mid_price = raw_mid(tick.bid_price.raw, tick.ask_price.raw)
+        if self.risk:
+            self.risk.on_mark(mid_price)
+        self._check_price_range(mid_price)
         
-        if mid_price > self.upper_price * 0.95 or mid_price < self.lower_price * 1.05:
-            self.log.warning(f"价格接近网格边界: {mid_price:.2f}")
+    def on_trade_tick(self, tick):
+        """逐笔成交（只用于成交额统计）"""
+        if self.metrics:
+            self._m_trades.inc()
+        if self.conditions:
+            self.conditions.add_volume(tick.ts_event, tick.price.as_double() * tick.size.as_double())
+            
+    def on_bar(self, bar: Bar):
+        """处理K线更新（K线模式）"""
+        if self.latency:
+            self.latency.on_event(bar.ts_event, bar.ts_init, self.clock.timestamp_ns())
+        close = bar.close.as_double()
+        if self.conditions:
+            self.conditions.update(bar.ts_event, close)
+            self.conditions.add_volume(bar.ts_event, close * bar.volume.as_double())
+        if self.spacing:
+            new_spacing = self.spacing.update(bar.ts_event, close)
+            if new_spacing is not None:
+                self._respace_grid(new_spacing)
+            
+        if self._waiting_for_price:
+            self._initialize_grid(None)
+        if self.scheduler and self.scheduler.queue_depth:
+            self._drain_scheduler(None)
+            
+        if self.risk:
+            self.risk.on_mark(close)
+        self._check_price_range(close)
+        
+    def on_order_accepted(self, event: OrderAccepted):
+        """订单被交易所确认"""
+        if self.latency:
+            self.latency.on_ack(event.client_order_id.value, self.clock.timestamp_ns())
+            
+    def on_order_rejected(self, event: OrderRejected):
+        """订单被交易所拒绝"""
+        if self.latency:
+            self.latency.discard(event.client_order_id.value)
+        if self.metrics:
+            self._m_rejects.inc()
+        self._on_order_closed(event.client_order_id)
+            
+    def on_order_denied(self, event: OrderDenied):
+        """订单被风控拒绝（未发往交易所）"""
+        if self.latency:
+            self.latency.discard(event.client_order_id.value)
+        if self.metrics:
+            self._m_rejects.inc()
+        self._on_order_closed(event.client_order_id)
+            
+    def on_order_canceled(self, event: OrderCanceled):
+        """订单已撤销"""
+        self._on_order_closed(event.client_order_id)
+            
+    def on_order_expired(self, event: OrderExpired):
+        """订单已过期"""
+        self._on_order_closed(event.client_order_id)
+            
+    def _on_order_closed(self, client_order_id: ClientOrderId):
+        """未成交关闭的订单：释放所在网格价位，并从挂单数和风控占用中扣除"""
+        price = self.active_orders.pop(client_order_id.value, None)
+        if price is not None and self.grid_orders.get(price) == client_order_id.value:
+            # 被拒绝/过期的订单不再占用价位，之后恢复挂单或反向订单可以重新使用
+            del self.grid_orders[price]
+        if self.risk:
+            self.risk.on_order_closed(client_order_id.value)
+        if self.metrics:
+            order = self.cache.order(client_order_id)
+            if order is not None:
+                self._m_open[order.side].dec()
+            
+    def _on_market_condition(self, event: MarketConditionEvent):
+        """市场条件变化：暂停时撤销网格挂单，恢复时按当前价格重新挂单"""
+        if self.metrics:
+            self._m_paused.set(1 if event.kind == PAUSED else 0)
+        self.msgbus.publish(f"events.market.{self.id}", event)
+        
+        if event.kind == PAUSED:
+            self.log.warning(f"市场条件: {event.reason}，暂停网格")
+            for price in list(self.grid_orders):
+                self._cancel_grid_order(price)
+            return
+            
+        self.log.warning(f"市场条件: {event.reason}，恢复网格")
+        current_price = self._current_price()
+        if not self.grid_prices or current_price is None:
+            # 网格尚未初始化（启动时即处于暂停状态）
+            self._initialize_grid(None)
+        else:
+            self._setup_initial_orders(current_price)
+            
+    def _on_risk_event(self, event: RiskEvent):
+        """风险事件：记录日志并发布到消息总线"""
+        if event.kind == "drawdown_halt":
+            self.log.error(f"风控: {event.reason}")
+        else:
+            self.log.warning(
+                f"风控: {event.reason}, {event.side} {event.requested_qty:.6f} -> "
+                f"{event.allowed_qty:.6f} @ {event.price:.2f}"
+            )
+        self.msgbus.publish(f"events.risk.{self.id}", event)
+            
+    def _export_latency(self, event=None, lifetime: bool = False):
+        """导出延迟指标（Prometheus 文本格式）"""
+        try:
+            self.latency.export(
+                self.latency_export_path,
+                self.clock.timestamp_ns(),
+                labels={"strategy": str(self.id), "instrument": str(self.instrument_id)},
+                lifetime=lifetime,
+            )
+        except OSError as e:
+            self.log.warning(f"导出延迟指标失败: {e}")
+            
+    def _check_price_range(self, price: float):
+        """检查价格是否接近网格边界"""
+        if self.upper_price is None or self.lower_price is None:
+            # 网格尚未初始化
+            return
+            
+        near = price > self.upper_price * 0.95 or price < self.lower_price * 1.05
+        if near and self.events:
+            self.events.emit("near_boundary", self.clock.timestamp_ns(), price, self.lower_price, self.upper_price)
+        if near != self._near_boundary:
+            # 只在进入/离开边界区域时输出日志，避免每个报价都格式化一条告警
+            self._near_boundary = near
+            if near:
+                self.log.warning(f"价格接近网格边界: {price:.2f}")
             # TODO: 实现网格范围自动调整
             
+    def on_resume(self):
+        """恢复运行：先与交易所挂单对账，再继续处理行情"""
+        self.reconcile_orders()
+        
     def on_stop(self):
         """策略停止"""
         self.log.info("=" * 50)
@@ -300,15 +1031,87 @@ class GridStrategy(Strategy):
         self.log.info(f"总交易次数: {self.total_trades}")
         self.log.info(f"胜率: {self.winning_trades / max(self.total_trades, 1) * 100:.2f}%")
         self.log.info(f"总盈亏: {self.total_pnl}")
+        if self.profiler:
+            self.profiler.log_summary(self.log)
+        if self.latency:
+            # 停止时导出全程分位数（滚动窗口在回测结束时可能已不含任何订单）
+            self._export_latency(lifetime=True)
+            self.log.info(f"延迟指标已导出: {self.latency_export_path}")
+        if self.metrics_flusher:
+            self.metrics_flusher.stop()
         self.log.info("=" * 50)
         
         # 取消所有未成交订单
         self._cancel_all_orders()
+        if self.scheduler:
+            self.log.info(f"订单调度统计: {self.scheduler.summary()}")
+        if self.conflator:
+            self.log.info(f"报价合并统计: {self.conflator.summary()}")
+        if self.events:
+            self.events.stop()
+            self.log.info(f"事件日志: {self.events.path} {self.events.summary()}")
+        
+    def on_save(self) -> Dict[str, bytes]:
+        """保存策略状态（用于检查点与断点续跑）"""
+        open_orders = []
+        for client_order_id, price in self.active_orders.items():
+            order = self.cache.order(ClientOrderId(client_order_id))
+            if order is not None and not order.is_closed:
+                open_orders.append([price, order.side.name, float(order.leaves_qty)])
+                
+        state = {
+            "upper_price": self.upper_price,
+            "lower_price": self.lower_price,
+            "grid_prices": self.grid_prices,
+            "occupied_prices": list(self.grid_orders.keys()),
+            "filled_grids": sorted(self.filled_grids),
+            "orders": open_orders,
+            "position": float(self.portfolio.net_position(self.instrument_id)),
+            "total_trades": self.total_trades,
+            "winning_trades": self.winning_trades,
+            "total_pnl": str(self.total_pnl),
+        }
+        return {"grid": json.dumps(state).encode()}
+        
+    def on_load(self, state: Dict[str, bytes]):
+        """加载策略状态，启动后按状态重建持仓和挂单"""
+        if "grid" not in state:
+            return
+            
+        data = json.loads(state["grid"].decode())
+        self.upper_price = data["upper_price"]
+        self.lower_price = data["lower_price"]
+        self.grid_prices = data["grid_prices"]
+        # 挂单在启动后按 orders 重新提交，grid_orders 只记录实际下出的订单
+        # （恢复时被暂停或风控拦截的价位不能留下占位，否则之后永远不会再挂单）
+        self.grid_orders = {}
+        self.filled_grids = set(data["filled_grids"])
+        self.total_trades = data["total_trades"]
+        self.winning_trades = data["winning_trades"]
+        self.total_pnl = Decimal(data["total_pnl"])
+        
+        self._restored_orders = data["orders"]
+        self._restored_position = data["position"]
         
     def _cancel_all_orders(self):
         """取消所有未成交订单"""
-        # 使用策略的cancel_all_orders方法
-        self.cancel_all_orders(self.instrument_id)
+        if not self.scheduler:
+            # 使用策略的cancel_all_orders方法
+            self.cancel_all_orders(self.instrument_id)
+            return
+            
+        # 启用限速时：先丢弃尚未发出的新单，再按网格价位撤单，批量立即发出
+        for order in self.scheduler.drop_submits():
+            price = self.active_orders.pop(order.client_order_id.value, None)
+            if price is not None:
+                self.grid_orders.pop(price, None)
+            if self.risk:
+                self.risk.on_order_closed(order.client_order_id.value)
+            if self.metrics:
+                self._m_open[order.side].dec()
+        for price in list(self.grid_orders):
+            self._cancel_grid_order(price)
+        self.scheduler.flush_cancels(self.clock.timestamp_ns())
             
     def reset(self):
         """重置策略状态"""
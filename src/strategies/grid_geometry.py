@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+网格几何
+Vectorized grid ladders with tick snapping, minimum spacing and per-level sizing
+
+GridStrategy、SimpleGridStrategy 和向量化回测共用的网格价位计算:
+- ladder_prices / bounded_ladder / centered_ladder: 等差/等比价位（NumPy 向量化，
+  价格参数可以是数组，一次生成多条网格，结果形状为 (..., levels)）
+- snap_to_tick: 价位对齐到最小价格单位
+- enforce_min_spacing: 去除对齐后重复的价位，并保证相邻价位的间距覆盖双边手续费和最小利润率
+- level_quantities: 按每格投资额预先计算各价位的下单数量
+- make_ladder / make_ladders: 以上步骤的组合（make_ladders 用于参数扫描）
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from src.utils.fixed_point import snap
+
+
+# 比较间距时容忍的相对误差（对齐到最小价格单位后的价位相除会有舍入误差）
+_SPACING_TOLERANCE = 1e-9
+
+
+def ladder_prices(anchor_price, anchor_index: float, step, levels: int, spacing_type: str = "arithmetic") -> np.ndarray:
+    """
+    以 anchor_price 为第 anchor_index 个价位展开 levels 个升序价位
+
+    anchor_index 可以是小数（如 (levels-1)/2 使锚点落在两个价位中间）。
+    步长: 等差为价格差，等比为相邻价位的比值。
+    """
+    anchor = np.asarray(anchor_price, dtype=np.float64)[..., None]
+    step = np.asarray(step, dtype=np.float64)[..., None]
+    offsets = np.arange(levels) - anchor_index
+    if spacing_type == "arithmetic":
+        return anchor + offsets * step
+    return anchor * step ** offsets
+
+
+def bounded_ladder(lower_price, upper_price, levels: int, spacing_type: str = "arithmetic") -> np.ndarray:
+    """在价格范围内均分 levels 个价位（含两端，两端点精确）"""
+    lower = np.asarray(lower_price, dtype=np.float64)[..., None]
+    upper = np.asarray(upper_price, dtype=np.float64)[..., None]
+    if levels < 2:
+        return lower.copy()
+    t = np.arange(levels) / (levels - 1)
+    if spacing_type == "arithmetic":
+        prices = lower + (upper - lower) * t
+    else:
+        prices = lower * (upper / lower) ** t
+    prices[..., -1] = upper[..., 0]
+    return prices
+
+
+def centered_ladder(center_price, spacing, levels: int, spacing_type: str = "arithmetic") -> np.ndarray:
+    """以 center_price 为中心、按间距比例展开 levels 个价位"""
+    center = np.asarray(center_price, dtype=np.float64)
+    spacing = np.asarray(spacing, dtype=np.float64)
+    step = center * spacing if spacing_type == "arithmetic" else 1.0 + spacing
+    return ladder_prices(center, (levels - 1) / 2, step, levels, spacing_type)
+
+
+def snap_to_tick(prices, tick_size: float, price_precision: int) -> np.ndarray:
+    """价位四舍五入到最小价格单位的整数倍（结果与同精度 Price 的 as_double 相同）"""
+    prices = np.asarray(prices, dtype=np.float64)
+    return snap(np.rint(prices / tick_size) * tick_size, price_precision)
+
+
+def min_spacing_ratio(min_profit_ratio: float, fee_rate: float) -> float:
+    """相邻价位的最小间距比例: 一买一卖的双边手续费 + 最小利润率"""
+    return min_profit_ratio + 2.0 * fee_rate
+
+
+def enforce_min_spacing(prices, min_ratio: float = 0.0) -> np.ndarray:
+    """
+    去除重复价位，并从下往上保留与上一个保留价位间距不小于 min_ratio 的价位
+
+    价位本身满足要求时（常见情况）只做一次向量化检查。
+    """
+    prices = np.unique(np.asarray(prices, dtype=np.float64))
+    if len(prices) < 2 or min_ratio <= 0.0:
+        return prices
+    threshold = 1.0 + min_ratio * (1.0 - _SPACING_TOLERANCE)
+    if np.all(prices[1:] >= prices[:-1] * threshold):
+        return prices
+
+    kept = [prices[0]]
+    for price in prices[1:].tolist():
+        if price >= kept[-1] * threshold:
+            kept.append(price)
+    return np.array(kept)
+
+
+def level_quantities(prices, amount_per_level: float, size_precision: Optional[int] = None) -> np.ndarray:
+    """每个价位投入 amount_per_level 计价货币对应的数量（指定精度时四舍五入到数量精度）"""
+    quantities = amount_per_level / np.asarray(prices, dtype=np.float64)
+    if size_precision is not None:
+        quantities = snap(quantities, size_precision)
+    return quantities
+
+
+@dataclass
+class GridLadder:
+    """一条网格: 升序价位、各价位数量和因重复或间距不足去掉的价位数"""
+
+    prices: np.ndarray
+    quantities: np.ndarray
+    dropped: int = 0
+
+
+def make_ladder(
+    prices,
+    tick_size: Optional[float] = None,
+    price_precision: Optional[int] = None,
+    lower_price: Optional[float] = None,
+    upper_price: Optional[float] = None,
+    min_ratio: float = 0.0,
+    amount_per_level: float = 0.0,
+    size_precision: Optional[int] = None,
+) -> GridLadder:
+    """
+    对原始价位依次: 对齐最小价格单位 -> 丢弃价格范围外的价位 -> 去重并保证最小间距 -> 计算数量
+
+    价格范围的端点同样对齐到最小价格单位后比较，端点价位不会因对齐被丢弃。
+    """
+    prices = np.asarray(prices, dtype=np.float64).ravel()
+    count = len(prices)
+    if tick_size is not None:
+        prices = snap_to_tick(prices, tick_size, price_precision)
+    if lower_price is not None:
+        if tick_size is not None:
+            lower_price = float(snap_to_tick(lower_price, tick_size, price_precision))
+        prices = prices[prices >= lower_price]
+    if upper_price is not None:
+        if tick_size is not None:
+            upper_price = float(snap_to_tick(upper_price, tick_size, price_precision))
+        prices = prices[prices <= upper_price]
+    prices = enforce_min_spacing(prices, min_ratio)
+    return GridLadder(
+        prices=prices,
+        quantities=level_quantities(prices, amount_per_level, size_precision),
+        dropped=count - len(prices),
+    )
+
+
+def make_ladders(
+    lower_price,
+    upper_price,
+    levels: int,
+    spacing_type: str = "arithmetic",
+    total_amount: float = 0.0,
+    **options,
+) -> List[GridLadder]:
+    """
+    一次生成多条在价格范围内均分的网格（参数扫描用）
+
+    lower_price / upper_price 为等长数组（或标量，按 NumPy 规则广播），
+    价位生成和对齐对所有网格一起向量化计算；每格投资额为 total_amount / levels。
+    options 同 make_ladder（tick_size、price_precision、min_ratio、size_precision）。
+    """
+    lower, upper = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(lower_price, dtype=np.float64)),
+        np.atleast_1d(np.asarray(upper_price, dtype=np.float64)),
+    )
+    ladders = bounded_ladder(lower, upper, levels, spacing_type)
+    tick_size = options.pop("tick_size", None)
+    price_precision = options.pop("price_precision", None)
+    if tick_size is not None:
+        ladders = snap_to_tick(ladders, tick_size, price_precision)
+        lower = snap_to_tick(lower, tick_size, price_precision)
+        upper = snap_to_tick(upper, tick_size, price_precision)
+    return [
+        make_ladder(
+            row,
+            lower_price=lo,
+            upper_price=hi,
+            amount_per_level=total_amount / levels,
+            **options,
+        )
+        for row, lo, hi in zip(ladders, lower.tolist(), upper.tolist())
+    ]
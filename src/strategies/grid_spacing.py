@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+网格间距（固定间距与按波动率自适应间距）
+Fixed and volatility-adaptive grid spacing
+
+- spacing_step: 间距比例换算为 grid_geometry.ladder_prices 使用的步长
+- VolatilitySpacing: 按行情事件时间采样的 EWMA 已实现波动率估计间距，
+  估计值相对当前间距的偏离超过阈值时才给出新间距（每个行情 O(1)，不分配内存）
+"""
+
+import math
+from typing import Optional
+
+from src.risk.market_conditions import EwmaVariance, NANOS_PER_SECOND
+
+
+def spacing_step(spacing: float, reference_price: float, spacing_type: str = "arithmetic") -> float:
+    """间距比例换算为步长（等差: 参考价格 × 比例，等比: 1 + 比例）"""
+    if spacing_type == "arithmetic":
+        return reference_price * spacing
+    return 1.0 + spacing
+
+
+class VolatilitySpacing:
+    """
+    按已实现波动率自适应的网格间距
+
+    间距 = multiplier × 波动率（折算到 horizon_secs），限制在 [min_spacing, max_spacing]。
+    只有新估计相对当前间距偏离超过 threshold（比例）时 update 才返回新间距，避免频繁改单。
+
+    用法（策略内）:
+        new_spacing = spacing.update(tick.ts_event, mid_price)
+        if new_spacing is not None:
+            ...  # 按新间距调整网格
+    """
+
+    def __init__(
+        self,
+        initial_spacing: float,
+        multiplier: float = 1.0,
+        horizon_secs: int = 3_600,
+        halflife_secs: int = 3_600,
+        sample_secs: int = 60,
+        min_spacing: float = 0.001,
+        max_spacing: float = 0.05,
+        threshold: float = 0.25,
+        min_samples: int = 30,
+    ):
+        self.spacing = initial_spacing
+        self.multiplier = multiplier
+        self.min_spacing = min_spacing
+        self.max_spacing = max_spacing
+        self.threshold = threshold
+        self.min_samples = min_samples
+
+        self.sample_ns = sample_secs * NANOS_PER_SECOND
+        self.horizon_scale = math.sqrt(horizon_secs / sample_secs)
+        self.variance = EwmaVariance(halflife_secs / sample_secs)
+
+        self._bucket: Optional[int] = None
+        self._last_price = 0.0
+        self._sample_price = 0.0
+        self.updates = 0
+
+    @property
+    def target(self) -> float:
+        """当前波动率对应的间距（未限制偏离阈值）"""
+        raw = self.multiplier * math.sqrt(self.variance.value) * self.horizon_scale
+        return min(max(raw, self.min_spacing), self.max_spacing)
+
+    def update(self, ts_ns: int, price: float) -> Optional[float]:
+        """行情价格更新，间距需要调整时返回新间距"""
+        if self._bucket is None:
+            self._bucket = ts_ns // self.sample_ns
+            self._sample_price = self._last_price = price
+            return None
+        if ts_ns < (self._bucket + 1) * self.sample_ns:
+            self._last_price = price
+            return None
+
+        # 关闭已结束的采样区间（空白区间视为价格不变）
+        bucket = ts_ns // self.sample_ns
+        self.variance.update(math.log(self._last_price / self._sample_price))
+        gap = bucket - self._bucket - 1
+        if gap > 0:
+            # 连续 gap 个零收益率的 EWMA 更新合并为一次衰减
+            self.variance.value *= (1.0 - self.variance.alpha) ** gap
+            self.variance.count += gap
+        self._bucket = bucket
+        self._sample_price = self._last_price
+        self._last_price = price
+
+        if self.variance.count < self.min_samples:
+            return None
+        target = self.target
+        if abs(target / self.spacing - 1.0) <= self.threshold:
+            return None
+        self.spacing = target
+        self.updates += 1
+        return target
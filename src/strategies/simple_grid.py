@@ -6,15 +6,17 @@ Minimal Grid Trading Strategy for Testing
 
 from decimal import Decimal
 from typing import Optional, Dict, List
-import numpy as np
 
 from nautilus_trader.config import StrategyConfig
 from nautilus_trader.trading.strategy import Strategy
 from nautilus_trader.model.identifiers import InstrumentId
+from nautilus_trader.model.data import Bar, BarType
 from nautilus_trader.model.enums import OrderSide, OrderType, TimeInForce
-from nautilus_trader.model.objects import Price, Quantity
 from nautilus_trader.model.events import OrderFilled
 
+from src.strategies.grid_geometry import bounded_ladder, make_ladder
+from src.utils.fixed_point import FixedPoint, raw_mid
+
 
 class SimpleGridStrategyConfig(StrategyConfig):
     """极简网格策略配置"""
@@ -23,6 +25,7 @@ class SimpleGridStrategyConfig(StrategyConfig):
     upper_price: float
     lower_price: float
     grid_levels: int = 5
+    bar_type: Optional[str] = None  # 以K线作为价格来源（None表示使用报价）
 
 
 class SimpleGridStrategy(Strategy):
@@ -35,13 +38,16 @@ class SimpleGridStrategy(Strategy):
         super().__init__(config)
         
         self.instrument_id = InstrumentId.from_str(config.instrument_id)
+        self.bar_type = BarType.from_str(config.bar_type) if config.bar_type else None
         self.total_amount = Decimal(str(config.total_amount))
         self.grid_levels = config.grid_levels
         self.upper_price = config.upper_price
         self.lower_price = config.lower_price
         
-        # 网格价格
+        # 网格价格和每格数量
         self.grid_prices: List[float] = []
+        self.level_quantities: List[float] = []
+        self.fixed: Optional[FixedPoint] = None
         self.orders_placed = False
         
     def on_start(self):
@@ -50,45 +56,61 @@ class SimpleGridStrategy(Strategy):
         self.log.info(f"网格数量: {self.grid_levels}")
         self.log.info(f"价格范围: {self.lower_price} - {self.upper_price}")
         
-        # 订阅市场数据
-        self.subscribe_quote_ticks(self.instrument_id)
+        # 计算网格价格（对齐到最小价格单位）和每格数量
+        instrument = self.cache.instrument(self.instrument_id)
+        if instrument is None:
+            self.log.error(f"找不到交易工具: {self.instrument_id}")
+            self.stop()
+            return
+        self.fixed = FixedPoint.from_instrument(instrument)
+        ladder = make_ladder(
+            bounded_ladder(self.lower_price, self.upper_price, self.grid_levels),
+            tick_size=float(instrument.price_increment),
+            price_precision=instrument.price_precision,
+            amount_per_level=float(self.total_amount) / self.grid_levels,
+            size_precision=instrument.size_precision,
+        )
+        self.grid_prices = ladder.prices.tolist()
+        self.level_quantities = ladder.quantities.tolist()
         
-        # 计算网格价格
-        self.grid_prices = np.linspace(
-            self.lower_price,
-            self.upper_price,
-            self.grid_levels
-        ).tolist()
+        # 订阅市场数据
+        if self.bar_type:
+            self.subscribe_bars(self.bar_type)
+        else:
+            self.subscribe_quote_ticks(self.instrument_id)
         
     def on_quote_tick(self, tick):
         """处理报价"""
         # 只在第一次收到报价时下单
         if not self.orders_placed:
             self.orders_placed = True
-            self._place_initial_orders(tick)
+            mid_price = raw_mid(tick.bid_price.raw, tick.ask_price.raw)
+            self._place_initial_orders(mid_price)
             
-    def _place_initial_orders(self, tick):
+    def on_bar(self, bar: Bar):
+        """处理K线（K线模式）"""
+        # 只在第一次收到K线时下单
+        if not self.orders_placed:
+            self.orders_placed = True
+            self._place_initial_orders(float(bar.close))
+            
+    def _place_initial_orders(self, current_price: float):
         """放置初始订单"""
-        current_price = float(tick.ask_price.as_decimal() + tick.bid_price.as_decimal()) / 2
         self.log.info(f"当前价格: {current_price:.2f}, 开始放置网格订单")
         
-        # 每个网格的投资额
-        amount_per_grid = float(self.total_amount) / self.grid_levels
-        
         placed_count = 0
-        for grid_price in self.grid_prices:
+        for grid_price, quantity in zip(self.grid_prices, self.level_quantities):
             # 跳过太接近当前价格的网格
             if abs(grid_price - current_price) < 10:  # 10 USDT的缓冲区
                 continue
                 
             if grid_price < current_price:
                 # 在当前价格下方放置买单
-                quantity = amount_per_grid / grid_price
                 order = self.order_factory.limit(
                     instrument_id=self.instrument_id,
                     order_side=OrderSide.BUY,
-                    quantity=Quantity.from_str(f"{quantity:.6f}"),
-                    price=Price.from_str(f"{grid_price:.2f}"),
+                    quantity=self.fixed.quantity(quantity),
+                    price=self.fixed.price(grid_price),
                     time_in_force=TimeInForce.GTC,
                     post_only=False,  # 不使用POST_ONLY避免被拒绝
                 )
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+YAML配置的解析缓存
+Cached parsing and validation of YAML configs
+
+YAML解析（纯Python实现）和校验的结果以JSON缓存在 data/cache，
+配置文件的路径、大小、修改时间任一变化后缓存自动失效。
+命中缓存时不导入 yaml，只做一次JSON解析。
+"""
+
+import os
+import sys
+import json
+import hashlib
+from pathlib import Path
+from typing import Callable, Optional
+
+# 添加项目路径
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+
+# 缓存目录（固定在项目根目录下，与当前工作目录无关）
+CACHE_DIR = PROJECT_ROOT / "data" / "cache"
+
+# 缓存格式版本（校验规则变化时递增，使旧缓存失效）
+CACHE_VERSION = 1
+
+
+def _cache_path(path: str) -> Path:
+    """配置缓存路径（项目内的文件使用相对项目根目录的路径作为键）"""
+    stat = os.stat(path)
+    resolved = Path(path).resolve()
+    try:
+        name = resolved.relative_to(PROJECT_ROOT.resolve()).as_posix()
+    except ValueError:
+        name = resolved.as_posix()
+    key = f"{CACHE_VERSION}:{name}:{stat.st_size}:{stat.st_mtime_ns}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return Path(CACHE_DIR) / f"{Path(path).name}.{digest}.json"
+
+
+def load_yaml_config(path: str, validate: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    读取YAML配置（优先使用缓存）
+
+    validate 在解析后调用一次（不合法时应抛出 ValueError），
+    只有通过校验的配置才会写入缓存，命中缓存时不再重复校验。
+    """
+    cache_path = _cache_path(path)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    import yaml
+
+    with open(path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    if validate is not None:
+        validate(config)
+
+    tmp_path = cache_path.with_suffix(".tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(config, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError):
+        # 缓存只是加速手段，写入失败（如含日期等非JSON类型）时直接使用解析结果
+        tmp_path.unlink(missing_ok=True)
+    return config
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+定点数价格运算
+Fixed-point price and quantity arithmetic at instrument precision
+
+价格和数量以品种精度下的最小单位个数（整数）表示，例如精度2时 42000.12 -> 4200012。
+- 向量化函数处理整列数据（NumPy int64），标量函数和 FixedPoint 用于策略热路径
+- 与 Nautilus Price/Quantity 的 raw 值互转: raw = units * 10 ** (FIXED_PRECISION - precision)
+  （Nautilus 高精度模式下 raw 超出 int64 范围，只以 Python int 出现，不放进数组）
+- 浮点数只在入口（外部数据、配置）四舍五入一次，之后的比较、求和、求中间价都是整数运算，
+  不再经过 Decimal 和字符串格式化
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+from nautilus_trader.model.objects import FIXED_PRECISION, Price, Quantity
+
+
+# 10 的整数次幂（精确整数，避免 10.0 ** n 的浮点误差）
+_POW10 = tuple(10 ** i for i in range(FIXED_PRECISION + 1))
+
+# 两个 raw 值之和除以该值即为中间价（整数真除法，结果是正确舍入的浮点数）
+_RAW_MID_DIVISOR = 2 * _POW10[FIXED_PRECISION]
+
+
+def _round_units(value: float, precision: int) -> int:
+    """
+    浮点数 -> 定点整数（按浮点数的精确值四舍五入，与 Price.from_str(f"{value:.{precision}f}") 一致）
+
+    乘以 10**precision 只在结果恰好是 .5 时可能把舍入方向弄反（如 0.015 实为 0.01499...），
+    这种情况改用 round(value, precision)（按精确值做十进制舍入）。
+    """
+    scaled = value * _POW10[precision]
+    units = round(scaled)
+    if abs(scaled - units) == 0.5:
+        units = round(round(value, precision) * _POW10[precision])
+    return units
+
+
+# ---------- 向量化 ----------
+
+def to_units(values, precision: int) -> np.ndarray:
+    """浮点数组 -> 定点整数数组（四舍五入到精度，规则同 _round_units）"""
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * _POW10[precision]
+    units = np.rint(scaled)
+    ties = np.flatnonzero(np.abs(scaled - units) == 0.5)
+    units = units.astype(np.int64)
+    for i in ties.tolist():
+        units[i] = _round_units(float(values[i]), precision)
+    return units
+
+
+def from_units(units, precision: int) -> np.ndarray:
+    """定点整数数组 -> 浮点数组"""
+    return np.asarray(units, dtype=np.float64) / _POW10[precision]
+
+
+def snap(values, precision: int) -> np.ndarray:
+    """浮点数组四舍五入到精度（结果与同精度 Price/Quantity 的 as_double 完全相同）"""
+    return from_units(to_units(values, precision), precision)
+
+
+def units_to_raw(units, precision: int) -> List[int]:
+    """定点整数数组 -> Nautilus raw 值列表"""
+    factor = _POW10[FIXED_PRECISION - precision]
+    return [u * factor for u in np.asarray(units, dtype=np.int64).tolist()]
+
+
+def raw_to_units(raw_values: Sequence[int], precision: int) -> np.ndarray:
+    """Nautilus raw 值 -> 定点整数数组（raw 的精度不高于 precision 时是精确的）"""
+    factor = _POW10[FIXED_PRECISION - precision]
+    return np.array([raw // factor for raw in raw_values], dtype=np.int64)
+
+
+# ---------- 标量 ----------
+
+def raw_mid(bid_raw: int, ask_raw: int) -> float:
+    """由买一、卖一价的 raw 值计算中间价"""
+    return (bid_raw + ask_raw) / _RAW_MID_DIVISOR
+
+
+class FixedPoint:
+    """
+    单个品种的定点数换算（换算系数在创建时算好）
+
+    用法（策略内）:
+        fixed = FixedPoint.from_instrument(instrument)
+        fixed.price(42000.123)          # Price 42000.12，不经过字符串和 Decimal
+        fixed.quantity(0.0012345)       # Quantity 0.001234（四舍五入到 size_precision）
+        fixed.snap_price(42000.123)     # 42000.12，与下单价格的 as_double 相同，可用作价位键
+    """
+
+    __slots__ = ("price_precision", "size_precision", "price_scale", "_price_factor", "_size_factor")
+
+    def __init__(self, price_precision: int, size_precision: int):
+        self.price_precision = price_precision
+        self.size_precision = size_precision
+        self.price_scale = _POW10[price_precision]
+        self._price_factor = _POW10[FIXED_PRECISION - price_precision]
+        self._size_factor = _POW10[FIXED_PRECISION - size_precision]
+
+    @classmethod
+    def from_instrument(cls, instrument) -> "FixedPoint":
+        return cls(instrument.price_precision, instrument.size_precision)
+
+    def price_units(self, value: float) -> int:
+        return _round_units(value, self.price_precision)
+
+    def size_units(self, value: float) -> int:
+        return _round_units(value, self.size_precision)
+
+    def snap_price(self, value: float) -> float:
+        return _round_units(value, self.price_precision) / self.price_scale
+
+    def snap_prices(self, values) -> List[float]:
+        return snap(values, self.price_precision).tolist()
+
+    def price(self, value: float) -> Price:
+        return Price.from_raw(_round_units(value, self.price_precision) * self._price_factor, self.price_precision)
+
+    def price_from_units(self, units: int) -> Price:
+        return Price.from_raw(units * self._price_factor, self.price_precision)
+
+    def quantity(self, value: float) -> Quantity:
+        """数量四舍五入到 size_precision（与 Instrument.make_qty 一致，正数舍入为0时报错）"""
+        units = _round_units(value, self.size_precision)
+        if units <= 0 and value > 0:
+            raise ValueError(f"数量 {value} 按精度 {self.size_precision} 舍入后为0")
+        return Quantity.from_raw(units * self._size_factor, self.size_precision)
+
+    def quantity_from_units(self, units: int) -> Quantity:
+        return Quantity.from_raw(units * self._size_factor, self.size_precision)
@@ -0,0 +1,63 @@
+"""
+K线回测数据准备测试
+Tests for OHLC bar preparation
+"""
+
+import pandas as pd
+import pytest
+from nautilus_trader.test_kit.stubs.data import TestInstrumentProvider
+
+from src.backtest.bar_backtest import bar_spec_from_interval, create_bars, resample_ohlc
+
+
+@pytest.fixture
+def minute_ohlc():
+    index = pd.date_range("2024-01-01", periods=30, freq="1min", name="timestamp")
+    close = 100.0 + pd.Series(range(30), index=index, dtype=float)
+    return pd.DataFrame({
+        "open": close - 0.5,
+        "high": close + 1.0,
+        "low": close - 1.0,
+        "close": close,
+        "volume": 1.0,
+    })
+
+
+def test_bar_spec_from_interval():
+    assert bar_spec_from_interval(pd.Timedelta(minutes=1)) == "1-MINUTE"
+    assert bar_spec_from_interval(pd.Timedelta(minutes=90)) == "90-MINUTE"
+    assert bar_spec_from_interval(pd.Timedelta(hours=4)) == "4-HOUR"
+    assert bar_spec_from_interval(pd.Timedelta(days=1)) == "1-DAY"
+
+
+def test_resample_aggregates_ohlcv(minute_ohlc):
+    bars = resample_ohlc(minute_ohlc, pd.Timedelta(minutes=15))
+
+    assert len(bars) == 2
+    first = bars.iloc[0]
+    assert first["open"] == 99.5
+    assert first["high"] == 115.0
+    assert first["low"] == 99.0
+    assert first["close"] == 114.0
+    assert first["volume"] == 15.0
+
+
+def test_resample_rejects_finer_or_misaligned_interval(minute_ohlc):
+    with pytest.raises(ValueError):
+        resample_ohlc(minute_ohlc, pd.Timedelta(seconds=30))
+    with pytest.raises(ValueError):
+        resample_ohlc(minute_ohlc, pd.Timedelta(seconds=90))
+
+
+def test_create_bars_matches_spec(minute_ohlc):
+    instrument = TestInstrumentProvider.btcusdt_binance()
+
+    bar_type, bars = create_bars(minute_ohlc, instrument)
+    assert str(bar_type.spec) == "1-MINUTE-LAST"
+    assert len(bars) == 30
+
+    bar_type, bars = create_bars(minute_ohlc, instrument, "5-MINUTE")
+    assert len(bars) == 6
+    # ts_event 为K线收盘时间
+    assert pd.Timestamp(bars[0].ts_event, unit="ns") == pd.Timestamp("2024-01-01 00:05")
+    assert float(bars[0].close) == 104.0
@@ -0,0 +1,133 @@
+"""
+多分辨率K线金字塔测试
+Tests for the precomputed bar pyramid
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.backtest_with_real_data import analyze_price_range
+from src.data import quote_store
+from src.data.bar_pyramid import BarPyramid, SparseTable, build_pyramid, load_pyramid
+
+
+@pytest.fixture
+def quotes():
+    rng = np.random.default_rng(7)
+    # 三天、间隔不规则（0.2 ~ 20 秒）的报价
+    gaps = rng.integers(200_000_000, 20_000_000_000, 30_000)
+    index = pd.to_datetime(pd.Timestamp("2024-03-01 23:10").value + np.cumsum(gaps))
+    mid = 40000 + np.cumsum(rng.normal(0, 2, len(index)))
+    return pd.DataFrame(
+        {"bid_price": np.round(mid - 0.5, 2), "ask_price": np.round(mid + 0.5, 2)},
+        index=pd.DatetimeIndex(index, name="timestamp"),
+    )
+
+
+def brute_force(df, start, end):
+    lo = pd.Timestamp(start).floor("s")
+    hi = pd.Timestamp(end).floor("s") + pd.Timedelta(seconds=1)
+    window = df[(df.index >= lo) & (df.index < hi)]
+    return ((window["bid_price"] + window["ask_price"]) / 2).to_numpy()
+
+
+def test_sparse_table_range_queries():
+    values = np.random.default_rng(0).normal(size=100)
+    table = SparseTable(values, np.maximum)
+    for i, j in [(0, 1), (0, 100), (13, 14), (5, 77), (64, 100)]:
+        assert table.query(i, j) == values[i:j].max()
+
+
+def test_levels_match_resample(quotes):
+    pyramid = BarPyramid.from_quotes(quotes, price_precision=2)
+    mid = (quotes["bid_price"] + quotes["ask_price"]) / 2
+
+    for resolution, freq in [("1m", "1min"), ("1h", "1h"), ("1d", "1D")]:
+        expected = mid.resample(freq).agg(["first", "max", "min", "last", "count", "mean"])
+        expected = expected[expected["count"] > 0]
+        bars = pyramid.bars(resolution)
+        assert bars.index.equals(expected.index.rename("timestamp"))
+        assert bars["open"].tolist() == expected["first"].tolist()
+        assert bars["high"].tolist() == expected["max"].tolist()
+        assert bars["low"].tolist() == expected["min"].tolist()
+        assert bars["close"].tolist() == expected["last"].tolist()
+        assert bars["count"].tolist() == expected["count"].tolist()
+        np.testing.assert_allclose(bars["mean"], expected["mean"], rtol=1e-12)
+
+    hour = pyramid.bars("1h", "2024-03-02 05:30", "2024-03-02 08:00")
+    assert hour.index[0] == pd.Timestamp("2024-03-02 05:00")
+    assert hour.index[-1] == pd.Timestamp("2024-03-02 08:00")
+
+
+@pytest.mark.parametrize(
+    "start, end",
+    [
+        ("2024-03-02 00:00:00", "2024-03-03 23:59:59"),   # 整天
+        ("2024-03-01 23:47:13.5", "2024-03-03 02:03:07"),  # 跨天，两端不对齐
+        ("2024-03-02 10:01:02", "2024-03-02 10:04:59"),    # 一小时内
+        ("2024-03-02 10:00:03", "2024-03-02 10:00:58"),    # 一分钟内
+    ],
+)
+def test_window_stats_match_ticks(quotes, start, end):
+    pyramid = BarPyramid.from_quotes(quotes, price_precision=2)
+    mid = brute_force(quotes, start, end)
+
+    stats = pyramid.stats(start, end)
+    assert stats["count"] == len(mid)
+    assert stats["min"] == mid.min() and stats["max"] == mid.max()
+    assert stats["mean"] == pytest.approx(mid.mean(), rel=1e-12)
+    assert stats["std"] == pytest.approx(mid.std(ddof=1), rel=1e-6)
+    assert stats["range"] == round(mid.max() - mid.min(), 3)
+
+
+def test_window_stats_vectorized(quotes):
+    pyramid = BarPyramid.from_quotes(quotes, price_precision=2)
+    starts = pd.date_range("2024-03-02", periods=6, freq="6h")
+    ends = starts + pd.Timedelta(hours=6) - pd.Timedelta(seconds=1)
+    table = pyramid.window_stats(list(starts) + ["2030-01-01"], list(ends) + ["2030-01-02"])
+
+    for row, start, end in zip(table.itertuples(), starts, ends):
+        mid = brute_force(quotes, start, end)
+        assert row.count == len(mid)
+        assert row.min == mid.min() and row.max == mid.max()
+        assert row.mean == pytest.approx(mid.mean(), rel=1e-12)
+        assert row.std == pytest.approx(mid.std(ddof=1), rel=1e-6)
+    assert table["count"].iloc[-1] == 0 and np.isnan(table["mean"].iloc[-1])
+
+    with pytest.raises(ValueError):
+        pyramid.stats("2030-01-01", "2030-01-02")
+
+
+def test_analyze_price_range_with_pyramid(quotes):
+    pyramid = BarPyramid.from_quotes(quotes, price_precision=2)
+    direct, lower, upper = analyze_price_range(quotes, price_precision=2)
+    cached, cached_lower, cached_upper = analyze_price_range(quotes, price_precision=2, pyramid=pyramid)
+
+    assert cached["min"] == direct["min"] and cached["max"] == direct["max"]
+    assert cached["range"] == direct["range"]
+    assert cached["mean"] == pytest.approx(direct["mean"], rel=1e-12)
+    assert cached_lower == pytest.approx(lower, rel=1e-9)
+    assert cached_upper == pytest.approx(upper, rel=1e-9)
+
+
+def test_pyramid_cache(quotes, tmp_path, monkeypatch):
+    monkeypatch.setattr(quote_store, "CACHE_DIR", tmp_path / "cache")
+    path = tmp_path / "BTCUSDT_quotes.parquet"
+    quotes.to_parquet(path)
+
+    # 没有缓存时不会隐式读取整个文件构建
+    assert load_pyramid(str(path), price_precision=2) is None
+    assert not quote_store.CACHE_DIR.exists()
+
+    built = build_pyramid(str(path), price_precision=2)
+    assert len(list(quote_store.CACHE_DIR.glob("*.bars.npz"))) == 1
+    loaded = load_pyramid(str(path), price_precision=2)
+    assert loaded.stats() == built.stats()
+    for name, bars in built.levels.items():
+        assert loaded.bars(name).equals(built.bars(name))
+
+    # 不同价格精度是不同的缓存
+    assert load_pyramid(str(path), price_precision=1) is None
+    build_pyramid(str(path), price_precision=1)
+    assert len(list(quote_store.CACHE_DIR.glob("*.bars.npz"))) == 2
@@ -0,0 +1,56 @@
+"""
+基准对比逻辑测试
+Tests for benchmark baseline comparison
+"""
+
+import pandas as pd
+
+from src.backtest.benchmark import compare_results, measure, tile_frame
+
+
+def _results(median: float, cv: float = 0.0) -> dict:
+    return {"metrics": {"ticks": {"median": median, "cv": cv}}}
+
+
+def test_regression_beyond_threshold():
+    assert compare_results(_results(80.0), _results(100.0), threshold=0.15) == ["ticks"]
+    assert compare_results(_results(90.0), _results(100.0), threshold=0.15) == []
+
+
+def test_improvement_is_not_regression():
+    assert compare_results(_results(200.0), _results(100.0)) == []
+
+
+def test_noise_widens_tolerance():
+    # 两次测量各有 15% 波动，25% 的下降仍在噪声范围内
+    assert compare_results(_results(75.0, cv=0.15), _results(100.0, cv=0.15), threshold=0.15) == []
+
+
+def test_noise_tolerance_is_capped():
+    # 波动再大也不能掩盖 50% 的下降
+    current, baseline = _results(50.0, cv=0.5), _results(100.0, cv=0.5)
+    assert compare_results(current, baseline, threshold=0.15, max_tolerance=0.3) == ["ticks"]
+
+
+def test_missing_metric_is_skipped():
+    current = {"metrics": {}}
+    assert compare_results(current, _results(100.0)) == []
+
+
+def test_measure_statistics():
+    timings = iter([(100, 1.0), (100, 1.0), (100, 0.5), (100, 2.0)])
+    result = measure(lambda: next(timings), repeats=3, warmup=1)
+
+    assert result["median"] == 100.0
+    assert result["min"] == 50.0
+    assert result["max"] == 200.0
+    assert result["us_per_event"] == 1e4
+
+
+def test_tile_frame_shifts_timestamps():
+    index = pd.date_range("2024-01-01", periods=3, freq="1min")
+    tiled = tile_frame(pd.DataFrame({"x": [1, 2, 3]}, index=index), 2)
+
+    assert len(tiled) == 6
+    assert tiled.index.is_monotonic_increasing
+    assert tiled.index[3] == index[-1] + pd.Timedelta(minutes=1)
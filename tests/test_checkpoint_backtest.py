@@ -0,0 +1,63 @@
+"""
+可续跑回测的检查点测试
+Tests for checkpoint persistence and resumed snapshots
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+
+from src.backtest.checkpoint_backtest import _snapshot, load_checkpoint, save_checkpoint
+
+
+def _order(order_id: str, status: str):
+    return SimpleNamespace(client_order_id=SimpleNamespace(value=order_id), status=SimpleNamespace(name=status))
+
+
+def _engine(orders):
+    money = SimpleNamespace(as_decimal=lambda: Decimal("10000"))
+    portfolio = SimpleNamespace(
+        account=lambda venue: SimpleNamespace(balance_total=lambda ccy: money),
+        net_position=lambda instrument_id: 0,
+        unrealized_pnl=lambda instrument_id: None,
+    )
+    cache = SimpleNamespace(orders=lambda instrument_id: orders)
+    return SimpleNamespace(portfolio=portfolio, cache=cache)
+
+
+def test_checkpoint_round_trip(tmp_path):
+    assert load_checkpoint(str(tmp_path)) is None
+    save_checkpoint(str(tmp_path), {"next_row": 5000, "completed": False})
+    assert load_checkpoint(str(tmp_path)) == {"next_row": 5000, "completed": False}
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_snapshot_counts_continue_after_resume():
+    strategy = SimpleNamespace(
+        instrument_id="BTCUSDT.BINANCE",
+        total_trades=12,
+        restored_order_ids={"R-1", "R-2"},
+        position_restore_order_id="M-1",
+    )
+    orders = [
+        _order("M-1", "FILLED"),     # 恢复持仓的市价单
+        _order("R-1", "FILLED"),     # 恢复的挂单在续跑后成交
+        _order("R-2", "ACCEPTED"),
+        _order("N-1", "FILLED"),     # 续跑后的新订单
+    ]
+
+    snapshot = _snapshot(_engine(orders), strategy, "BINANCE", base={"orders": 20, "filled": 8})
+    assert snapshot["orders"] == 21
+    assert snapshot["filled"] == 10
+    assert snapshot["grid_trades"] == 12
+
+
+def test_snapshot_without_base():
+    strategy = SimpleNamespace(
+        instrument_id="BTCUSDT.BINANCE",
+        total_trades=0,
+        restored_order_ids=set(),
+        position_restore_order_id=None,
+    )
+    snapshot = _snapshot(_engine([_order("A", "FILLED"), _order("B", "ACCEPTED")]), strategy, "BINANCE")
+    assert snapshot["orders"] == 2
+    assert snapshot["filled"] == 1
@@ -0,0 +1,57 @@
+"""
+报价合并测试
+Tests for quote conflation
+"""
+
+from types import SimpleNamespace
+
+from src.live.conflation import QuoteConflator
+
+
+def make_tick(instrument: str, ts_init: int, bid: float = 100.0):
+    return SimpleNamespace(instrument_id=instrument, ts_init=ts_init, bid=bid)
+
+
+def make_conflator(max_age_ns: int = 1_000):
+    handled, scheduled, drops = [], [], []
+    conflator = QuoteConflator(
+        handler=lambda tick: handled.append((tick.instrument_id, tick.bid)),
+        schedule_fn=scheduled.append,
+        max_age_ns=max_age_ns,
+        on_drop=lambda: drops.append(1),
+    )
+    return conflator, handled, scheduled, drops
+
+
+def test_fresh_quotes_handled_inline():
+    conflator, handled, scheduled, _ = make_conflator()
+    conflator.offer(make_tick("BTC", 0, 1.0), now_ns=500)
+    conflator.offer(make_tick("BTC", 1_000, 2.0), now_ns=1_500)
+    assert handled == [("BTC", 1.0), ("BTC", 2.0)]
+    assert scheduled == []
+
+
+def test_backlog_keeps_latest_per_instrument():
+    conflator, handled, scheduled, drops = make_conflator()
+    conflator.offer(make_tick("BTC", 0, 1.0), now_ns=5_000)       # 积压
+    conflator.offer(make_tick("ETH", 0, 10.0), now_ns=5_000)
+    conflator.offer(make_tick("BTC", 4_900, 2.0), now_ns=5_000)   # 新鲜但前面仍有积压
+    conflator.offer(make_tick("BTC", 4_950, 3.0), now_ns=5_000)
+
+    assert handled == []
+    assert len(scheduled) == 1 and conflator.pending == 2
+
+    scheduled[0]()
+    assert handled == [("BTC", 3.0), ("ETH", 10.0)]
+    assert conflator.dropped == 2 and len(drops) == 2
+    assert conflator.summary() == {"received": 4, "dropped": 2, "flushes": 1}
+
+
+def test_flush_rearms_scheduling():
+    conflator, handled, scheduled, _ = make_conflator()
+    conflator.offer(make_tick("BTC", 0), now_ns=5_000)
+    scheduled.pop()()
+    conflator.offer(make_tick("BTC", 0), now_ns=5_000)
+    assert len(scheduled) == 1
+    conflator.offer(make_tick("BTC", 5_000), now_ns=5_000)
+    assert len(scheduled) == 1
@@ -0,0 +1,85 @@
+"""
+结构化事件日志测试
+Tests for the structured, size-rotated event log
+"""
+
+import json
+
+import pytest
+
+from src.live import run_grid_strategy as runner
+from src.monitoring.event_log import EventLog, parse_size
+
+
+SCHEMAS = {"fill": ("order_id", "side", "quantity", "price")}
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_parse_size():
+    assert parse_size("100MB") == 100 * 1024 ** 2
+    assert parse_size("512 kb") == 512 * 1024
+    assert parse_size("1.5GB") == int(1.5 * 1024 ** 3)
+    assert parse_size(4096) == 4096
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_events_formatted_on_flush(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = EventLog(str(path), SCHEMAS, flush_interval=60)
+    log.start()
+    log.emit("fill", 1, "O-1", "BUY", 0.5, 42000.0)
+    assert path.read_text() == ""            # emit 只入队
+    log.stop()
+
+    assert read_records(path) == [
+        {"ts": 1, "event": "fill", "order_id": "O-1", "side": "BUY", "quantity": 0.5, "price": 42000.0}
+    ]
+    assert log.summary()["written"] == 1
+
+
+def test_sampling_keeps_one_in_n(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = EventLog(str(path), SCHEMAS, sample={"fill": 10}, flush_interval=60)
+    log.start()
+    for i in range(25):
+        log.emit("fill", i, f"O-{i}", "SELL", 1.0, 100.0)
+    log.emit("other", 99)
+    log.stop()
+
+    assert [r["ts"] for r in read_records(path)] == [0, 10, 20, 99]
+    assert log.sampled_out == 22
+
+
+def test_rotates_by_size(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = EventLog(str(path), SCHEMAS, max_bytes=300, backup_count=2, flush_interval=60)
+    log.start()
+    for i in range(12):
+        log.emit("fill", i, f"O-{i}", "BUY", 1.0, 100.0)
+        log.flush()
+    log.stop()
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["events.jsonl", "events.jsonl.1", "events.jsonl.2"]
+    assert all(p.stat().st_size <= 300 for p in tmp_path.iterdir())
+    assert log.rotations >= 3
+    # 最新的事件在当前文件中
+    assert read_records(path)[-1]["ts"] == 11
+
+
+def test_logging_config_from_yaml():
+    config = runner.create_logging_config({
+        "level": "warning",
+        "file": "logs/grid_btcusdt.log",
+        "max_size": "10MB",
+        "backup_count": 3,
+    })
+    assert config.log_level == "WARNING"
+    assert config.log_directory == "logs"
+    assert config.log_file_name == "grid_btcusdt"
+    assert config.log_file_max_size == 10 * 1024 ** 2
+    assert config.log_file_max_backup_count == 3
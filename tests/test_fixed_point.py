@@ -0,0 +1,89 @@
+"""
+定点数价格运算测试
+Tests for fixed-point price arithmetic
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from nautilus_trader.model.objects import Price, Quantity
+from nautilus_trader.test_kit.providers import TestInstrumentProvider
+
+from src.backtest.backtest_with_real_data import analyze_price_range, create_quote_ticks
+from src.utils.fixed_point import (
+    FixedPoint,
+    from_units,
+    raw_mid,
+    raw_to_units,
+    snap,
+    to_units,
+    units_to_raw,
+)
+
+
+def test_vectorized_round_trip_matches_nautilus():
+    prices = np.array([42000.123, 41999.995, 0.01, 65432.1, 0.015])
+    units = to_units(prices, 2)
+    assert units.dtype == np.int64
+    assert units.tolist() == [4200012, 4200000, 1, 6543210, 1]
+    assert from_units(units, 2).tolist() == [42000.12, 42000.0, 0.01, 65432.1, 0.01]
+
+    raw = units_to_raw(units, 2)
+    assert raw == [Price.from_str(f"{p:.2f}").raw for p in prices]
+    assert raw_to_units(raw, 2).tolist() == units.tolist()
+    assert snap(prices, 2).tolist() == [Price.from_raw(r, 2).as_double() for r in raw]
+
+
+def test_scalar_helpers_match_instrument():
+    instrument = TestInstrumentProvider.btcusdt_binance()
+    fixed = FixedPoint.from_instrument(instrument)
+
+    for value in (42000.123, 41999.995, 100.0, 0.015, 0.025, 2.675):
+        assert fixed.price(value) == instrument.make_price(value)
+        assert fixed.snap_price(value) == instrument.make_price(value).as_double()
+    for value in (0.0012345, 1.5, 0.0000015):
+        assert fixed.quantity(value) == instrument.make_qty(value)
+
+    assert fixed.price_from_units(4200012) == Price.from_str("42000.12")
+    assert fixed.quantity_from_units(1234) == Quantity.from_str("0.001234")
+    with pytest.raises(ValueError):
+        fixed.quantity(0.0000001)
+
+
+def test_raw_mid_is_exact():
+    bid, ask = Price.from_str("42000.01"), Price.from_str("42000.02")
+    assert raw_mid(bid.raw, ask.raw) == 42000.015
+    # 浮点相加再减半会在最后一位产生偏差的情形
+    bid, ask = Price.from_str("0.1"), Price.from_str("0.2")
+    assert raw_mid(bid.raw, ask.raw) == 0.15
+
+
+def test_create_quote_ticks_from_raw():
+    instrument = TestInstrumentProvider.btcusdt_binance()
+    index = pd.date_range("2025-07-15", periods=3, freq="s", tz="UTC")
+    df = pd.DataFrame(
+        {
+            "bid_price": [42000.004, 42000.1, 41999.99],
+            "ask_price": [42000.016, 42000.2, 42000.0],
+            "bid_size": [0.5, 1.2345678, 2.0],
+            "ask_size": [0.25, 0.1, 3.0],
+        },
+        index=index,
+    )
+    ticks = create_quote_ticks(df, instrument)
+
+    assert [str(t.bid_price) for t in ticks] == ["42000.00", "42000.10", "41999.99"]
+    assert [str(t.ask_price) for t in ticks] == ["42000.02", "42000.20", "42000.00"]
+    assert str(ticks[1].bid_size) == "1.234568"
+    assert [t.ts_event for t in ticks] == index.asi8.tolist()
+    assert ticks[0].instrument_id == instrument.id
+
+
+def test_analyze_price_range_uses_exact_mid():
+    df = pd.DataFrame({"bid_price": [100.0, 101.0, 99.5], "ask_price": [100.02, 101.04, 99.51]})
+    stats, lower, upper = analyze_price_range(df, price_precision=2)
+
+    assert stats["min"] == 99.505
+    assert stats["max"] == 101.02
+    assert stats["range"] == pytest.approx(1.515)
+    assert lower < stats["mean"] < upper
@@ -0,0 +1,114 @@
+"""
+网格几何测试
+Tests for the shared grid-geometry helpers
+"""
+
+import numpy as np
+import pytest
+
+from src.backtest.vectorized_grid import grid_levels
+from src.strategies.grid_geometry import (
+    bounded_ladder,
+    centered_ladder,
+    enforce_min_spacing,
+    ladder_prices,
+    level_quantities,
+    make_ladder,
+    make_ladders,
+    min_spacing_ratio,
+    snap_to_tick,
+)
+
+
+def test_bounded_ladder_matches_linspace():
+    assert bounded_ladder(100.0, 200.0, 11) == pytest.approx(np.linspace(100.0, 200.0, 11))
+    geometric = bounded_ladder(100.0, 200.0, 11, "geometric")
+    assert geometric == pytest.approx(np.exp(np.linspace(np.log(100.0), np.log(200.0), 11)))
+    assert geometric[-1] == 200.0
+    assert grid_levels(100.0, 200.0, 11, "geometric").tolist() == geometric.tolist()
+
+
+def test_centered_ladder_uses_spacing():
+    prices = centered_ladder(100.0, 0.01, 4)
+    assert prices == pytest.approx([98.5, 99.5, 100.5, 101.5])
+
+    prices = centered_ladder(100.0, 0.01, 5, "geometric")
+    assert prices[2] == pytest.approx(100.0)
+    assert prices[3] / prices[2] == pytest.approx(1.01)
+
+
+def test_ladder_keeps_anchor_level():
+    prices = ladder_prices(100.0, 3, 2.0, 6)
+    assert prices[3] == 100.0
+    assert prices == pytest.approx([94.0, 96.0, 98.0, 100.0, 102.0, 104.0])
+
+
+def test_many_ladders_at_once():
+    lower = np.array([90.0, 95.0, 99.0])
+    upper = np.array([110.0, 105.0, 101.0])
+    ladders = bounded_ladder(lower, upper, 5)
+    assert ladders.shape == (3, 5)
+    for row, lo, hi in zip(ladders, lower, upper):
+        assert row == pytest.approx(np.linspace(lo, hi, 5))
+
+    np.testing.assert_allclose(
+        centered_ladder(np.array([100.0, 200.0]), 0.01, 3), [[99.0, 100.0, 101.0], [198.0, 200.0, 202.0]]
+    )
+
+
+def test_snap_to_tick_and_dedupe():
+    prices = snap_to_tick([100.12, 100.37, 100.38, 100.62], 0.25, 2)
+    assert prices.tolist() == [100.0, 100.25, 100.5, 100.5]
+    assert enforce_min_spacing(prices).tolist() == [100.0, 100.25, 100.5]
+
+
+def test_min_spacing_covers_fees():
+    assert min_spacing_ratio(0.002, 0.001) == pytest.approx(0.004)
+
+    prices = np.array([100.0, 100.3, 100.5, 100.9, 101.0, 101.5])
+    kept = enforce_min_spacing(prices, 0.004)
+    assert kept.tolist() == [100.0, 100.5, 101.0, 101.5]
+    assert np.all(kept[1:] / kept[:-1] - 1 >= 0.004 - 1e-12)
+
+    # 恰好等于最小间距的价位保留（不受浮点相除的舍入误差影响）
+    assert enforce_min_spacing([100.0, 100.4, 100.8016], 0.004).tolist() == [100.0, 100.4, 100.8016]
+
+
+def test_level_quantities_rounded_to_size_precision():
+    quantities = level_quantities([40000.0, 50000.0], 100.0, size_precision=5)
+    assert quantities.tolist() == [0.0025, 0.002]
+    assert level_quantities([3.0], 1.0, size_precision=3).tolist() == [0.333]
+
+
+def test_make_ladder_pipeline():
+    raw = bounded_ladder(100.004, 101.0, 21)
+    ladder = make_ladder(
+        raw,
+        tick_size=0.01,
+        price_precision=2,
+        lower_price=100.004,
+        upper_price=101.0,
+        min_ratio=0.001,
+        amount_per_level=50.0,
+        size_precision=4,
+    )
+    # 对齐后下端点 100.00 仍在范围内；0.05 的步长不足 0.1%，隔一个价位保留
+    assert ladder.prices[0] == 100.0 and ladder.prices[-1] == 101.0
+    assert np.all(np.diff(ladder.prices) >= 0.1 - 1e-9)
+    assert ladder.dropped == 21 - len(ladder.prices)
+    assert ladder.quantities.tolist() == [round(50.0 / p, 4) for p in ladder.prices]
+
+
+def test_make_ladders_for_sweeps():
+    ladders = make_ladders(
+        [40000.0, 41000.0],
+        45000.0,
+        levels=11,
+        total_amount=1100.0,
+        tick_size=0.01,
+        price_precision=2,
+        size_precision=6,
+    )
+    assert [len(ladder.prices) for ladder in ladders] == [11, 11]
+    assert ladders[0].prices[0] == 40000.0 and ladders[1].prices[-1] == 45000.0
+    assert ladders[1].quantities[0] == round(100.0 / 41000.0, 6)
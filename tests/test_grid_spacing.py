@@ -0,0 +1,87 @@
+"""
+网格间距测试
+Tests for volatility-adaptive grid spacing
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategies.grid_spacing import VolatilitySpacing
+
+
+MINUTE = 60 * 1_000_000_000
+
+
+def feed(spacing, returns, start_minute=0, price=100.0):
+    """每分钟一个报价，返回所有非None的新间距"""
+    changes = []
+    for i, r in enumerate(returns):
+        price *= np.exp(r)
+        new = spacing.update((start_minute + i) * MINUTE, price)
+        if new is not None:
+            changes.append(new)
+    return changes, price
+
+
+def test_spacing_follows_volatility_past_threshold():
+    spacing = VolatilitySpacing(initial_spacing=0.01, horizon_secs=3600, halflife_secs=1800, min_samples=30)
+    rng = np.random.default_rng(0)
+
+    # 每分钟 0.13% 波动 -> 小时波动率约 1%，与初始间距一致，不调整
+    changes, price = feed(spacing, rng.normal(0, 0.0013, 120))
+    assert changes == []
+
+    # 波动放大3倍 -> 间距随估计值逐级扩大（每级超过25%），不来回调整
+    changes, _ = feed(spacing, rng.normal(0, 0.004, 120), start_minute=120, price=price)
+    assert changes == sorted(changes)
+    assert all(b / a > 1.25 for a, b in zip([0.01] + changes, changes))
+    assert spacing.spacing == pytest.approx(0.03, rel=0.25)
+
+
+def test_spacing_clamped_and_gap_decays():
+    spacing = VolatilitySpacing(initial_spacing=0.01, max_spacing=0.02, halflife_secs=600, min_samples=5)
+    changes, price = feed(spacing, [0.02, -0.02] * 10)
+    assert changes[-1] == 0.02
+
+    variance = spacing.variance.value
+    spacing.update(200 * MINUTE, price)    # 行情中断约3小时，按零收益率衰减
+    assert spacing.variance.value < variance * 1e-3
+
+
+def test_adaptive_grid_respaces_in_backtest():
+    from nautilus_trader.test_kit.providers import TestInstrumentProvider
+
+    from src.backtest.backtest_with_real_data import create_quote_ticks
+    from src.backtest.benchmark import _create_engine
+    from src.strategies.grid import GridStrategy, GridStrategyConfig
+
+    instrument = TestInstrumentProvider.btcusdt_binance()
+    rng = np.random.default_rng(0)
+    n = 6 * 360
+    sigma = np.where(np.arange(n) < n // 2, 0.0002, 0.002)   # 后半段波动放大10倍
+    mid = 42000 * np.exp(np.cumsum(rng.normal(0, sigma)))
+    index = pd.date_range("2024-01-01", periods=n, freq="10s")
+    quotes = pd.DataFrame(
+        {"bid_price": mid - 1, "ask_price": mid + 1, "bid_size": 1.0, "ask_size": 1.0}, index=index
+    )
+
+    engine = _create_engine(instrument)
+    engine.add_data(create_quote_ticks(quotes, instrument))
+    strategy = GridStrategy(GridStrategyConfig(
+        instrument_id=str(instrument.id),
+        total_amount=2000.0,
+        grid_levels=10,
+        grid_spacing=0.002,
+        upper_price=60000.0,
+        lower_price=30000.0,
+        adaptive_spacing=True,
+    ))
+    engine.add_strategy(strategy)
+    engine.run()
+
+    assert strategy.spacing.updates >= 1
+    assert strategy.grid_spacing > 0.004
+    gaps = np.diff(strategy.grid_prices)
+    assert gaps.min() > 0
+    engine.dispose()
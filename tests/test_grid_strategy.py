@@ -0,0 +1,141 @@
+"""
+网格策略回测测试
+Backtest-level tests for GridStrategy order bookkeeping
+"""
+
+import numpy as np
+import pandas as pd
+from nautilus_trader.model.identifiers import ClientOrderId
+from nautilus_trader.test_kit.providers import TestInstrumentProvider
+from nautilus_trader.test_kit.stubs.events import TestEventStubs
+
+from src.backtest.backtest_with_real_data import create_quote_ticks
+from src.backtest.benchmark import _create_engine
+from src.risk.market_conditions import PAUSED, RESUMED, MarketConditionEvent
+from src.strategies.grid import GridStrategy, GridStrategyConfig
+
+
+INSTRUMENT = TestInstrumentProvider.btcusdt_binance()
+
+
+def make_quotes(n=720, start="2024-01-01", seed=0):
+    rng = np.random.default_rng(seed)
+    mid = 42000 * np.exp(np.cumsum(rng.normal(0, 0.0003, n)))
+    index = pd.date_range(start, periods=n, freq="10s")
+    return pd.DataFrame(
+        {"bid_price": mid - 1, "ask_price": mid + 1, "bid_size": 1.0, "ask_size": 1.0}, index=index
+    )
+
+
+def make_strategy(grid_levels=10, **kwargs):
+    return GridStrategy(GridStrategyConfig(
+        instrument_id=str(INSTRUMENT.id),
+        total_amount=2000.0,
+        grid_levels=grid_levels,
+        upper_price=44000.0,
+        lower_price=40000.0,
+        **kwargs,
+    ))
+
+
+def run_chunk(engine, quotes):
+    engine.clear_data()
+    engine.add_data(create_quote_ticks(quotes, INSTRUMENT))
+    engine.run(streaming=True)
+
+
+def condition(strategy, kind):
+    strategy.conditions.paused = kind == PAUSED
+    strategy._on_market_condition(MarketConditionEvent(kind, "test", strategy.clock.timestamp_ns()))
+
+
+def test_checkpoint_resume_then_pause_and_resume():
+    quotes = make_quotes()
+    first, second, third = quotes.iloc[:240], quotes.iloc[240:480], quotes.iloc[480:]
+
+    engine = _create_engine(INSTRUMENT)
+    strategy = make_strategy()
+    engine.add_strategy(strategy)
+    run_chunk(engine, first)
+    state = strategy.save()
+    assert strategy.grid_orders
+    engine.end()
+    engine.dispose()
+
+    # 以检查点续跑，启动时市场条件处于暂停状态：恢复的挂单全部被拦截
+    engine = _create_engine(INSTRUMENT)
+    # 采样间隔取一天，测试期间市场条件不会自行改变
+    restored = make_strategy(max_volatility=1e9, condition_sample_secs=86400)
+    engine.add_strategy(restored)
+    restored.load(state)
+    assert restored.grid_orders == {}
+    restored.conditions.paused = True
+    run_chunk(engine, second)
+    assert restored._restored_orders is None
+    assert restored.grid_orders == {}
+    assert set(restored.level_quantities) == set(restored.grid_prices)
+
+    # 市场条件恢复后，所有价位（除贴近当前价格的）重新挂单
+    condition(restored, RESUMED)
+    placed = dict(restored.grid_orders)
+    assert len(placed) >= len(restored.grid_prices) - 1
+
+    condition(restored, PAUSED)
+    assert restored.grid_orders == {}
+    condition(restored, RESUMED)
+    assert set(restored.grid_orders) == set(placed)
+
+    run_chunk(engine, third)
+    engine.end()
+    engine.dispose()
+
+
+def test_rejected_and_expired_orders_release_their_level():
+    engine = _create_engine(INSTRUMENT)
+    strategy = make_strategy()
+    engine.add_strategy(strategy)
+    run_chunk(engine, make_quotes(n=60))
+    placed = dict(strategy.grid_orders)
+    (rejected_price, rejected_id), (expired_price, expired_id) = list(placed.items())[:2]
+
+    strategy.on_order_rejected(TestEventStubs.order_rejected(strategy.cache.order(ClientOrderId(rejected_id))))
+    strategy.on_order_expired(TestEventStubs.order_expired(strategy.cache.order(ClientOrderId(expired_id))))
+    assert rejected_price not in strategy.grid_orders and expired_price not in strategy.grid_orders
+    assert rejected_id not in strategy.active_orders and expired_id not in strategy.active_orders
+
+    # 下次挂单（如暂停后恢复）时这两个价位重新下单
+    strategy._setup_initial_orders(strategy._current_price())
+    assert set(strategy.grid_orders) == set(placed)
+    assert strategy.grid_orders[rejected_price] != rejected_id
+
+    engine.end()
+    engine.dispose()
+
+
+def test_min_spacing_is_opt_in():
+    quotes = make_quotes(n=30)
+    counts = {}
+    for ratio in (None, 0.002):
+        engine = _create_engine(INSTRUMENT)
+        strategy = make_strategy(grid_levels=100, min_profit_ratio=ratio)
+        engine.add_strategy(strategy)
+        run_chunk(engine, quotes)
+        counts[ratio] = len(strategy.grid_prices)
+        engine.end()
+        engine.dispose()
+
+    # 默认不按手续费约束间距（40 USDT 的间距约 0.1%，小于 双边手续费 + 0.2%）
+    assert counts[None] == 100
+    assert counts[0.002] < 100
+
+
+def test_profiling_times_engine_callbacks():
+    engine = _create_engine(INSTRUMENT)
+    strategy = make_strategy(enable_profiling=True)
+    engine.add_strategy(strategy)
+    run_chunk(engine, make_quotes(n=60))
+    engine.end()
+
+    summary = strategy.profiler.summary()
+    assert summary["on_quote_tick"]["count"] == 60
+    engine.dispose()
@@ -0,0 +1,131 @@
+"""
+延迟直方图与订单延迟追踪测试
+Tests for latency histograms and the order latency tracker
+"""
+
+import pytest
+
+from src.monitoring.latency import OrderLatencyTracker, RollingHistogram
+from src.monitoring.profiling import LatencyHistogram
+
+
+SECOND = 1_000_000_000
+
+
+def test_small_values_are_exact():
+    hist = LatencyHistogram(significant_bits=7)
+    for value in range(1, 101):
+        hist.record(value)
+
+    assert hist.percentile(50) == 50
+    assert hist.percentile(99) == 99
+    assert hist.percentile(100) == 100
+    assert hist.summary()["min"] == 1
+    assert hist.mean() == pytest.approx(50.5)
+
+
+def test_large_values_within_relative_error():
+    hist = LatencyHistogram(significant_bits=7)
+    values = [1_000 * i for i in range(1, 1001)]
+    for value in values:
+        hist.record(value)
+
+    for q in (50, 90, 99):
+        expected = values[int(len(values) * q / 100) - 1]
+        assert abs(hist.percentile(q) - expected) / expected < 1 / 2 ** 7
+
+
+def test_bucket_index_round_trip():
+    hist = LatencyHistogram(significant_bits=4)
+    for value in (0, 15, 31, 32, 1000, 123_456, hist.max_value):
+        upper = hist._value_at(hist._index(value))
+        assert upper >= value
+        assert upper - value <= max(1, value >> 4)
+
+
+def test_out_of_range_values_are_clamped():
+    hist = LatencyHistogram(max_bits=20)
+    hist.record(-5)
+    hist.record(1 << 30)
+
+    assert hist.min_value == 0
+    assert hist.max_recorded == hist.max_value
+
+
+def test_merge_and_reset():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.record(10)
+    b.record(1_000)
+    b.record(5)
+    a.merge(b)
+
+    assert a.total_count == 3
+    assert a.min_value == 5
+    assert a.max_recorded == 1_000
+
+    a.reset()
+    assert a.total_count == 0
+    assert a.percentile(50) == 0
+
+    with pytest.raises(ValueError):
+        a.merge(LatencyHistogram(significant_bits=3))
+
+
+def test_rolling_histogram_expires_old_slots():
+    hist = RollingHistogram(window_secs=60, slots=6)
+    hist.record(100, now_ns=0)
+    hist.record(200, now_ns=30 * SECOND)
+
+    assert hist.snapshot(30 * SECOND).total_count == 2
+    assert hist.snapshot(65 * SECOND).total_count == 1
+    assert hist.snapshot(200 * SECOND).total_count == 0
+
+
+def _ack_order(tracker, order_id, t0, decision_ns, ack_ns):
+    tracker.on_event(t0, t0, t0)
+    tracker.on_submit(order_id, t0 + decision_ns)
+    tracker.on_ack(order_id, t0 + decision_ns + ack_ns)
+
+
+def test_tracker_stages():
+    tracker = OrderLatencyTracker()
+    tracker.on_event(ts_event=0, ts_init=1_000, handle_ns=3_000)
+    tracker.on_submit("O-1", 10_000)
+    tracker.on_ack("O-1", 50_000)
+
+    summary = tracker.summary(50_000)
+    assert summary["feed"]["max"] == 1_000
+    assert summary["queue"]["max"] == 2_000
+    assert summary["decision"]["max"] == 7_000
+    assert summary["ack"]["max"] == 40_000
+    assert summary["tick_to_ack"]["max"] == 49_000
+    assert tracker.pending_count == 0
+
+
+def test_prometheus_sum_count_are_cumulative():
+    tracker = OrderLatencyTracker(window_secs=60, slots=6)
+    _ack_order(tracker, "O-1", 0, 1_000, 2_000)
+    _ack_order(tracker, "O-2", 300 * SECOND, 1_000, 2_000)
+
+    text = tracker.to_prometheus(300 * SECOND + 10_000)
+    assert 'grid_order_latency_seconds_count{stage="ack"} 2' in text
+    assert tracker.summary(300 * SECOND + 10_000)["ack"]["count"] == 1
+
+    # 窗口过期后分位数为0，但累计值保持不变
+    later = tracker.to_prometheus(1_000 * SECOND)
+    assert 'grid_order_latency_seconds{stage="ack",quantile="0.5"} 0.000000000' in later
+    assert 'grid_order_latency_seconds_count{stage="ack"} 2' in later
+
+    lifetime = tracker.to_prometheus(1_000 * SECOND, lifetime=True)
+    assert 'grid_order_latency_seconds{stage="ack",quantile="0.5"} 0.000002000' in lifetime
+
+
+def test_discard_and_pending_bound():
+    tracker = OrderLatencyTracker(max_pending=2)
+    for i in range(3):
+        tracker.on_submit(f"O-{i}", i)
+    assert tracker.pending_count == 2
+    assert tracker.dropped_total == 1
+
+    tracker.discard("O-2")
+    assert tracker.pending_count == 1
@@ -0,0 +1,116 @@
+"""
+市场条件监控测试
+Tests for the streaming market-condition estimators and gates
+"""
+
+import numpy as np
+import pytest
+
+from src.risk.market_conditions import (
+    PAUSED,
+    RESUMED,
+    EwmaVariance,
+    MarketConditionMonitor,
+    RollingSum,
+    RollingTrend,
+    RollingWelford,
+)
+
+
+MINUTE = 60 * 1_000_000_000
+
+
+def test_rolling_welford_matches_numpy():
+    rng = np.random.default_rng(1)
+    values = rng.normal(0.0, 0.01, 500)
+    stats = RollingWelford(50)
+    for i, x in enumerate(values):
+        stats.update(float(x))
+        window = values[max(0, i - 49): i + 1]
+        assert stats.mean == pytest.approx(window.mean(), abs=1e-12)
+        if len(window) > 1:
+            assert stats.variance == pytest.approx(window.var(ddof=1), rel=1e-6)
+
+
+def test_rolling_trend_matches_polyfit():
+    rng = np.random.default_rng(2)
+    values = np.cumsum(rng.normal(0.001, 0.01, 200))
+    trend = RollingTrend(30)
+    for i, y in enumerate(values):
+        trend.update(float(y))
+        window = values[max(0, i - 29): i + 1]
+        if len(window) > 1:
+            assert trend.slope == pytest.approx(np.polyfit(np.arange(len(window)), window, 1)[0], abs=1e-9)
+
+
+def test_rolling_sum_and_ewma():
+    total = RollingSum(3)
+    for x in [1.0, 2.0, 3.0, 4.0]:
+        total.update(x)
+    assert total.full and total.total == pytest.approx(9.0)
+
+    ewma = EwmaVariance(halflife=1)
+    ewma.update(2.0)
+    ewma.update(0.0)
+    assert ewma.value == pytest.approx(2.0)
+
+
+def make_monitor(**kwargs):
+    events = []
+    monitor = MarketConditionMonitor(
+        sample_secs=60, window_secs=3600, trend_window_secs=1800, min_samples=10,
+        on_event=events.append, **kwargs
+    )
+    return monitor, events
+
+
+def test_trend_pauses_then_resumes():
+    monitor, events = make_monitor(trend_threshold=0.05)
+    price = 100.0
+    for minute in range(40):                       # 单边上涨 1%/分钟
+        monitor.update(minute * MINUTE, price)
+        price *= 1.01
+    assert monitor.paused
+    assert events[0].kind == PAUSED and events[0].trend > 0.05
+
+    for minute in range(40, 120):                  # 横盘，趋势窗口滚动出上涨段
+        monitor.update(minute * MINUTE, price)
+    assert not monitor.paused
+    assert [e.kind for e in events] == [PAUSED, RESUMED]
+
+
+def test_volume_gate_waits_for_full_window():
+    monitor, events = make_monitor(min_volume=1_000.0)
+    for minute in range(59):
+        monitor.update(minute * MINUTE, 100.0)
+        monitor.add_volume(minute * MINUTE, 1.0)
+    assert not monitor.paused                      # 窗口未满不判断
+    for minute in range(59, 62):
+        monitor.update(minute * MINUTE, 100.0)
+    assert monitor.paused and "成交额" in monitor.reasons[0]
+
+
+def test_gap_fills_flat_samples():
+    monitor, _ = make_monitor(max_volatility=1.0)
+    monitor.update(0, 100.0)
+    monitor.update(MINUTE * 10 + 1, 101.0)
+    assert monitor.samples == 10
+    assert monitor.returns.count == 10
+    assert monitor.returns.variance == 0.0         # 空白区间按价格不变补齐
+
+
+def test_sampling_depends_only_on_event_time():
+    rng = np.random.default_rng(3)
+    ts = np.sort(rng.integers(0, 300 * MINUTE, 5_000))
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(ts))))
+
+    a, _ = make_monitor(max_volatility=0.05, volatility_spike=0.1)
+    b, _ = make_monitor(max_volatility=0.05, volatility_spike=0.1)
+    for t, p in zip(ts, prices):
+        a.update(int(t), float(p))
+    # 采样只取决于行情的事件时间和价格，与推送次数、处理时刻无关
+    for t, p in zip(ts, prices):
+        b.update(int(t), float(p))
+        b.update(int(t), float(p))
+    assert a.values() == b.values()
+    assert a.samples == b.samples
@@ -0,0 +1,47 @@
+"""
+指标注册表测试
+Tests for the in-process metrics registry
+"""
+
+import json
+
+from src.monitoring.metrics import MetricsFlusher, MetricsRegistry, RollingRate
+
+
+SECOND = 1_000_000_000
+
+
+def test_rolling_rate_window():
+    rate = RollingRate(window_secs=10)
+    for second in range(5):
+        rate.mark(second * SECOND, count=2)
+
+    assert rate.rate(4 * SECOND) == 1.0
+    assert rate.rate(12 * SECOND) == 0.4   # 第0~2秒已滑出窗口
+    assert rate.rate(100 * SECOND) == 0.0
+
+
+def test_flusher_uses_injected_clock(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("orders").inc(3)
+    registry.rate("quote_rate", window_secs=10).mark(1_000 * SECOND, count=20)
+
+    flusher = MetricsFlusher(registry, str(tmp_path / "m.jsonl"), clock=lambda: 1_001 * SECOND)
+    flusher.flush()
+
+    snapshot = json.loads((tmp_path / "m.jsonl").read_text())
+    assert snapshot["ts"] == 1_001 * SECOND
+    assert snapshot["counters"]["orders"] == 3
+    assert snapshot["rates"]["quote_rate"] == 2.0
+
+
+def test_flusher_restart_after_stop(tmp_path):
+    path = tmp_path / "m.jsonl"
+    flusher = MetricsFlusher(MetricsRegistry(), str(path), interval_secs=0.01)
+
+    flusher.start()
+    flusher.stop(final_flush=False)
+    flusher.start()
+    assert flusher._thread.is_alive()
+    flusher.stop()
+    assert path.exists()
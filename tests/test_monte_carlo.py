@@ -0,0 +1,37 @@
+"""
+蒙特卡洛稳健性测试的测试
+Tests for Monte Carlo path generation
+"""
+
+import numpy as np
+
+from src.backtest.monte_carlo import _run_batch, resample_returns
+from src.backtest.vectorized_grid import grid_levels
+
+
+def _batches(returns, seeds, n_batches):
+    levels = grid_levels(95.0, 105.0, 11)
+    parts = [
+        _run_batch(returns, 100.0, levels, 1000.0, 0.001, "block", 20, [seeds[i] for i in batch], 10)
+        for batch in np.array_split(np.arange(len(seeds)), n_batches)
+    ]
+    return np.concatenate([p["pnl"] for p in parts])
+
+
+def test_paths_independent_of_batching():
+    returns = np.random.default_rng(0).normal(0, 0.002, 500)
+    seeds = np.random.SeedSequence(42).spawn(12)
+
+    single = _batches(returns, seeds, 1)
+    assert np.array_equal(single, _batches(returns, seeds, 4))
+    assert np.array_equal(single, _batches(returns, seeds, 12))
+
+
+def test_block_resample_keeps_contiguous_blocks():
+    returns = np.arange(100, dtype=float)
+    sample = resample_returns(returns, np.random.default_rng(1), "block", block_size=10, length=35)
+
+    assert len(sample) == 35
+    for start in range(0, 30, 10):
+        block = sample[start:start + 10]
+        assert np.array_equal(np.diff(block), np.ones(len(block) - 1))
@@ -0,0 +1,42 @@
+"""
+多品种组合回测数据准备测试
+Tests for multi-instrument data alignment
+"""
+
+import pandas as pd
+from nautilus_trader.model.identifiers import Venue
+
+from src.backtest.multi_instrument_backtest import (
+    check_overlap,
+    create_instrument,
+    parse_pairs,
+    synthetic_quotes,
+)
+
+
+def _frame(start: str, periods: int, freq: str = "30s") -> pd.DataFrame:
+    index = pd.date_range(start, periods=periods, freq=freq, name="timestamp")
+    return pd.DataFrame({"bid_price": 1.0, "ask_price": 1.1}, index=index)
+
+
+def test_check_overlap():
+    assert check_overlap({"A": _frame("2024-01-01", 100), "B": _frame("2024-01-01 00:10", 100)})
+    assert not check_overlap({"A": _frame("2024-01-01", 100), "B": _frame("2025-07-01", 100)})
+
+
+def test_synthetic_quotes_aligned_to_reference():
+    reference = _frame("2024-01-01", 2880)
+    instrument = create_instrument("BTCUSDT", Venue("SIM"))
+
+    df = synthetic_quotes("BTCUSDT", instrument, [reference])
+    assert df.index[0] == reference.index[0]
+    assert df.index[-1] == reference.index[-1]
+    assert len(df) == len(reference)
+    assert (df["ask_price"] > df["bid_price"]).all()
+
+
+def test_parse_pairs():
+    assert parse_pairs(["btcusdt=synthetic", "EURUSD = a.parquet"]) == [
+        ("BTCUSDT", "synthetic"),
+        ("EURUSD", "a.parquet"),
+    ]
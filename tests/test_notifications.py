@@ -0,0 +1,143 @@
+"""
+异步通知分发测试
+Tests for the notification dispatcher
+"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from src.monitoring.notifications import (
+    ERROR,
+    FILL,
+    STRATEGY_START,
+    FileSink,
+    HttpSink,
+    NotificationDispatcher,
+    create_notification_dispatcher,
+)
+
+
+class RecordingSink:
+    def __init__(self, failures: int = 0):
+        self.messages = []
+        self.failures = failures
+
+    async def send(self, event, text):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("temporary")
+        self.messages.append((event, text))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_burst_of_fills_merged_into_one_message():
+    sink = RecordingSink()
+
+    async def scenario():
+        dispatcher = NotificationDispatcher([sink], batch_window=0.05)
+        dispatcher.start()
+        for i in range(12):
+            dispatcher.notify(FILL, f"BUY 0.01 @ {42000 + i}", key="BTCUSDT")
+        dispatcher.notify(FILL, "SELL 1 @ 3000", key="ETHUSDT")
+        dispatcher.notify(STRATEGY_START, "started")
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = run(scenario())
+    assert [event for event, _ in sink.messages] == [FILL, FILL, STRATEGY_START]
+    assert sink.messages[0][1].startswith("订单成交 x12")
+    assert "共 12 条" in sink.messages[0][1]
+    assert dispatcher.merged == 11
+    assert dispatcher.sent == 3
+
+
+def test_retry_with_backoff_then_give_up():
+    flaky, broken = RecordingSink(failures=2), RecordingSink(failures=100)
+
+    async def scenario():
+        dispatcher = NotificationDispatcher([flaky, broken], batch_window=0.0, max_retries=2, backoff=0.001)
+        dispatcher.start()
+        dispatcher.notify(ERROR, "rejected")
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = run(scenario())
+    assert flaky.messages == [(ERROR, "rejected")]
+    assert dispatcher.sent == 1 and dispatcher.failed == 1
+    assert dispatcher.retries == 4
+
+
+def test_notify_never_blocks_and_filters_events():
+    class SlowSink:
+        async def send(self, event, text):
+            await asyncio.sleep(10)
+
+    async def scenario():
+        dispatcher = NotificationDispatcher([SlowSink()], events=[FILL], max_queue=3, batch_window=0.0)
+        assert not dispatcher.notify(FILL, "before start")
+        dispatcher.start()
+        assert not dispatcher.notify(ERROR, "filtered")
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = [dispatcher.notify(FILL, str(i)) for i in range(10)]
+        assert loop.time() - start < 0.05
+        await dispatcher.stop(timeout=0.05)
+        return dispatcher, results
+
+    dispatcher, results = run(scenario())
+    assert results[:3] == [True, True, True]
+    assert dispatcher.dropped == 7
+
+
+def test_file_and_http_sinks(tmp_path):
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        path = tmp_path / "notifications.jsonl"
+        sinks = [FileSink(str(path)), HttpSink(f"http://127.0.0.1:{server.server_port}/hook")]
+
+        async def scenario():
+            dispatcher = NotificationDispatcher(sinks, batch_window=0.0)
+            dispatcher.start()
+            dispatcher.notify(STRATEGY_START, "网格策略启动")
+            await dispatcher.stop()
+
+        run(scenario())
+    finally:
+        server.shutdown()
+
+    assert received == [{"event": STRATEGY_START, "text": "网格策略启动"}]
+    record = json.loads(path.read_text(encoding="utf-8"))
+    assert record["event"] == STRATEGY_START
+
+
+def test_dispatcher_from_yaml_skips_channels_without_secrets(tmp_path, monkeypatch):
+    monkeypatch.delenv("TELEGRAM_BOT_TOKEN", raising=False)
+    config = {
+        "telegram": {"enabled": True, "chat_id": "1"},
+        "email": {"enabled": False},
+        "file": str(tmp_path / "n.jsonl"),
+        "events": ["fill"],
+    }
+    dispatcher = create_notification_dispatcher(config)
+    assert [type(sink).__name__ for sink in dispatcher.sinks] == ["FileSink"]
+    assert dispatcher.events == {"fill"}
+
+    assert create_notification_dispatcher({"telegram": {"enabled": True, "chat_id": "1"}}) is None
@@ -0,0 +1,125 @@
+"""
+订单调度器测试
+Tests for the token-bucket order scheduler
+"""
+
+from types import SimpleNamespace
+
+from src.live.order_scheduler import OrderScheduler, TokenBucket
+
+
+SECOND = 1_000_000_000
+
+
+def make_order(order_id: str, side: str = "BUY", price: float = 100.0, quantity: float = 1.0):
+    return SimpleNamespace(
+        client_order_id=SimpleNamespace(value=order_id),
+        side=side,
+        price=price,
+        quantity=quantity,
+        is_closed=False,
+    )
+
+
+def make_scheduler(**kwargs):
+    sent = []
+    scheduler = OrderScheduler(
+        submit_fn=lambda order: sent.append(("submit", order.client_order_id.value)),
+        cancel_fn=lambda order: sent.append(("cancel", order.client_order_id.value)),
+        batch_cancel_fn=lambda orders: sent.append(("batch", [o.client_order_id.value for o in orders])),
+        **kwargs,
+    )
+    return scheduler, sent
+
+
+def test_token_bucket_refill_and_wait():
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    assert bucket.try_take(0)
+    assert bucket.try_take(0)
+    assert not bucket.try_take(0)
+    assert bucket.wait_ns(0) == SECOND // 2 + 1
+    assert bucket.try_take(SECOND // 2 + 1)
+
+
+def test_submits_throttled_then_drained():
+    scheduler, sent = make_scheduler(submit_rate=1.0, cancel_rate=1.0, burst=1)
+    scheduler.submit(make_order("A"), 100.0, 0)
+    scheduler.submit(make_order("B"), 101.0, 0)
+
+    assert sent == [("submit", "A")]
+    assert scheduler.queue_depth == 1
+    next_ns = scheduler.next_drain_ns(0)
+    assert next_ns is not None and next_ns > 0
+
+    scheduler.drain(next_ns)
+    assert sent[-1] == ("submit", "B")
+    assert scheduler.next_drain_ns(next_ns) is None
+
+
+def test_cancels_sent_before_submits():
+    scheduler, sent = make_scheduler(submit_rate=1.0, cancel_rate=1.0, burst=1)
+    first = make_order("A")
+    scheduler.submit(first, 100.0, 0)
+    scheduler.cancel(first, 100.0, 0)               # 撤单令牌充足，立即发出
+    scheduler.submit(make_order("B"), 101.0, 0)     # 下单令牌已用完，排队
+    scheduler.cancel(make_order("C"), 102.0, 0)     # 撤单令牌已用完，排队
+
+    scheduler.drain(SECOND)
+    assert sent[-2:] == [("cancel", "C"), ("submit", "B")]
+
+
+def test_cancel_of_unsent_submit_is_dropped():
+    scheduler, sent = make_scheduler(submit_rate=1.0, cancel_rate=1.0, burst=1)
+    scheduler.submit(make_order("A"), 100.0, 0)
+    pending = make_order("B")
+    scheduler.submit(pending, 101.0, 0)
+    assert scheduler.pending_order("B") is pending
+
+    scheduler.cancel(pending, 101.0, 0)
+    scheduler.drain(10 * SECOND)
+    assert sent == [("submit", "A")]
+    assert scheduler.coalesced == 2
+
+
+def test_identical_resubmit_coalesces_with_queued_cancel():
+    scheduler, sent = make_scheduler(submit_rate=None, cancel_rate=1.0, burst=1)
+    scheduler.cancel(make_order("X"), 99.0, 0)      # 用掉撤单令牌
+    existing = make_order("A")
+    scheduler.cancel(existing, 100.0, 0)            # 排队
+
+    replacement = make_order("B")
+    assert scheduler.submit(replacement, 100.0, 0) is existing
+    assert scheduler.queue_depth == 0
+    assert ("submit", "B") not in sent
+
+
+def test_unlimited_direction_is_not_throttled():
+    scheduler, sent = make_scheduler(submit_rate=None, cancel_rate=None)
+    for i in range(50):
+        scheduler.submit(make_order(str(i)), float(i), 0)
+    assert len(sent) == 50
+    assert scheduler.throttled == 0
+    assert scheduler.next_drain_ns(0) is None
+
+
+def test_flush_cancels_batches_and_skips_closed():
+    scheduler, sent = make_scheduler(cancel_rate=1.0, burst=1, batch_size=3)
+    scheduler.cancel(make_order("first"), 0.0, 0)
+    orders = [make_order(str(i)) for i in range(5)]
+    orders[2].is_closed = True
+    for i, order in enumerate(orders):
+        scheduler.cancel(order, float(i + 1), 0)
+
+    scheduler.flush_cancels(0)
+    assert sent[1:] == [("batch", ["0", "1", "3"]), ("cancel", "4")]
+    assert scheduler.queue_depth == 0
+
+
+def test_drop_submits_returns_unsent_orders():
+    scheduler, sent = make_scheduler(submit_rate=1.0, burst=1)
+    scheduler.submit(make_order("A"), 100.0, 0)
+    scheduler.submit(make_order("B"), 101.0, 0)
+    dropped = scheduler.drop_submits()
+    assert [o.client_order_id.value for o in dropped] == ["B"]
+    scheduler.drain(10 * SECOND)
+    assert sent == [("submit", "A")]
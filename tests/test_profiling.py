@@ -0,0 +1,94 @@
+"""
+策略回调计时测试
+Tests for the per-callback profiler
+"""
+
+import pytest
+
+from src.monitoring.profiling import CallbackProfiler
+
+
+class Handler:
+    """模拟策略: 回调记录调用参数，on_error 抛出异常"""
+
+    def __init__(self):
+        self.calls = []
+
+    def on_quote_tick(self, tick):
+        """处理报价"""
+        self.calls.append(tick)
+        return tick * 2
+
+    def on_error(self):
+        raise RuntimeError("boom")
+
+    def on_bar(self, bar):
+        self.calls.append(bar)
+
+
+def test_wrap_records_each_call_and_keeps_metadata():
+    profiler = CallbackProfiler()
+    handler = Handler()
+    timed = profiler.wrap("on_quote_tick", handler.on_quote_tick)
+
+    assert [timed(i) for i in range(5)] == [0, 2, 4, 6, 8]
+    assert handler.calls == [0, 1, 2, 3, 4]
+    assert timed.__name__ == "on_quote_tick"
+    assert timed.__doc__ == "处理报价"
+
+    hist = profiler.histograms["on_quote_tick"]
+    assert hist.total_count == 5
+    assert hist.max_recorded >= hist.min_value >= 0
+
+
+def test_instrument_replaces_instance_methods_only():
+    profiler = CallbackProfiler()
+    handler = Handler()
+    profiler.instrument(handler, ["on_quote_tick", "on_error"])
+
+    handler.on_quote_tick(1)
+    handler.on_quote_tick(2)
+    handler.on_bar(3)
+    with pytest.raises(RuntimeError):
+        handler.on_error()
+
+    summary = profiler.summary()
+    assert set(summary) == {"on_quote_tick", "on_error"}
+    assert summary["on_quote_tick"]["count"] == 2
+    assert summary["on_error"]["count"] == 1            # 抛出异常的调用同样计时
+    assert "on_quote_tick" not in vars(Handler())         # 其他实例不受影响
+
+
+def test_log_summary_skips_idle_callbacks():
+    profiler = CallbackProfiler()
+    handler = Handler()
+    profiler.instrument(handler, ["on_quote_tick", "on_bar"])
+    for i in range(3):
+        handler.on_quote_tick(i)
+
+    lines = []
+
+    class Log:
+        info = lines.append
+
+    profiler.log_summary(Log())
+    assert lines[0] == "回调耗时统计 (us):"
+    assert len(lines) == 2
+    assert lines[1].startswith("  on_quote_tick: n=3 mean=")
+    for field in ("p50=", "p90=", "p99=", "p99.9=", "max="):
+        assert field in lines[1]
+
+    profiler.reset()
+    lines.clear()
+    profiler.log_summary(Log())
+    assert lines == ["回调耗时统计 (us):"]
+
+
+def test_log_summary_prints_without_logger(capsys):
+    profiler = CallbackProfiler()
+    profiler.wrap("on_bar", lambda: None)()
+    profiler.log_summary()
+
+    out = capsys.readouterr().out
+    assert "回调耗时统计 (us):" in out
+    assert "on_bar: n=1" in out
@@ -0,0 +1,74 @@
+"""
+按时间窗口读取报价数据的测试
+Tests for time-window quote reads
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.instruments import symbol_from_filename
+from src.data import quote_store
+
+
+@pytest.fixture
+def quotes_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(quote_store, "CACHE_DIR", tmp_path / "cache")
+    index = pd.date_range("2024-01-01", periods=5000, freq="1min", name="timestamp")
+    mid = 100 + np.arange(len(index)) * 0.01
+    df = pd.DataFrame({"bid_price": mid - 0.01, "ask_price": mid + 0.01}, index=index)
+    path = tmp_path / "BTCUSDT_quotes.csv"
+    df.to_csv(path)
+    return path, pd.read_csv(path, index_col="timestamp", parse_dates=True)
+
+
+def test_read_csv_window_matches_full_slice(quotes_csv):
+    path, full = quotes_csv
+    start, end = "2024-01-02 03:17", "2024-01-02 09:00"
+
+    df, bytes_read, bytes_total = quote_store.read_csv_window(str(path), start, end)
+
+    pd.testing.assert_frame_equal(df, full.loc[start:end])
+    assert bytes_read < bytes_total / 2
+
+
+def test_read_csv_window_open_ended_and_empty(quotes_csv):
+    path, full = quotes_csv
+
+    df, _, _ = quote_store.read_csv_window(str(path), start="2024-01-04 10:00")
+    pd.testing.assert_frame_equal(df, full.loc["2024-01-04 10:00":])
+
+    df, _, _ = quote_store.read_csv_window(str(path), end="2024-01-01 00:05")
+    pd.testing.assert_frame_equal(df, full.loc[:"2024-01-01 00:05"])
+
+    df, _, _ = quote_store.read_csv_window(str(path), "2023-01-01", "2023-01-02")
+    assert df.empty
+
+
+def test_csv_index_is_cached_and_invalidated(quotes_csv):
+    path, _ = quotes_csv
+    quote_store.load_csv_index(str(path))
+    cache_files = list(quote_store.CACHE_DIR.glob("*.idx.npz"))
+    assert len(cache_files) == 1
+
+    with open(path, "a") as f:
+        f.write("2024-01-05 00:00:00,200.0,200.02\n")
+    quote_store.load_csv_index(str(path))
+    assert len(list(quote_store.CACHE_DIR.glob("*.idx.npz"))) == 2
+
+
+def test_unsorted_csv_falls_back_to_full_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(quote_store, "CACHE_DIR", tmp_path / "cache")
+    index = pd.to_datetime(["2024-01-03", "2024-01-01", "2024-01-02"]).rename("timestamp")
+    path = tmp_path / "quotes.csv"
+    pd.DataFrame({"bid_price": [1.0, 2.0, 3.0], "ask_price": [1.1, 2.1, 3.1]}, index=index).to_csv(path)
+
+    df, bytes_read, bytes_total = quote_store.read_csv_window(str(path), "2024-01-02", "2024-01-03")
+    assert bytes_read == bytes_total
+    assert len(df) == 2
+
+
+def test_symbol_from_filename():
+    assert symbol_from_filename("data/BTCUSDT_quotes.csv") == "BTCUSDT"
+    assert symbol_from_filename("EUR-USD_2024.parquet") == "EURUSD"
+    assert symbol_from_filename("quotes.csv") is None
@@ -0,0 +1,67 @@
+"""
+挂单对账测试
+Tests for open-order reconciliation
+"""
+
+from types import SimpleNamespace
+
+from src.live.reconciliation import match_level, plan_reconciliation
+
+
+LEVELS = [90.0, 95.0, 100.0, 105.0, 110.0]
+
+
+def make_order(order_id, price, side="BUY", quantity=1.0, filled=0.0, status="ACCEPTED", closed=False):
+    return SimpleNamespace(
+        client_order_id=SimpleNamespace(value=order_id),
+        price=price,
+        side=side,
+        quantity=quantity,
+        filled_qty=filled,
+        status=SimpleNamespace(name=status),
+        is_closed=closed,
+    )
+
+
+def plan(active, open_orders, cached=()):
+    orders = {o.client_order_id.value: o for o in list(open_orders) + list(cached)}
+    return plan_reconciliation(active, open_orders, orders.get, LEVELS, tolerance=0.01)
+
+
+def test_match_level():
+    assert match_level(95.004, LEVELS, 0.01) == 95.0
+    assert match_level(97.0, LEVELS, 0.01) is None
+    assert match_level(80.0, LEVELS, 0.01) is None
+    assert match_level(100.0, [], 0.01) is None
+
+
+def test_in_sync_ladder_has_no_changes():
+    open_orders = [make_order("A", 90.0), make_order("B", 110.0, "SELL")]
+    result = plan({"A": 90.0, "B": 110.0}, open_orders)
+    assert result.matched == 2
+    assert result.changes == 0
+
+
+def test_unknown_orders_adopted_or_cancelled():
+    open_orders = [
+        make_order("A", 90.0),
+        make_order("X", 95.0),       # 网格价位空闲 -> 纳入
+        make_order("Y", 90.0),       # 与A同价位重复 -> 撤销
+        make_order("Z", 97.5),       # 不在网格上 -> 撤销
+    ]
+    result = plan({"A": 90.0}, open_orders)
+    assert [(o.client_order_id.value, level) for o, level in result.adopt] == [("X", 95.0)]
+    assert sorted(o.client_order_id.value for o in result.cancel) == ["Y", "Z"]
+
+
+def test_missing_orders_replaced_or_treated_as_fills():
+    cached = [
+        make_order("C", 95.0, quantity=2.0, filled=0.5, status="CANCELED", closed=True),
+        make_order("F", 105.0, "SELL", filled=1.0, status="FILLED", closed=True),
+        make_order("S", 90.0, status="SUBMITTED"),   # 在途，等待确认
+    ]
+    result = plan({"C": 95.0, "F": 105.0, "S": 90.0, "Q": 100.0}, [], cached)
+
+    assert result.replace == [("C", 95.0, "BUY", 1.5)]
+    assert sorted(o.client_order_id.value for o, _ in result.missed_fills) == ["C", "F"]
+    assert result.summary()["replace"] == 1
@@ -0,0 +1,83 @@
+"""
+本地回放交易所测试
+Tests for the local replay venue
+"""
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.live import run_grid_strategy as runner
+from src.live.replay import (
+    ReplayExecutionClient,
+    prepare_replay_strategies,
+    replay_offsets,
+    run_replay_node,
+)
+from src.utils import config_cache
+
+
+PROJECT_ROOT = Path(__file__).parent.parent
+EXAMPLE_CONFIG = PROJECT_ROOT / "config" / "strategies" / "grid_btcusdt.yaml"
+QUOTES = PROJECT_ROOT / "nautilus_data" / "BTCUSDT_quotes.parquet"
+
+
+@pytest.fixture
+def strategy_configs(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_cache, "CACHE_DIR", tmp_path / "cache")
+    return runner.create_grid_strategy_configs([runner.load_strategy_config(str(EXAMPLE_CONFIG))])
+
+
+def test_replay_offsets_scale_with_speed():
+    ts = np.array([1_000, 2_000, 4_000, 4_000], dtype=np.int64) * 1_000_000
+    assert replay_offsets(ts, 1.0).tolist() == [0, 1_000_000_000, 3_000_000_000, 3_000_000_000]
+    assert replay_offsets(ts, 1000.0).tolist() == [0, 1_000_000, 3_000_000, 3_000_000]
+    assert len(replay_offsets(ts[:0], 10.0)) == 0
+
+
+@pytest.mark.parametrize("speed", [0.5, 1001.0])
+def test_replay_speed_out_of_range(speed):
+    with pytest.raises(ValueError):
+        replay_offsets(np.zeros(3, dtype=np.int64), speed)
+
+
+def test_batch_cancel_goes_through_cancel_order():
+    sent = []
+    client = SimpleNamespace(cancel_order=sent.append)
+    ReplayExecutionClient.batch_cancel_orders(client, SimpleNamespace(cancels=["C-1", "C-2"]))
+    assert sent == ["C-1", "C-2"]
+
+
+def test_prepare_replay_strategies(strategy_configs):
+    from nautilus_trader.test_kit.providers import TestInstrumentProvider
+
+    instrument = TestInstrumentProvider.btcusdt_binance()
+    config = strategy_configs[0]
+    first_mid = (config.upper_price or 0) + 1_000_000.0
+
+    prepared = prepare_replay_strategies(strategy_configs, instrument, first_mid)[0]
+
+    assert prepared.instrument_id == str(instrument.id)
+    assert prepared.latency_telemetry
+    assert prepared.order_id_tag == config.order_id_tag
+    if config.upper_price is not None:
+        assert prepared.upper_price is None and prepared.lower_price is None
+
+
+@pytest.mark.skipif(not QUOTES.exists(), reason="缺少回放数据")
+def test_replay_node_runs_grid_end_to_end(strategy_configs, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # 遥测文件写到临时目录
+    result = asyncio.run(run_replay_node(
+        strategy_configs,
+        str(QUOTES),
+        speed=1000.0,
+        start="2025-07-15T00:00",
+        end="2025-07-15T01:00",
+    ))
+
+    assert result["published"] > 0
+    assert result["orders"] > 0
+    assert result["order_latency_ns"]
@@ -0,0 +1,113 @@
+"""
+回测结果存储测试
+Tests for the partitioned Parquet results store
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.results_store import ResultsStore, config_hash, data_hash, fills_from_report
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(tmp_path / "results")
+
+
+def sweep_runs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"config": {"grid_levels": int(levels), "seed": i}, "metrics": {"pnl": float(pnl), "trades": 10, "sharpe_p5": 0.1}}
+        for i, (levels, pnl) in enumerate(zip(rng.integers(5, 50, n), rng.normal(0, 10, n)))
+    ]
+
+
+def test_append_only_partitioned_files(store):
+    first = store.append("sweep", sweep_runs(3))
+    second = store.append_run("backtest", {"grid_levels": 10}, {"pnl": 1.5})
+
+    files = sorted(p.relative_to(store.runs_dir).parts[:2] for p in store.runs_dir.rglob("*.parquet"))
+    assert len(files) == 2
+    assert {parts[0] for parts in files} == {"kind=sweep", "kind=backtest"}
+    assert all(parts[1].startswith("date=") for parts in files)
+    assert len(set(first + [second])) == 4
+    assert not list(store.runs_dir.rglob("_*"))           # 没有残留的临时文件
+    assert store.count() == 4
+
+
+def test_metadata_and_extra_metrics(store, tmp_path):
+    data = tmp_path / "quotes.csv"
+    data.write_text("timestamp,bid_price\n2024-01-01,1.0\n")
+    config = {"grid_levels": 10, "upper_price": 45000.0}
+    run_id = store.append_run(
+        "backtest", config, {"pnl": np.float64(12.5), "fills": 4, "positions": 2},
+        instrument="BTCUSDT.BINANCE", data_file=str(data), start="2024-01-01",
+    )
+
+    record = store.get(run_id)
+    assert record["config"] == config
+    assert record["config_hash"] == config_hash(config)
+    assert record["data_hash"] == data_hash(str(data), "2024-01-01", None)
+    assert record["code_version"]
+    assert record["pnl"] == 12.5 and record["fills"] == 4
+    assert record["positions"] == 2                     # 非固定列的指标来自 extra
+    assert record["kind"] == "backtest"
+
+    data.write_text("timestamp,bid_price\n2024-01-01,2.0\n")
+    assert data_hash(str(data), "2024-01-01", None) != record["data_hash"]
+
+
+def test_query_filters_and_ranks_with_column_pruning(store):
+    runs = sweep_runs(2000)
+    for start in range(0, len(runs), 250):
+        store.append("sweep", runs[start:start + 250])
+    store.append_run("backtest", {}, {"pnl": 1e9})
+
+    top = store.query(
+        ["run_id", "config", "pnl"],
+        filters=[("kind", "==", "sweep"), ("pnl", ">", 0)],
+        sort_by="pnl",
+        limit=10,
+    )
+    expected = sorted((r["metrics"]["pnl"] for r in runs), reverse=True)[:10]
+    assert list(top.columns) == ["run_id", "config", "pnl"]
+    assert top["pnl"].tolist() == expected
+    assert json.loads(top["config"].iloc[0])["grid_levels"] == next(
+        r["config"]["grid_levels"] for r in runs if r["metrics"]["pnl"] == expected[0]
+    )
+
+    worst = store.query(["pnl"], filters=[("kind", "==", "sweep")], sort_by="pnl", descending=False, limit=3)
+    assert worst["pnl"].tolist() == sorted(r["metrics"]["pnl"] for r in runs)[:3]
+    assert store.count([("kind", "==", "sweep"), ("pnl", "<", 0)]) == sum(r["metrics"]["pnl"] < 0 for r in runs)
+
+
+def test_empty_store(store):
+    assert store.count() == 0
+    assert store.query(["run_id"]).empty
+    assert store.get("missing") is None
+    assert store.fills("missing").empty
+
+
+def test_fill_detail(store):
+    report = pd.DataFrame(
+        {
+            "instrument_id": ["BTCUSDT.BINANCE"] * 2,
+            "order_side": ["BUY", "SELL"],
+            "last_qty": ["0.001711", "0.001711"],
+            "last_px": ["116868.69", "117100.00"],
+            "commission": ["0.19996233 USDT", "0.20035810 USDT"],
+            "ts_event": pd.to_datetime(["2025-07-15T00:00:01", "2025-07-15T00:05:00"], utc=True),
+        },
+        index=pd.Index(["O-1", "O-2"], name="client_order_id"),
+    )
+    fills = fills_from_report(report)
+    run_id = store.append_run("backtest", {}, {"pnl": 0.4}, fills=fills)
+
+    stored = store.fills(run_id)
+    assert stored["run_id"].unique().tolist() == [run_id]
+    assert stored["price"].tolist() == [116868.69, 117100.0]
+    assert stored["commission"].tolist() == [0.19996233, 0.2003581]
+    assert stored["side"].tolist() == ["BUY", "SELL"]
@@ -0,0 +1,99 @@
+"""
+下单前风控测试
+Tests for the pre-trade risk manager
+"""
+
+import pytest
+from nautilus_trader.model.enums import OrderSide
+
+from src.risk.manager import ALLOW, BLOCK, SCALE, RiskManager
+
+
+def test_allow_within_limits():
+    risk = RiskManager(capital=10_000, max_position_value=1_000)
+    decision = risk.check(OrderSide.BUY, 5.0, 100.0)
+
+    assert decision.action == ALLOW
+    assert decision.quantity == 5.0
+    assert not risk.events
+
+
+def test_scale_to_max_position_value():
+    risk = RiskManager(capital=10_000, max_position_value=1_000)
+    decision = risk.check(OrderSide.BUY, 20.0, 100.0)
+
+    assert decision.action == SCALE
+    assert decision.quantity == pytest.approx(10.0)
+    assert risk.events[-1].kind == "order_scaled"
+
+
+def test_total_value_counts_open_orders_and_position():
+    risk = RiskManager(capital=100_000, max_total_value=3_000)
+    risk.on_order_submitted("B-1", OrderSide.BUY, 10.0, 100.0)
+    risk.on_fill("B-1", OrderSide.BUY, 10.0, 100.0)
+    risk.on_order_submitted("B-2", OrderSide.BUY, 10.0, 100.0)
+
+    decision = risk.check(OrderSide.BUY, 20.0, 100.0)
+    assert decision.action == SCALE
+    assert decision.quantity == pytest.approx(10.0)
+
+    # 卖单减少多头敞口，不受总持仓限制
+    assert risk.check(OrderSide.SELL, 10.0, 100.0).action == ALLOW
+
+
+def test_reserve_ratio_limits_buy_commitment():
+    risk = RiskManager(capital=10_000, reserve_ratio=0.2)
+    risk.on_order_submitted("B-1", OrderSide.BUY, 60.0, 100.0)
+
+    decision = risk.check(OrderSide.BUY, 30.0, 100.0)
+    assert decision.action == SCALE
+    assert decision.quantity == pytest.approx(20.0)
+
+    risk.on_order_closed("B-1")
+    assert risk.open_buy_notional == 0.0
+    assert risk.check(OrderSide.BUY, 30.0, 100.0).action == ALLOW
+
+
+def test_scaled_quantity_rounded_down_to_increment():
+    risk = RiskManager(capital=10_000, max_position_value=1_000, size_increment=0.001)
+    decision = risk.check(OrderSide.BUY, 1.0, 3_000.0)
+
+    assert decision.quantity == 0.333
+    assert decision.quantity * 3_000.0 <= 1_000
+
+
+def test_quantity_equal_to_min_quantity_is_allowed():
+    risk = RiskManager(capital=10_000, max_position_value=100, min_quantity=1.0, size_increment=1.0)
+
+    assert risk.check(OrderSide.BUY, 5.0, 100.0).quantity == 1.0
+    # 取整后低于最小下单量时拒绝
+    assert risk.check(OrderSide.BUY, 5.0, 150.0).action == BLOCK
+
+
+def test_drawdown_halts_new_exposure():
+    events = []
+    risk = RiskManager(capital=10_000, max_drawdown=0.1, on_event=events.append)
+    risk.on_order_submitted("B-1", OrderSide.BUY, 100.0, 100.0)
+    risk.on_fill("B-1", OrderSide.BUY, 100.0, 100.0)
+
+    risk.on_mark(95.0)
+    assert not risk.halted
+    risk.on_mark(89.0)
+    assert risk.halted
+    assert risk.drawdown == pytest.approx(0.11)
+    assert events[-1].kind == "drawdown_halt"
+
+    assert risk.check(OrderSide.BUY, 1.0, 89.0).action == BLOCK
+    # 平仓方向的订单仍然允许
+    assert risk.check(OrderSide.SELL, 50.0, 89.0).action == ALLOW
+
+
+def test_partial_fill_releases_open_quantity():
+    risk = RiskManager(capital=10_000)
+    risk.on_order_submitted("S-1", OrderSide.SELL, 4.0, 100.0)
+    risk.on_fill("S-1", OrderSide.SELL, 1.0, 100.0)
+    assert risk.open_sell_qty == pytest.approx(3.0)
+
+    risk.on_order_closed("S-1")
+    assert risk.open_sell_qty == pytest.approx(0.0)
+    assert risk.position == pytest.approx(-1.0)
@@ -0,0 +1,54 @@
+"""
+多策略交易节点配置测试
+Tests for building one TradingNode config from a config directory
+"""
+
+import copy
+import shutil
+from pathlib import Path
+
+import pytest
+import yaml
+
+from src.live import run_grid_strategy as runner
+from src.utils import config_cache
+
+
+EXAMPLE_CONFIG = Path(__file__).parent.parent / "config" / "strategies" / "grid_btcusdt.yaml"
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_cache, "CACHE_DIR", tmp_path / "cache")
+    shutil.copy(EXAMPLE_CONFIG, tmp_path / "a_btcusdt.yaml")
+    config = yaml.safe_load(EXAMPLE_CONFIG.read_text(encoding="utf-8"))
+    config["trading"]["instrument_id"] = "ETHUSDT-SPOT.BYBIT"
+    (tmp_path / "b_ethusdt.yaml").write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
+    return tmp_path
+
+
+def test_config_dir_builds_one_strategy_per_file(config_dir):
+    yaml_configs = runner.load_strategy_configs(str(config_dir))
+    strategy_configs = runner.create_grid_strategy_configs(yaml_configs)
+
+    assert [c.instrument_id for c in strategy_configs] == ["BTCUSDT-LINEAR.BYBIT", "ETHUSDT-SPOT.BYBIT"]
+    assert [c.order_id_tag for c in strategy_configs] == ["000", "001"]
+
+
+def test_duplicate_instrument_rejected(config_dir):
+    yaml_configs = runner.load_strategy_configs(str(config_dir))
+    with pytest.raises(ValueError):
+        runner.create_grid_strategy_configs(yaml_configs + [copy.deepcopy(yaml_configs[0])])
+
+
+def test_node_config_shares_clients(config_dir, monkeypatch):
+    monkeypatch.setenv("BYBIT_TESTNET_API_KEY", "key")
+    monkeypatch.setenv("BYBIT_TESTNET_API_SECRET", "secret")
+    strategy_configs = runner.create_grid_strategy_configs(runner.load_strategy_configs(str(config_dir)))
+
+    node_config = runner.create_trading_node_config(strategy_configs, testnet=True)
+
+    assert len(node_config.strategies) == 2
+    assert list(node_config.data_clients) == ["BYBIT"]
+    assert list(node_config.exec_clients) == ["BYBIT"]
+    assert len(node_config.exec_clients["BYBIT"]["product_types"]) == 2
@@ -0,0 +1,84 @@
+"""
+命令行启动速度相关测试（延迟导入、配置缓存、导入耗时统计）
+Tests for lazy CLI imports, the YAML config cache and the import profiler
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+from src.live import run_grid_strategy as runner
+from src.monitoring.profiling import ImportProfiler
+from src.utils import config_cache
+
+
+PROJECT_ROOT = Path(__file__).parent.parent
+EXAMPLE_CONFIG = PROJECT_ROOT / "config" / "strategies" / "grid_btcusdt.yaml"
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_cache, "CACHE_DIR", tmp_path / "cache")
+    return tmp_path / "cache"
+
+
+def test_config_cached_after_first_load(tmp_path, cache_dir, monkeypatch):
+    path = tmp_path / "grid.yaml"
+    path.write_text(EXAMPLE_CONFIG.read_text(encoding="utf-8"), encoding="utf-8")
+
+    first = runner.load_strategy_config(str(path))
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("命中缓存时不应重新解析YAML")
+
+    monkeypatch.setattr(yaml, "safe_load", fail)
+    assert runner.load_strategy_config(str(path)) == first
+
+
+def test_modified_config_invalidates_cache(tmp_path, cache_dir):
+    path = tmp_path / "grid.yaml"
+    path.write_text("a: 1\n", encoding="utf-8")
+    assert config_cache.load_yaml_config(str(path)) == {"a": 1}
+
+    path.write_text("a: 22\n", encoding="utf-8")
+    assert config_cache.load_yaml_config(str(path)) == {"a": 22}
+
+
+def test_invalid_config_rejected_and_not_cached(tmp_path, cache_dir):
+    path = tmp_path / "broken.yaml"
+    path.write_text("strategy:\n  name: x\ngrid:\n  levels: 10\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="grid.spacing"):
+        runner.load_strategy_config(str(path))
+    assert not cache_dir.exists() or not list(cache_dir.glob("*.json"))
+
+
+def test_import_profiler_attributes_time_to_packages():
+    sys.modules.pop("colorsys", None)
+    with ImportProfiler() as profiler:
+        import colorsys  # noqa: F401
+    names = [name for name, _, _ in profiler.summary()]
+    assert "colorsys" in names
+    assert profiler.counts["colorsys"] == 1
+
+
+@pytest.mark.parametrize("script", ["scripts/run_backtest.py", "scripts/run_live.py"])
+def test_help_does_not_import_nautilus(script):
+    code = (
+        "import runpy, sys\n"
+        f"sys.argv = [{script!r}, '--help']\n"
+        "try:\n"
+        f"    runpy.run_path({script!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(m for m in ('nautilus_trader', 'pandas', 'numpy') if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,65 @@
+"""
+合成行情数据生成器测试
+Tests for the synthetic quote generator
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.synthetic_data import PROCESSES, SyntheticQuoteGenerator, _ar1_filter
+
+
+def _naive_ar1(eps, a, x0):
+    out = np.empty(len(eps))
+    x = x0
+    for i, e in enumerate(eps):
+        x = a * x + e
+        out[i] = x
+    return out
+
+
+@pytest.mark.parametrize("a", [0.0, 1e-20, 0.5, 0.99, 0.999999])
+def test_ar1_filter_matches_recursion(a):
+    eps = np.random.default_rng(0).normal(size=5000)
+    assert np.allclose(_ar1_filter(eps, a, 1.5), _naive_ar1(eps, a, 1.5), rtol=1e-9, atol=1e-9)
+
+
+def test_ar1_filter_unit_root_and_empty():
+    eps = np.array([1.0, 2.0, 3.0])
+    assert np.array_equal(_ar1_filter(eps, 1.0, 10.0), [11.0, 13.0, 16.0])
+    assert len(_ar1_filter(np.array([]), 0.5, 0.0)) == 0
+
+
+def _generate(process, chunk_size, n=3000):
+    generator = SyntheticQuoteGenerator(process=process, seed=7, regime_duration=500, jump_intensity=5_000.0)
+    return pd.concat(list(generator.chunks(n, chunk_size)))
+
+
+@pytest.mark.parametrize("process", PROCESSES)
+def test_output_independent_of_chunk_size(process):
+    whole = _generate(process, 3000)
+    chunked = _generate(process, 257)
+
+    assert whole.index.equals(chunked.index)
+    assert np.array_equal(whole["bid_size"], chunked["bid_size"])
+    assert np.array_equal(whole["ask_size"], chunked["ask_size"])
+    # 价格经过累加，分块只会带来浮点误差级别的差异（个别报价的取整可能相差一个tick）
+    for column in ("bid_price", "ask_price"):
+        assert np.allclose(whole[column], chunked[column], rtol=0, atol=0.011)
+
+
+def test_quotes_are_well_formed():
+    df = _generate("gbm", 1000)
+    assert (df["ask_price"] > df["bid_price"]).all()
+    assert (df["bid_size"] > 0).all()
+    assert df.index.is_monotonic_increasing
+    assert (np.diff(df.index.asi8) == 100_000_000).all()
+
+
+def test_same_seed_same_data():
+    a = SyntheticQuoteGenerator(seed=1).next_chunk(100)
+    b = SyntheticQuoteGenerator(seed=1).next_chunk(100)
+    c = SyntheticQuoteGenerator(seed=2).next_chunk(100)
+    pd.testing.assert_frame_equal(a, b)
+    assert not a.equals(c)
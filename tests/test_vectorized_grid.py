@@ -0,0 +1,46 @@
+"""
+向量化网格模拟器测试
+Tests for the vectorized grid simulator
+"""
+
+import numpy as np
+import pytest
+
+from src.backtest.vectorized_grid import simulate_grid
+
+
+LEVELS = np.array([90.0, 100.0, 110.0])
+
+
+def test_round_trip_without_fees():
+    # 105 -> 95 在100买入格子1，-> 115 在110卖出
+    result = simulate_grid([105.0, 95.0, 105.0, 115.0], LEVELS, total_amount=200.0, fee_rate=0.0)
+
+    assert result["pnl"] == pytest.approx(10.0)
+    assert result["trades"] == 2
+    assert result["round_trips"] == 1
+    assert result["max_drawdown"] == pytest.approx(5.0 / 200.0)
+
+
+def test_fees_charged_on_both_sides():
+    result = simulate_grid([105.0, 95.0, 115.0], LEVELS, total_amount=200.0, fee_rate=0.001)
+    assert result["pnl"] == pytest.approx(110.0 * 0.999 - 100.0 * 1.001)
+
+
+def test_initial_inventory_above_start_price():
+    # 起始价低于所有格子：两个格子都按起始价买入底仓，上涨时分别在100和110卖出
+    result = simulate_grid([85.0, 115.0], LEVELS, total_amount=200.0, fee_rate=0.0)
+
+    assert result["pnl"] == pytest.approx(100.0 / 90.0 * 15.0 + 25.0)
+    assert result["trades"] == 2
+    assert result["round_trips"] == 2
+
+
+def test_no_crossing_no_trades_and_curve_sampling():
+    prices = np.linspace(101.0, 109.0, 100)
+    result = simulate_grid(prices, LEVELS, total_amount=200.0, curve_points=5)
+
+    assert result["trades"] == 0
+    assert result["pnl"] == 0.0
+    assert len(result["curve"]) == 5
+    assert np.allclose(result["curve"], 200.0)